@@ -0,0 +1,179 @@
+"""Run-scoped pipeline configuration.
+
+A :class:`PipelineConfig` travels with each run inside LangGraph's
+``RunnableConfig`` (under ``configurable["pipeline"]``) instead of living in
+``os.environ``, so concurrent runs in one process — two Streamlit sessions, or
+``asyncio.gather`` over several :func:`src.main.arun` calls — each keep their
+own credentials, models and limits. Anything not set on the config falls back
+to the environment, so CLI runs driven by ``.env`` behave as before.
+"""
+
+import json
+import os
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+
+CONFIG_KEY = "pipeline"
+STARTED_AT_KEY = "run_started_at"
+SETTINGS_KEY = "pipeline_settings"
+DEFAULT_MAX_ITERATIONS = 3
+DEFAULT_OUTPUT_DIR = "./output"
+# Graph steps: architect and schema_lint once, then developer → integration →
+# static_check → reviewer ∥ tdd_test → join per iteration, plus some slack.
+SETUP_STEPS = 2
+STEPS_PER_ITERATION = 5
+RECURSION_MARGIN = 5
+DEFAULT_SHARD_THRESHOLD = 15
+DEFAULT_PARTITION_THRESHOLD = 3000
+DEFAULT_REVIEW_SHARD_THRESHOLD = 12
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Per-run limits checked before every developer round (None = unlimited).
+
+    Attributes:
+        deadline_s: Wall-clock seconds from the start of the run.
+        max_tokens: Prompt plus completion tokens across all LLM calls.
+        max_llm_calls: Number of LLM calls.
+    """
+
+    deadline_s: float | None = None
+    max_tokens: int | None = None
+    max_llm_calls: int | None = None
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    """Settings for one pipeline run.
+
+    Attributes:
+        api_keys: Credentials by environment-variable name, e.g.
+                  ``{"GROQ_API_KEY": ..., "TAVILY_API_KEY": ...}``. Names not
+                  listed fall back to the process environment.
+        model: Default model for every node (replaces ``LLM_MODEL``).
+        routing: Per-node routing config in the shape of
+                 :func:`src.utils.routing.load_routing_config`; None reads
+                 ``LLM_ROUTING_FILE`` / ``LLM_ROUTING``.
+        max_iterations: Developer/reviewer/test loop limit.
+        output_dir: Where generated files are written.
+        metrics_path: If set, the run's token/latency metrics are written
+                      there as JSON (see :mod:`src.utils.metrics`).
+        candidates: Developer candidates generated and reviewed in parallel
+                    per iteration; the first approved one wins (see
+                    :mod:`src.utils.speculative`). 1 disables speculation.
+        escalation_model: Model the developer switches to once the loop stops
+                          making progress (see :mod:`src.utils.convergence`);
+                          None keeps the routed model and only changes the prompt.
+        budget: Time, token and call limits for the run (see
+                :mod:`src.utils.budget`).
+        patch_mode: From the second iteration on, ask the developer for only
+                    the changed files or unified diffs and merge them into the
+                    previous files (see :mod:`src.utils.patch`); False always
+                    regenerates the whole backend.
+        shard_threshold: Schemas with at least this many tables are generated
+                         per entity in parallel (see :mod:`src.utils.sharding`);
+                         0 disables sharding.
+        partition_threshold: Requirements of at least this many tokens are
+                             split into bounded contexts whose sub-schemas the
+                             architect designs in parallel and merges (see
+                             :mod:`src.utils.schema_merge`); 0 disables it.
+        review_shard_threshold: With at least this many files to review, the
+                                reviewer reviews file groups in parallel and
+                                merges them locally (see
+                                :mod:`src.utils.review_shards`); 0 disables it.
+        fallback_endpoints: Endpoints to fail over (and hedge) to, in the
+                            shape of ``LLM_FALLBACK_ENDPOINTS``; None reads
+                            that variable, ``[]`` disables failover.
+        hedge_delay: Seconds before a slow call is hedged (replaces
+                     ``LLM_HEDGE_DELAY``).
+        hedge_percentile: Latency percentile to hedge at (replaces
+                          ``LLM_HEDGE_PERCENTILE``).
+        hedge_nodes: Nodes that hedge (replaces ``LLM_HEDGE_NODES``).
+        rpm_limit: Requests per minute for this run's calls (replaces
+                   ``LLM_RPM_LIMIT``; 0 is unlimited). Runs with the same
+                   limits share one scheduler.
+        tpm_limit: Tokens per minute (replaces ``LLM_TPM_LIMIT``).
+    """
+
+    api_keys: Mapping[str, str] = field(default_factory=dict)
+    model: str | None = None
+    routing: Mapping[str, Mapping[str, Any]] | None = None
+    max_iterations: int = DEFAULT_MAX_ITERATIONS
+    output_dir: str = DEFAULT_OUTPUT_DIR
+    metrics_path: str | None = None
+    candidates: int = 1
+    escalation_model: str | None = None
+    budget: Budget = field(default_factory=Budget)
+    patch_mode: bool = True
+    shard_threshold: int = DEFAULT_SHARD_THRESHOLD
+    partition_threshold: int = DEFAULT_PARTITION_THRESHOLD
+    review_shard_threshold: int = DEFAULT_REVIEW_SHARD_THRESHOLD
+    fallback_endpoints: Sequence[Mapping[str, Any]] | None = None
+    hedge_delay: float | None = None
+    hedge_percentile: float | None = None
+    hedge_nodes: Sequence[str] | None = None
+    rpm_limit: int | None = None
+    tpm_limit: int | None = None
+
+    def api_key(self, name: str) -> str | None:
+        """The credential stored under *name*, falling back to the environment."""
+        return self.api_keys.get(name) or os.environ.get(name)
+
+    @property
+    def recursion_limit(self) -> int:
+        """Graph steps a run of ``max_iterations`` iterations can take."""
+        return SETUP_STEPS + STEPS_PER_ITERATION * self.max_iterations + RECURSION_MARGIN
+
+    def settings(self) -> str:
+        """Every field but ``api_keys``, as JSON for the checkpoint metadata."""
+        settings = asdict(self)
+        del settings["api_keys"]
+        return json.dumps(settings, sort_keys=True)
+
+    def restored(self, metadata: Mapping[str, Any] | None) -> "PipelineConfig":
+        """The config a checkpointed run was started with, keeping this one's ``api_keys``.
+
+        *metadata* is the checkpoint's metadata; checkpoints saved without
+        settings keep this config.
+        """
+        settings = (metadata or {}).get(SETTINGS_KEY)
+        if not settings:
+            return self
+        known = {f.name for f in fields(self)} - {"api_keys"}
+        values = {k: v for k, v in json.loads(settings).items() if k in known}
+        if "budget" in values:
+            values["budget"] = Budget(**values["budget"])
+        return PipelineConfig(api_keys=self.api_keys, **values)
+
+    def runnable_config(
+        self, run_id: str | None = None, started_at: float | None = None
+    ) -> RunnableConfig:
+        """A ``RunnableConfig`` carrying this config, for ``graph.stream``/``astream``.
+
+        *run_id* becomes the checkpoint ``thread_id`` for checkpointed graphs.
+        The recursion limit follows ``max_iterations``; the budget's deadline
+        counts from *started_at* (default: now). The settings and start time
+        are saved with every checkpoint, so a resumed run can restore both
+        (see :meth:`restored`).
+        """
+        configurable: dict[str, Any] = {
+            CONFIG_KEY: self,
+            STARTED_AT_KEY: started_at if started_at is not None else time.time(),
+        }
+        if run_id:
+            configurable["thread_id"] = run_id
+        return {
+            "recursion_limit": self.recursion_limit,
+            "configurable": configurable,
+            "metadata": {SETTINGS_KEY: self.settings()},
+        }
+
+def get_pipeline_config(config: RunnableConfig | None) -> PipelineConfig:
+    """Return the run's PipelineConfig, or the environment-backed default."""
+    pipeline = ((config or {}).get("configurable") or {}).get(CONFIG_KEY)
+    return pipeline if isinstance(pipeline, PipelineConfig) else PipelineConfig()
@@ -1,95 +1,137 @@
 """LangGraph StateGraph assembly — wires together all nodes and edges."""
 
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START, END
+from src.config import DEFAULT_MAX_ITERATIONS, get_pipeline_config
 from src.state import GraphState
-from src.nodes.architect import architect_node
-from src.nodes.developer import developer_node
-from src.nodes.reviewer import reviewer_node
-from src.nodes.integration import integration_node
-from src.nodes.tdd_test import tdd_test_node
+from src.utils.budget import BUDGET_EXHAUSTED, remaining_budget
+from src.utils.convergence import STALL_STATUSES
+from src.nodes.architect import aarchitect_node, architect_node
+from src.nodes.developer import adeveloper_node, developer_node
+from src.nodes.reviewer import areviewer_node, reviewer_node
+from src.nodes.integration import aintegration_node, integration_node
+from src.nodes.join import ajoin_node, join_node
+from src.nodes.schema_lint import aschema_lint_node, schema_lint_node
+from src.nodes.static_check import astatic_check_node, static_check_node
+from src.nodes.tdd_test import atdd_test_node, tdd_test_node
 
-MAX_ITERATIONS = 3
+MAX_ITERATIONS = DEFAULT_MAX_ITERATIONS
 
 
-def should_continue(state: GraphState) -> str:
-    """Conditional edge: decides whether to loop back or finish.
-    
+def _max_iterations(config: RunnableConfig | None) -> int:
+    if config is None:
+        return MAX_ITERATIONS
+    return get_pipeline_config(config).max_iterations
+
+
+def should_continue(state: GraphState, config: RunnableConfig | None = None) -> str:
+    """Conditional edge after the join node: loop back or finish.
+
+    The iteration limit and budget come from the run's PipelineConfig.
+
     Returns:
-        'developer_node' if there are unresolved issues and iterations remain.
-        'integration_node' if code is approved or max iterations reached.
+        'developer_node' if the review or the tests failed and iterations
+        and budget remain.
+        'end' if the round was approved, the loop stalled, the budget ran out
+        or max iterations reached.
     """
-    # Code approved — no feedback
-    if not state.get("review_feedback"):
-        return "integration_node"
+    # Reviewer approved and tests passed (or were skipped)
+    if state.get("final_status") == "approved":
+        return "end"
+
+    # Same code or same complaints again, even after escalating
+    if state.get("final_status") in STALL_STATUSES:
+        print(f"\n🛑 No progress ({state['final_status']}). Stopping early.")
+        return "end"
+
+    # Out of time, tokens or calls — keep the best-effort files
+    if state.get("final_status") == BUDGET_EXHAUSTED or remaining_budget(state, config).exhausted:
+        print("\n🛑 Run budget exhausted. Stopping.")
+        return "end"
 
     # Max iterations reached — fail gracefully
-    if state.get("iterations", 0) >= MAX_ITERATIONS:
-        print(f"\n🛑 Max iterations ({MAX_ITERATIONS}) reached. Stopping.")
-        return "integration_node"
+    max_iterations = _max_iterations(config)
+    if state.get("iterations", 0) >= max_iterations:
+        print(f"\n🛑 Max iterations ({max_iterations}) reached. Stopping.")
+        return "end"
 
     # Still have feedback to address
-    print(f"\n🔄 Looping back to developer (iteration {state['iterations']}/{MAX_ITERATIONS})")
+    print(f"\n🔄 Looping back to developer (iteration {state.get('iterations', 0)}/{max_iterations})")
     return "developer_node"
 
 
-def should_continue_after_tests(state: GraphState) -> str:
-    """Conditional edge after TDD node: route to END or loop back to developer.
+def route_after_static_check(state: GraphState) -> list[str] | str:
+    """Conditional edge after the static check.
 
     Returns:
-        'end' if tests passed, were skipped, or max iterations reached.
-        'developer_node' if tests failed and iterations remain.
+        'join_node' when the scan found unsafe queries or schema mismatches
+        (no LLM review or test run this round), else both the reviewer and
+        the TDD node.
     """
-    test_status = state.get("test_status", "")
+    if state.get("static_issues"):
+        return "join_node"
+    return ["reviewer_node", "tdd_test_node"]
 
-    if test_status in ("passed", "skipped"):
-        return "end"
 
-    # Tests failed
-    if state.get("iterations", 0) >= MAX_ITERATIONS:
-        print(f"\n🛑 Max iterations ({MAX_ITERATIONS}) reached after test failure. Stopping.")
-        return "end"
+def _node(func, afunc) -> RunnableLambda:
+    """Wrap a node so ``graph.stream`` runs *func* and ``graph.astream`` runs *afunc*."""
+    return RunnableLambda(func, afunc=afunc, name=func.__name__)
 
-    print(f"\n🔄 Tests failed — looping back to developer (iteration {state.get('iterations', 0)}/{MAX_ITERATIONS})")
-    return "developer_node"
 
-
-def build_graph() -> StateGraph:
+def build_graph(checkpointer: BaseCheckpointSaver | None = None) -> StateGraph:
     """Constructs and compiles the LangGraph workflow.
-    
+
+    Every node has a sync and an async implementation, so the compiled graph
+    can be driven either with ``stream``/``invoke`` or ``astream``/``ainvoke``.
+
+    Args:
+        checkpointer: Saves the state after every node (see
+                      :func:`src.utils.checkpoint.get_checkpointer`). Runs
+                      then need a ``thread_id`` in their config, and streaming
+                      ``None`` with the same ``thread_id`` resumes after the
+                      last completed node.
+
     Returns:
         A compiled LangGraph StateGraph ready for invocation.
     """
     workflow = StateGraph(GraphState)
 
     # --- Add Nodes ---
-    workflow.add_node("architect_node", architect_node)
-    workflow.add_node("developer_node", developer_node)
-    workflow.add_node("reviewer_node", reviewer_node)
-    workflow.add_node("integration_node", integration_node)
-    workflow.add_node("tdd_test_node", tdd_test_node)
+    workflow.add_node("architect_node", _node(architect_node, aarchitect_node))
+    workflow.add_node("schema_lint_node", _node(schema_lint_node, aschema_lint_node))
+    workflow.add_node("developer_node", _node(developer_node, adeveloper_node))
+    workflow.add_node("reviewer_node", _node(reviewer_node, areviewer_node))
+    workflow.add_node("integration_node", _node(integration_node, aintegration_node))
+    workflow.add_node("static_check_node", _node(static_check_node, astatic_check_node))
+    workflow.add_node("tdd_test_node", _node(tdd_test_node, atdd_test_node))
+    workflow.add_node("join_node", _node(join_node, ajoin_node))
 
     # --- Add Edges ---
-    # START → Architect → Developer → Reviewer
+    # START → Architect → Schema lint (local rule fixes) → Developer → Integration (writes the files)
     workflow.add_edge(START, "architect_node")
-    workflow.add_edge("architect_node", "developer_node")
-    workflow.add_edge("developer_node", "reviewer_node")
+    workflow.add_edge("architect_node", "schema_lint_node")
+    workflow.add_edge("schema_lint_node", "developer_node")
+    workflow.add_edge("developer_node", "integration_node")
+
+    # Local SQL checks (injection, schema mismatches). Flagged queries skip the
+    # LLM review and the tests and go straight to the join (and back to the developer).
+    workflow.add_edge("integration_node", "static_check_node")
 
-    # Conditional: Reviewer → Developer (loop) OR → Integration
+    # Otherwise fan out: TDD generates and runs the Jest suite while the
+    # reviewer reviews — test generation needs the schema and code, not the verdict.
     workflow.add_conditional_edges(
-        "reviewer_node",
-        should_continue,
-        {
-            "developer_node": "developer_node",
-            "integration_node": "integration_node",
-        },
+        "static_check_node",
+        route_after_static_check,
+        ["reviewer_node", "tdd_test_node", "join_node"],
     )
 
-    # Integration → TDD → END or back to Developer
-    workflow.add_edge("integration_node", "tdd_test_node")
+    # Join waits for both branches, then → Developer (loop) OR → END
+    workflow.add_edge(["reviewer_node", "tdd_test_node"], "join_node")
     workflow.add_conditional_edges(
-        "tdd_test_node",
-        should_continue_after_tests,
+        "join_node",
+        should_continue,
         {"developer_node": "developer_node", "end": END},
     )
 
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
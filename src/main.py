@@ -2,30 +2,29 @@
 
 import argparse
 import os
+from dataclasses import replace
 from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from src.config import (
+    DEFAULT_MAX_ITERATIONS,
+    DEFAULT_PARTITION_THRESHOLD,
+    DEFAULT_REVIEW_SHARD_THRESHOLD,
+    DEFAULT_SHARD_THRESHOLD,
+    STARTED_AT_KEY,
+    Budget,
+    PipelineConfig,
+)
 from src.graph import build_graph
+from src.state import merge_update
+from src.utils.budget import BUDGET_EXHAUSTED
+from src.utils.checkpoint import get_checkpointer, new_run_id
+from src.utils.convergence import STALL_STATUSES
+from src.utils.llm import continuation_counts, summarize_calls
+from src.utils.metrics import aggregate, export_metrics, format_metrics_table
 
 
-def run(prompt: str, output_dir: str = "./output") -> dict:
-    """Runs the full architect pipeline for a given prompt.
-    
-    Args:
-        prompt: High-level description of the backend to build.
-        output_dir: Directory where generated files will be written.
-    
-    Returns:
-        The final graph state containing schema, code, and status.
-    """
-    load_dotenv()
-
-    print("🚀 Autonomous Backend Architect")
-    print("=" * 60)
-    print(f"📋 Prompt: {prompt}")
-    print("=" * 60)
-
-    graph = build_graph()
-
-    initial_state = {
+def _initial_state(prompt: str, output_dir: str) -> dict:
+    return {
         "requirements": prompt,
         "db_schema": "",
         "server_code": "",
@@ -35,16 +34,22 @@ def run(prompt: str, output_dir: str = "./output") -> dict:
         "output_dir": output_dir,
         "test_results": "",
         "test_status": "",
+        "llm_calls": [],
     }
 
-    # Stream events for visibility
-    final_state = None
-    for event in graph.stream(initial_state, {"recursion_limit": 25}):
-        # Each event is a dict with the node name as key
-        for node_name, node_output in event.items():
-            final_state = {**initial_state, **node_output} if final_state is None else {**final_state, **node_output}
 
-    # Final summary
+def _print_header(prompt: str, run_id: str | None = None, resumed: bool = False) -> None:
+    print("🚀 Autonomous Backend Architect")
+    print("=" * 60)
+    print(f"📋 Prompt: {prompt}")
+    if run_id and resumed:
+        print(f"⏯️  Resuming run {run_id} after its last completed node")
+    elif run_id:
+        print(f"🔖 Run ID: {run_id} (continue with --resume {run_id} if interrupted)")
+    print("=" * 60)
+
+
+def _print_summary(final_state: dict, output_dir: str) -> None:
     print("\n" + "=" * 60)
     print("📦 FINAL OUTPUT SUMMARY")
     print("=" * 60)
@@ -65,6 +70,18 @@ def run(prompt: str, output_dir: str = "./output") -> dict:
                 rel = os.path.relpath(os.path.join(root, fname), out_dir)
                 generated_files.append(rel)
 
+    calls = final_state.get("llm_calls", [])
+    if calls:
+        print("\n🤖 Model calls:")
+        for node, model, endpoint, count in summarize_calls(calls):
+            print(f"   • {node:<10} {model} @ {endpoint} ×{count}")
+        for node, count in continuation_counts(calls).items():
+            print(f"   ↪ {node}: {count} continuation(s) after hitting the output limit")
+
+        print("\n⏱️  Tokens and latency:")
+        for line in format_metrics_table(final_state.get("metrics") or aggregate(calls)):
+            print(line)
+
     if generated_files:
         print("\n📁 Generated files:")
         for f in sorted(generated_files):
@@ -72,10 +89,170 @@ def run(prompt: str, output_dir: str = "./output") -> dict:
 
     if status == "approved":
         print("\n✅ Backend generated and approved!")
+    elif status == BUDGET_EXHAUSTED:
+        remaining = final_state.get("review_feedback", [])
+        print(f"\n⏱️  Run budget exhausted — files are the last iteration's best effort; "
+              f"{len(remaining)} unresolved issue(s).")
+    elif status in STALL_STATUSES:
+        remaining = final_state.get("review_feedback", [])
+        print(f"\n⚠️  Stopped early, no progress ({status}); {len(remaining)} unresolved issue(s).")
     else:
         remaining = final_state.get("review_feedback", [])
         print(f"\n⚠️  Completed with {len(remaining)} unresolved issue(s).")
 
+
+def _finish_metrics(final_state: dict, pipeline: PipelineConfig) -> None:
+    """Add up the run's LLM calls into ``final_state["metrics"]`` and export them."""
+    calls = final_state.get("llm_calls", [])
+    final_state["metrics"] = aggregate(calls)
+    if pipeline.metrics_path:
+        export_metrics(calls, pipeline.metrics_path)
+        print(f"\n📊 Metrics written to {pipeline.metrics_path}")
+
+
+def _pipeline_config(config: PipelineConfig | None, output_dir: str | None) -> PipelineConfig:
+    pipeline = config or PipelineConfig()
+    if output_dir:
+        pipeline = replace(pipeline, output_dir=output_dir)
+    return pipeline
+
+
+def _run_id(checkpointer, resume: str | None) -> str | None:
+    if resume and checkpointer is None:
+        raise ValueError("Cannot resume: checkpointing is off (CHECKPOINT_DIR is empty).")
+    if checkpointer is None:
+        return None
+    return resume or new_run_id()
+
+
+def _resumed_state(values: dict, run_id: str) -> dict:
+    if not values:
+        raise ValueError(f"No checkpoint found for run {run_id!r}.")
+    return dict(values)
+
+
+def _resumed_config(
+    pipeline: PipelineConfig, run_id: str, metadata: dict | None
+) -> tuple[PipelineConfig, RunnableConfig]:
+    """The interrupted run's settings and start time, with this call's credentials."""
+    pipeline = pipeline.restored(metadata)
+    started_at = (metadata or {}).get(STARTED_AT_KEY)
+    return pipeline, pipeline.runnable_config(run_id=run_id, started_at=started_at)
+
+
+def run(
+    prompt: str | None,
+    output_dir: str | None = None,
+    config: PipelineConfig | None = None,
+    resume: str | None = None,
+) -> dict:
+    """Runs the full architect pipeline for a given prompt.
+
+    The state is checkpointed after every node (see
+    :mod:`src.utils.checkpoint`), so an interrupted run can be continued with
+    ``resume=<run_id>`` without repeating the LLM calls of completed nodes.
+
+    Args:
+        prompt: High-level description of the backend to build (ignored when
+                resuming; the checkpoint has it).
+        output_dir: Directory where generated files will be written
+                    (overrides ``config.output_dir``).
+        config: Run-scoped keys, models and limits; defaults to the environment.
+        resume: Run ID of an interrupted run to continue. The run keeps the
+                settings and start time it was begun with; only the
+                ``api_keys`` of *config* are used.
+
+    Returns:
+        The final graph state containing schema, code, and status, plus
+        ``metrics`` (token and latency totals, see :mod:`src.utils.metrics`)
+        and ``run_id`` when checkpointing is on.
+    """
+    load_dotenv()
+    pipeline = _pipeline_config(config, output_dir)
+    checkpointer = get_checkpointer()
+    run_id = _run_id(checkpointer, resume)
+    runnable_config = pipeline.runnable_config(run_id=run_id)
+
+    graph = build_graph(checkpointer)
+    if resume:
+        snapshot = graph.get_state(runnable_config)
+        final_state = _resumed_state(snapshot.values, resume)
+        pipeline, runnable_config = _resumed_config(pipeline, run_id, snapshot.metadata)
+        inputs = None
+    else:
+        final_state = inputs = _initial_state(prompt, pipeline.output_dir)
+    _print_header(final_state["requirements"], run_id, resumed=bool(resume))
+
+    # Stream events for visibility
+    final_state = dict(final_state)
+    for event in graph.stream(inputs, runnable_config):
+        # Each event is a dict with the node name as key
+        for node_name, node_output in event.items():
+            final_state = merge_update(final_state, node_output)
+
+    if run_id:
+        final_state["run_id"] = run_id
+    _finish_metrics(final_state, pipeline)
+    _print_summary(final_state, pipeline.output_dir)
+    return final_state
+
+
+async def arun(
+    prompt: str | None,
+    output_dir: str | None = None,
+    config: PipelineConfig | None = None,
+    resume: str | None = None,
+) -> dict:
+    """Async variant of :func:`run`, driven by ``graph.astream``.
+
+    Nodes use ``ainvoke`` and asyncio subprocesses, so one event loop can
+    drive many pipelines concurrently, e.g.::
+
+        await asyncio.gather(arun(p1, "./out1"), arun(p2, "./out2"))
+
+    Each run carries its own :class:`PipelineConfig`, so concurrent runs may
+    use different keys, models and limits.
+
+    Args:
+        prompt: High-level description of the backend to build (ignored when
+                resuming; the checkpoint has it).
+        output_dir: Directory where generated files will be written
+                    (overrides ``config.output_dir``).
+        config: Run-scoped keys, models and limits; defaults to the environment.
+        resume: Run ID of an interrupted run to continue. The run keeps the
+                settings and start time it was begun with; only the
+                ``api_keys`` of *config* are used.
+
+    Returns:
+        The final graph state containing schema, code, and status, plus
+        ``metrics`` (token and latency totals, see :mod:`src.utils.metrics`)
+        and ``run_id`` when checkpointing is on.
+    """
+    load_dotenv()
+    pipeline = _pipeline_config(config, output_dir)
+    checkpointer = get_checkpointer()
+    run_id = _run_id(checkpointer, resume)
+    runnable_config = pipeline.runnable_config(run_id=run_id)
+
+    graph = build_graph(checkpointer)
+    if resume:
+        snapshot = await graph.aget_state(runnable_config)
+        final_state = _resumed_state(snapshot.values, resume)
+        pipeline, runnable_config = _resumed_config(pipeline, run_id, snapshot.metadata)
+        inputs = None
+    else:
+        final_state = inputs = _initial_state(prompt, pipeline.output_dir)
+    _print_header(final_state["requirements"], run_id, resumed=bool(resume))
+
+    final_state = dict(final_state)
+    async for event in graph.astream(inputs, runnable_config):
+        for node_name, node_output in event.items():
+            final_state = merge_update(final_state, node_output)
+
+    if run_id:
+        final_state["run_id"] = run_id
+    _finish_metrics(final_state, pipeline)
+    _print_summary(final_state, pipeline.output_dir)
     return final_state
 
 
@@ -92,14 +269,101 @@ def main():
         default="./output",
         help="Directory to write generated files (default: ./output)",
     )
+    parser.add_argument(
+        "--max-iterations",
+        type=int,
+        default=DEFAULT_MAX_ITERATIONS,
+        help=f"Developer/reviewer loop limit (default: {DEFAULT_MAX_ITERATIONS})",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        help="Write per-call token/latency metrics and their totals to this JSON file",
+    )
+    parser.add_argument(
+        "--candidates",
+        type=int,
+        default=1,
+        help="Developer candidates generated and reviewed in parallel; first approved wins (default: 1)",
+    )
+    parser.add_argument(
+        "--escalation-model",
+        help="Model the developer switches to when the loop stops making progress",
+    )
+    parser.add_argument(
+        "--full-regeneration",
+        action="store_true",
+        help="Regenerate the whole backend every iteration instead of patching changed files",
+    )
+    parser.add_argument(
+        "--shard-threshold",
+        type=int,
+        default=DEFAULT_SHARD_THRESHOLD,
+        metavar="TABLES",
+        help="Generate per entity in parallel for schemas with this many tables "
+             f"or more; 0 disables (default: {DEFAULT_SHARD_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--partition-threshold",
+        type=int,
+        default=DEFAULT_PARTITION_THRESHOLD,
+        metavar="TOKENS",
+        help="Split requirements this long into bounded contexts designed in parallel; "
+             f"0 disables (default: {DEFAULT_PARTITION_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--review-shard-threshold",
+        type=int,
+        default=DEFAULT_REVIEW_SHARD_THRESHOLD,
+        metavar="FILES",
+        help="Review this many files or more as parallel file groups; "
+             f"0 disables (default: {DEFAULT_REVIEW_SHARD_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        metavar="SECONDS",
+        help="Wall-clock budget; no new developer round starts after it",
+    )
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        help="Token budget (prompt + completion) across all LLM calls",
+    )
+    parser.add_argument(
+        "--max-llm-calls",
+        type=int,
+        help="Budget for the number of LLM calls",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue an interrupted run from its last completed node, with its original settings",
+    )
     args = parser.parse_args()
 
-    if args.prompt:
+    if args.resume:
+        prompt = None
+    elif args.prompt:
         prompt = " ".join(args.prompt)
     else:
         prompt = input("Enter your backend requirements: ")
 
-    run(prompt, output_dir=args.output_dir)
+    run(prompt, config=PipelineConfig(
+        output_dir=args.output_dir,
+        max_iterations=args.max_iterations,
+        metrics_path=args.metrics_json,
+        candidates=args.candidates,
+        escalation_model=args.escalation_model,
+        patch_mode=not args.full_regeneration,
+        shard_threshold=args.shard_threshold,
+        partition_threshold=args.partition_threshold,
+        review_shard_threshold=args.review_shard_threshold,
+        budget=Budget(
+            deadline_s=args.deadline,
+            max_tokens=args.max_tokens,
+            max_llm_calls=args.max_llm_calls,
+        ),
+    ), resume=args.resume)
 
 
 if __name__ == "__main__":
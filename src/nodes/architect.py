@@ -1,39 +1,85 @@
 """Architect Node: Generates the PostgreSQL database schema."""
 
-import os
+import asyncio
 
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.config import PipelineConfig, get_pipeline_config
 
 from src.prompts.architect_prompt import (
     ARCHITECT_SYSTEM_PROMPT,
     ARCHITECT_USER_PROMPT,
+    CONTEXT_USER_PROMPT,
+    PARTITION_SYSTEM_PROMPT,
+    PARTITION_USER_PROMPT,
 )
 from src.state import GraphState
 from src.tools import lookup_postgres_best_practices, search_postgres_docs
-from src.utils.llm import get_llm, get_llm_with_tools
+from src.utils.budget import remaining_budget
+from src.utils.ddl import entity_name
+from src.utils.llm import call_record, get_llm, get_llm_with_tools
+from src.utils.schema_merge import merge_schemas
+from src.utils.scheduler import CHARS_PER_TOKEN, request_priority
+from src.utils.sharding import run_parallel
+from src.utils.structured_output import BoundedContext, BoundedContexts, parse_tool_output
 
 MAX_TOOL_ITERATIONS = 5
 
 
-def _get_available_tools() -> list:
+def _get_available_tools(pipeline: PipelineConfig | None = None) -> list:
     """Return the list of tools available to the architect agent.
 
     lookup_postgres_best_practices is always included.
-    search_postgres_docs is included only when a search API key is configured.
+    search_postgres_docs is included only when a search API key is configured
+    (in the run's PipelineConfig or the environment).
     """
+    pipeline = pipeline or PipelineConfig()
     tools = [lookup_postgres_best_practices]
-    if os.environ.get("TAVILY_API_KEY") or os.environ.get("SERPAPI_API_KEY"):
+    if pipeline.api_key("TAVILY_API_KEY") or pipeline.api_key("SERPAPI_API_KEY"):
         tools.append(search_postgres_docs)
     return tools
 
 
-def _run_tool_agent(llm_with_tools, messages: list, tools: list) -> str:
+def _tool_result(tool_map: dict, tc: dict, config: RunnableConfig | None = None) -> ToolMessage:
+    """Run one tool call synchronously and wrap the result as a ToolMessage."""
+    try:
+        result = tool_map[tc["name"]].invoke(tc["args"], config=config)
+    except KeyError:
+        result = f"Unknown tool: {tc['name']}"
+    except Exception as exc:  # noqa: BLE001
+        result = f"Tool error: {exc}"
+    return ToolMessage(content=str(result), tool_call_id=tc["id"])
+
+
+async def _atool_result(
+    tool_map: dict, tc: dict, config: RunnableConfig | None = None
+) -> ToolMessage:
+    """Async variant of :func:`_tool_result`."""
+    try:
+        result = await tool_map[tc["name"]].ainvoke(tc["args"], config=config)
+    except KeyError:
+        result = f"Unknown tool: {tc['name']}"
+    except Exception as exc:  # noqa: BLE001
+        result = f"Tool error: {exc}"
+    return ToolMessage(content=str(result), tool_call_id=tc["id"])
+
+
+def _run_tool_agent(
+    llm_with_tools,
+    messages: list,
+    tools: list,
+    calls: list,
+    config: RunnableConfig | None = None,
+) -> str:
     """Run a tool-calling agentic loop and return the final text content.
 
     Args:
         llm_with_tools: LLM with tools bound.
         messages: Initial message list (SystemMessage + HumanMessage).
         tools: List of available tool objects.
+        calls: Receives one :func:`call_record` per model turn.
+        config: The run's RunnableConfig, passed on to tools.
 
     Returns:
         The final assistant response content as a string.
@@ -43,55 +89,74 @@ def _run_tool_agent(llm_with_tools, messages: list, tools: list) -> str:
 
     for _ in range(MAX_TOOL_ITERATIONS):
         response = llm_with_tools.invoke(current_messages)
+        calls.append(call_record("architect", response))
         current_messages.append(response)
 
         if not response.tool_calls:
             return response.content
 
         for tc in response.tool_calls:
-            name = tc["name"]
-            args = tc["args"]
-            try:
-                result = tool_map[name].invoke(args)
-            except KeyError:
-                result = f"Unknown tool: {name}"
-            except Exception as exc:  # noqa: BLE001
-                result = f"Tool error: {exc}"
-            current_messages.append(
-                ToolMessage(content=str(result), tool_call_id=tc["id"])
-            )
+            current_messages.append(_tool_result(tool_map, tc, config))
 
     # Max iterations reached — ask plain LLM for final answer
-    final_response = get_llm(temperature=0.2).invoke(current_messages)
+    final_response = get_llm(
+        priority=request_priority("architect"),
+        node="architect",
+        pipeline=get_pipeline_config(config),
+    ).invoke(current_messages)
+    calls.append(call_record("architect", final_response))
     return final_response.content
 
 
-def architect_node(state: GraphState) -> dict:
-    """Takes user requirements and produces a PostgreSQL schema.
-    
-    Args:
-        state: The current graph state with 'requirements' populated.
-    
-    Returns:
-        A dict updating 'db_schema' in the state.
-    """
-    tools = _get_available_tools()
+async def _arun_tool_agent(
+    llm_with_tools,
+    messages: list,
+    tools: list,
+    calls: list,
+    config: RunnableConfig | None = None,
+) -> str:
+    """Async variant of :func:`_run_tool_agent`."""
+    tool_map = {t.name: t for t in tools}
+    current_messages = list(messages)
+
+    for _ in range(MAX_TOOL_ITERATIONS):
+        response = await llm_with_tools.ainvoke(current_messages)
+        calls.append(call_record("architect", response))
+        current_messages.append(response)
+
+        if not response.tool_calls:
+            return response.content
 
-    messages = [
+        for tc in response.tool_calls:
+            current_messages.append(await _atool_result(tool_map, tc, config))
+
+    final_response = await get_llm(
+        priority=request_priority("architect"),
+        node="architect",
+        pipeline=get_pipeline_config(config),
+    ).ainvoke(current_messages)
+    calls.append(call_record("architect", final_response))
+    return final_response.content
+
+
+def _tools_within_budget(state: GraphState, config: RunnableConfig | None) -> list:
+    """Search tools cost extra model turns; skip them when the budget is low."""
+    if remaining_budget(state, config).low:
+        print("\n💸 Architect: run budget is low — designing without web search.")
+        return []
+    return _get_available_tools(get_pipeline_config(config))
+
+
+def _build_messages(state: GraphState) -> list:
+    return [
         SystemMessage(content=ARCHITECT_SYSTEM_PROMPT),
         HumanMessage(
             content=ARCHITECT_USER_PROMPT.format(requirements=state["requirements"])
         ),
     ]
 
-    if tools:
-        llm_with_tools = get_llm_with_tools(tools, temperature=0.2)
-        raw_content = _run_tool_agent(llm_with_tools, messages, tools)
-    else:
-        response = get_llm(temperature=0.2).invoke(messages)
-        raw_content = response.content
 
-    # Extract the SQL from the response (strip markdown fences if present)
+def _strip_fences(raw_content: str) -> str:
     schema = raw_content.strip()
     if schema.startswith("```sql"):
         schema = schema[6:]
@@ -99,10 +164,160 @@ def architect_node(state: GraphState) -> dict:
         schema = schema[3:]
     if schema.endswith("```"):
         schema = schema[:-3]
+    return schema.strip()
+
+
+def _finish(raw_content: str, calls: list[dict]) -> dict:
+    """Strip markdown fences from the model output and report the schema."""
+    schema = _strip_fences(raw_content)
 
     print("\n" + "=" * 60)
     print("🏗️  ARCHITECT NODE — Schema Generated")
     print("=" * 60)
     print(schema[:500] + "..." if len(schema) > 500 else schema)
 
-    return {"db_schema": schema.strip()}
+    return {"db_schema": schema, "llm_calls": calls}
+
+
+# ---------------------------------------------------------------------------
+# Bounded contexts (requirements of PipelineConfig.partition_threshold tokens+)
+# ---------------------------------------------------------------------------
+
+
+def _partitioning(state: GraphState, config: RunnableConfig | None) -> bool:
+    threshold = get_pipeline_config(config).partition_threshold
+    return threshold > 0 and len(state["requirements"]) // CHARS_PER_TOKEN >= threshold
+
+
+def _get_plain_llm(config: RunnableConfig | None, schema: type | None = None):
+    return get_llm(
+        priority=request_priority("architect"),
+        node="architect",
+        schema=schema,
+        pipeline=get_pipeline_config(config),
+    )
+
+
+def _build_partition_messages(state: GraphState) -> list:
+    return [
+        SystemMessage(content=PARTITION_SYSTEM_PROMPT),
+        HumanMessage(content=PARTITION_USER_PROMPT.format(requirements=state["requirements"])),
+    ]
+
+
+def _contexts_from(response) -> list[BoundedContext] | None:
+    """The planned contexts, or None when the plan is unusable or a single context."""
+    plan = parse_tool_output(response, BoundedContexts)
+    if plan is None or len(plan.contexts) < 2:
+        print("\n🧭 Architect: no usable bounded-context split — designing in one call.")
+        return None
+    print(f"\n🧭 Architect: {len(plan.contexts)} bounded contexts — designing sub-schemas "
+          f"in parallel: {', '.join(c.name for c in plan.contexts)}")
+    return plan.contexts
+
+
+def _build_context_messages(context: BoundedContext) -> list:
+    return [
+        SystemMessage(content=ARCHITECT_SYSTEM_PROMPT),
+        HumanMessage(content=CONTEXT_USER_PROMPT.format(
+            context=context.name,
+            entities="\n".join(f"- {entity}" for entity in context.entities),
+            references="\n".join(f"- {table}" for table in context.references) or "(none)",
+            requirements=context.requirements,
+        )),
+    ]
+
+
+def _finish_partitioned(contexts: list[BoundedContext], responses: list, calls: list[dict]) -> dict:
+    """Merge the sub-schemas (see :func:`src.utils.schema_merge.merge_schemas`)."""
+    calls.extend(call_record("architect", response) for response in responses)
+    merged = merge_schemas(
+        [(c.name, _strip_fences(r.content)) for c, r in zip(contexts, responses)],
+        owners={entity_name(e.lower()): c.name for c in contexts for e in c.entities},
+    )
+    for note in merged.notes:
+        print(f"   merge: {note}")
+    for problem in merged.problems:
+        print(f"   ⚠️  {problem}")
+    return _finish(merged.sql, calls)
+
+
+def architect_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Takes user requirements and produces a PostgreSQL schema.
+
+    Requirements longer than ``PipelineConfig.partition_threshold`` tokens
+    are first split into bounded contexts; each context's sub-schema is
+    designed in parallel and the pieces are merged and checked locally.
+
+    Args:
+        state: The current graph state with 'requirements' populated.
+        config: The run's RunnableConfig (carries the PipelineConfig).
+
+    Returns:
+        A dict updating 'db_schema' in the state.
+    """
+    calls: list[dict] = []
+    if _partitioning(state, config):
+        plan = _get_plain_llm(config, BoundedContexts).invoke(_build_partition_messages(state))
+        calls.append(call_record("architect", plan))
+        contexts = _contexts_from(plan)
+        if contexts:
+            responses = run_parallel([
+                lambda context=context: _get_plain_llm(config).invoke(
+                    _build_context_messages(context))
+                for context in contexts
+            ])
+            return _finish_partitioned(contexts, responses, calls)
+
+    pipeline = get_pipeline_config(config)
+    tools = _tools_within_budget(state, config)
+    messages = _build_messages(state)
+
+    priority = request_priority("architect")
+    if tools:
+        llm_with_tools = get_llm_with_tools(
+            tools, priority=priority, node="architect", pipeline=pipeline
+        )
+        raw_content = _run_tool_agent(llm_with_tools, messages, tools, calls, config)
+    else:
+        response = get_llm(priority=priority, node="architect", pipeline=pipeline).invoke(messages)
+        calls.append(call_record("architect", response))
+        raw_content = response.content
+
+    return _finish(raw_content, calls)
+
+
+async def aarchitect_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`architect_node` (uses ``ainvoke`` throughout)."""
+    calls: list[dict] = []
+    if _partitioning(state, config):
+        plan = await _get_plain_llm(config, BoundedContexts).ainvoke(
+            _build_partition_messages(state)
+        )
+        calls.append(call_record("architect", plan))
+        contexts = _contexts_from(plan)
+        if contexts:
+            responses = await asyncio.gather(*(
+                _get_plain_llm(config).ainvoke(_build_context_messages(context))
+                for context in contexts
+            ))
+            return _finish_partitioned(contexts, responses, calls)
+
+    pipeline = get_pipeline_config(config)
+    tools = _tools_within_budget(state, config)
+    messages = _build_messages(state)
+
+    priority = request_priority("architect")
+    if tools:
+        llm_with_tools = get_llm_with_tools(
+            tools, priority=priority, node="architect", pipeline=pipeline
+        )
+        raw_content = await _arun_tool_agent(llm_with_tools, messages, tools, calls, config)
+    else:
+        response = await get_llm(
+            priority=priority, node="architect", pipeline=pipeline
+        ).ainvoke(messages)
+        calls.append(call_record("architect", response))
+        raw_content = response.content
+
+    return _finish(raw_content, calls)
@@ -1,26 +1,60 @@
 """Developer Node: Generates the Node.js/Express backend code."""
 
-from src.state import GraphState
-from src.utils.llm import get_llm
+import asyncio
+import re
+
+from langchain_core.runnables import RunnableConfig
+
+from src.config import get_pipeline_config
+from src.nodes import reviewer
+from src.state import RESET_FEEDBACK, GraphState
+from src.utils.llm import call_record, get_llm
+from src.utils.budget import remaining_budget
+from src.utils.file_map import (
+    FileMap,
+    file_map_from_code,
+    file_map_from_generated,
+    render_file_map,
+)
+from src.utils.convergence import STALLED_IDENTICAL_CODE, STALLED_REPEATED_FEEDBACK
+from src.utils.patch import PatchError, apply_patches
+from src.utils.routing import resolve_route
+from src.utils.scheduler import request_priority
+from src.utils.sharding import (
+    SHARED_FILES,
+    EntityShard,
+    check_consistency,
+    run_parallel,
+    shards_for,
+)
+from src.utils.speculative import afirst_accepted, candidate_temperatures, first_accepted
+from src.utils.structured_output import (
+    FilePatches,
+    GeneratedFiles,
+    parse_tool_output,
+    render_files,
+)
 from src.prompts.developer_prompt import (
+    CONSISTENCY_SECTION_TEMPLATE,
     DEVELOPER_SYSTEM_PROMPT,
     DEVELOPER_USER_PROMPT,
+    ENTITY_FILES_USER_PROMPT,
+    ESCALATION_SECTION_TEMPLATE,
     FEEDBACK_SECTION_TEMPLATE,
+    PATCH_USER_PROMPT,
+    SHARED_FILES_USER_PROMPT,
 )
 
+# File paths named in a feedback item, e.g. "[routes/user.routes.js] ...".
+_FILE_MENTION = re.compile(r"[\w./-]+\.(?:js|json)\b")
 
-def developer_node(state: GraphState) -> dict:
-    """Takes the schema (and optional feedback) and produces backend code.
-    
-    Args:
-        state: The current graph state with 'db_schema' and optionally 
-               'review_feedback' populated.
-    
-    Returns:
-        A dict updating 'server_code' and incrementing 'iterations'.
-    """
-    llm = get_llm(temperature=0.2)
+_STALL_DESCRIPTIONS = {
+    STALLED_IDENTICAL_CODE: "produced the same code again",
+    STALLED_REPEATED_FEEDBACK: "drew the same review feedback again",
+}
 
+
+def _feedback_section(state: GraphState) -> str:
     # Build the feedback section if there's prior review feedback
     feedback_section = ""
     if state.get("review_feedback"):
@@ -30,21 +64,114 @@ def developer_node(state: GraphState) -> dict:
         feedback_section = FEEDBACK_SECTION_TEMPLATE.format(
             feedback=feedback_items
         )
+    if state.get("escalation"):
+        feedback_section += "\n\n" + ESCALATION_SECTION_TEMPLATE.format(
+            reason=_STALL_DESCRIPTIONS[state["escalation"]]
+        )
+    return feedback_section
 
-    messages = [
+
+def _build_messages(state: GraphState) -> list[dict]:
+    return [
         {"role": "system", "content": DEVELOPER_SYSTEM_PROMPT},
         {
             "role": "user",
             "content": DEVELOPER_USER_PROMPT.format(
                 requirements=state["requirements"],
                 db_schema=state["db_schema"],
-                feedback_section=feedback_section,
+                feedback_section=_feedback_section(state),
+            ),
+        },
+    ]
+
+
+def _build_patch_messages(state: GraphState) -> list[dict]:
+    return [
+        {"role": "system", "content": DEVELOPER_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": PATCH_USER_PROMPT.format(
+                requirements=state["requirements"],
+                db_schema=state["db_schema"],
+                files=render_file_map(state["files"]),
+                feedback_section=_feedback_section(state),
             ),
         },
     ]
 
-    response = llm.invoke(messages)
-    code = response.content.strip()
+
+def _get_developer_llm(
+    state: GraphState,
+    config: RunnableConfig | None,
+    schema: type | None = GeneratedFiles,
+    temperature: float | None = None,
+):
+    pipeline = get_pipeline_config(config)
+    return get_llm(
+        temperature=temperature,
+        # Once the loop stalls, switch to the stronger model if one is set
+        model=pipeline.escalation_model if state.get("escalation") else None,
+        priority=request_priority("developer", state.get("iterations", 0)),
+        node="developer",
+        schema=schema,
+        pipeline=pipeline,
+    )
+
+
+def _output_from(response) -> tuple[str, FileMap]:
+    """The generated files as labeled code blocks and as a file map.
+
+    A validated :class:`GeneratedFiles` tool call is rendered into blocks and
+    mapped directly; otherwise the reply text (already in that format) is
+    parsed — once, here — into the map the downstream nodes use.
+    """
+    files = parse_tool_output(response, GeneratedFiles)
+    if files is not None:
+        return render_files(files), file_map_from_generated(files)
+    code = (response.content or "").strip()
+    return code, file_map_from_code(code)
+
+
+def _patching(state: GraphState, config: RunnableConfig | None) -> bool:
+    """Ask for a patch instead of a full backend?
+
+    Only when patch mode is on and there are previous files and feedback to
+    address; an escalated round wants a different approach, so it regenerates.
+    """
+    return (
+        get_pipeline_config(config).patch_mode
+        and bool(state.get("files"))
+        and bool(state.get("review_feedback"))
+        and not state.get("escalation")
+    )
+
+
+def _merge_patch(state: GraphState, response) -> tuple[str, FileMap]:
+    """Merge a patch reply into the current files.
+
+    A validated :class:`FilePatches` tool call is applied hunk by hunk; a
+    plain-text reply's labeled code blocks replace those files whole.
+
+    Raises:
+        PatchError: If the reply carries no patch or it does not apply.
+    """
+    patches = parse_tool_output(response, FilePatches)
+    if patches is not None:
+        files = apply_patches(state["files"], patches)
+    else:
+        changed = file_map_from_code((response.content or "").strip())
+        if not changed or "server_code.md" in changed:
+            raise PatchError("reply has neither a patch nor labeled files")
+        files = {**state["files"], **changed}
+    return render_file_map(files), files
+
+
+def _patch_failed(error: PatchError) -> None:
+    print(f"\n🩹 Patch did not apply ({error}) — regenerating all files.")
+
+
+def _finish(state: GraphState, generation: tuple[list, str, FileMap]) -> dict:
+    responses, code, files = generation
 
     iteration = state.get("iterations", 0) + 1
 
@@ -55,7 +182,390 @@ def developer_node(state: GraphState) -> dict:
 
     return {
         "server_code": code,
+        "files": files,
         "iterations": iteration,
         # Clear previous feedback so it doesn't accumulate across iterations
-        "review_feedback": [],
+        "review_feedback": [RESET_FEEDBACK],
+        # New code has not been reviewed or tested yet
+        "final_status": "pending",
+        "speculative_review": None,
+        "llm_calls": [call_record("developer", r, iteration) for r in responses],
+    }
+
+
+def _complete(
+    state: GraphState, config: RunnableConfig | None, messages: list[dict],
+    temperature: float | None = None,
+) -> list:
+    """One full-files call, repeated as plain text if it yields no usable file list."""
+    responses = [_get_developer_llm(state, config, temperature=temperature).invoke(messages)]
+    if not _output_from(responses[-1])[0]:
+        # No usable file list (e.g. the JSON was cut off): ask for plain text,
+        # which continuation stitching can extend past the output limit.
+        responses.append(
+            _get_developer_llm(state, config, schema=None, temperature=temperature)
+            .invoke(messages)
+        )
+    return responses
+
+
+async def _acomplete(
+    state: GraphState, config: RunnableConfig | None, messages: list[dict],
+    temperature: float | None = None,
+) -> list:
+    responses = [
+        await _get_developer_llm(state, config, temperature=temperature).ainvoke(messages)
+    ]
+    if not _output_from(responses[-1])[0]:
+        responses.append(
+            await _get_developer_llm(state, config, schema=None, temperature=temperature)
+            .ainvoke(messages)
+        )
+    return responses
+
+
+def _generate(
+    state: GraphState, config: RunnableConfig | None, temperature: float | None = None
+) -> tuple[list, str, FileMap]:
+    """Patch the previous files if possible, else generate the whole backend.
+
+    Large schemas are generated per entity in parallel (see
+    :mod:`src.utils.sharding`).
+
+    Returns:
+        ``(responses, code, files)``: every LLM reply the attempt used, and
+        the resulting labeled code blocks and file map.
+    """
+    responses = []
+    if _patching(state, config):
+        responses.append(
+            _get_developer_llm(state, config, schema=FilePatches, temperature=temperature)
+            .invoke(_build_patch_messages(state))
+        )
+        try:
+            return responses, *_merge_patch(state, responses[-1])
+        except PatchError as error:
+            _patch_failed(error)
+
+    shards = _shards(state, config)
+    if shards:
+        return _generate_sharded(state, config, shards, temperature, responses)
+    responses.extend(_complete(state, config, _build_messages(state), temperature))
+    return responses, *_output_from(responses[-1])
+
+
+async def _agenerate(
+    state: GraphState, config: RunnableConfig | None, temperature: float | None = None
+) -> tuple[list, str, FileMap]:
+    responses = []
+    if _patching(state, config):
+        responses.append(
+            await _get_developer_llm(state, config, schema=FilePatches, temperature=temperature)
+            .ainvoke(_build_patch_messages(state))
+        )
+        try:
+            return responses, *_merge_patch(state, responses[-1])
+        except PatchError as error:
+            _patch_failed(error)
+
+    shards = _shards(state, config)
+    if shards:
+        return await _agenerate_sharded(state, config, shards, temperature, responses)
+    responses.extend(await _acomplete(state, config, _build_messages(state), temperature))
+    return responses, *_output_from(responses[-1])
+
+
+# ---------------------------------------------------------------------------
+# Sharded generation (PipelineConfig.shard_threshold tables or more)
+# ---------------------------------------------------------------------------
+
+# Shard keys: an entity name, or None for the shared files.
+ShardKey = str | None
+
+
+def _shards(state: GraphState, config: RunnableConfig | None) -> list[EntityShard]:
+    return shards_for(state.get("db_schema", ""), get_pipeline_config(config).shard_threshold)
+
+
+def _owner(path: str, shards: list[EntityShard]) -> ShardKey:
+    """Which shard generates *path*."""
+    for shard in shards:
+        if path in (shard.routes_path, shard.controller_path):
+            return shard.entity
+    return None
+
+
+def _shard_feedback(
+    state: GraphState, shards: list[EntityShard], key: ShardKey, problems: list[str]
+) -> str:
+    """Feedback for one shard: the items naming its files, plus *problems*.
+
+    Items that name no entity file go to the shared call.
+    """
+    items = []
+    for item in state.get("review_feedback") or []:
+        owners = {_owner(path, shards) for path in _FILE_MENTION.findall(item)} - {None}
+        if key in owners or (key is None and not owners):
+            items.append(item)
+    section = _feedback_section({**state, "review_feedback": items})
+    if problems:
+        section += "\n\n" + CONSISTENCY_SECTION_TEMPLATE.format(
+            problems="\n".join(f"- {problem}" for problem in problems)
+        )
+    return section.strip()
+
+
+def _shard_messages(
+    state: GraphState, shards: list[EntityShard], key: ShardKey, problems: list[str]
+) -> list[dict]:
+    feedback_section = _shard_feedback(state, shards, key, problems)
+    if key is None:
+        content = SHARED_FILES_USER_PROMPT.format(
+            requirements=state["requirements"],
+            routes="\n".join(
+                f"- `require('./{s.routes_path[:-3]}')` at `{s.mount_path}`" for s in shards
+            ),
+            feedback_section=feedback_section,
+        )
+    else:
+        shard = next(s for s in shards if s.entity == key)
+        content = ENTITY_FILES_USER_PROMPT.format(
+            table=shard.table,
+            entity=shard.entity,
+            routes_path=shard.routes_path,
+            controller_path=shard.controller_path,
+            mount_path=shard.mount_path,
+            requirements=state["requirements"],
+            ddl=shard.ddl,
+            feedback_section=feedback_section,
+        )
+    return [
+        {"role": "system", "content": DEVELOPER_SYSTEM_PROMPT},
+        {"role": "user", "content": content},
+    ]
+
+
+def _shard_requests(
+    state: GraphState, shards: list[EntityShard], problems: list[tuple[str, str]] | None = None
+) -> list[tuple[ShardKey, list[dict]]]:
+    """Messages for every shard, or with *problems* only for the shards that own one."""
+    if problems is None:
+        keys: list[ShardKey] = [None, *(shard.entity for shard in shards)]
+        by_key: dict[ShardKey, list[str]] = {}
+    else:
+        by_key = {}
+        for path, message in problems:
+            by_key.setdefault(_owner(path, shards), []).append(f"`{path}` {message}")
+        keys = list(by_key)
+    return [(key, _shard_messages(state, shards, key, by_key.get(key, []))) for key in keys]
+
+
+def _assemble(
+    shards: list[EntityShard], outputs: dict[ShardKey, FileMap]
+) -> tuple[FileMap, list[tuple[str, str]]]:
+    """Merge the shards' files (entities cannot overwrite shared ones) and check them."""
+    files = {path: entry for path, entry in outputs.get(None, {}).items()
+             if path != "server_code.md"}
+    for shard in shards:
+        for path, entry in outputs.get(shard.entity, {}).items():
+            if path not in SHARED_FILES and path != "server_code.md":
+                files[path] = entry
+    return files, check_consistency(files, shards)
+
+
+def _collect(
+    requests: list[tuple[ShardKey, list[dict]]], results: list[list],
+    responses: list, outputs: dict[ShardKey, FileMap],
+) -> None:
+    for (key, _), shard_responses in zip(requests, results):
+        responses.extend(shard_responses)
+        outputs[key] = _output_from(shard_responses[-1])[1]
+
+
+def _sharded_result(
+    files: FileMap, problems: list[tuple[str, str]], responses: list
+) -> tuple[list, str, FileMap]:
+    if problems:
+        print(f"\n⚠️  {len(problems)} consistency problem(s) left after assembly:")
+        for path, message in problems:
+            print(f"   - {path}: {message}")
+    return responses, render_file_map(files), files
+
+
+def _generate_sharded(
+    state: GraphState, config: RunnableConfig | None, shards: list[EntityShard],
+    temperature: float | None, responses: list,
+) -> tuple[list, str, FileMap]:
+    """Generate the shared files and every entity's files in parallel, then assemble.
+
+    If the assembled files are inconsistent, the shards owning a problem are
+    regenerated once with the problems listed.
+    """
+    print(f"\n🧩 {len(shards)} tables — generating {len(shards) + 1} shards in parallel.")
+    outputs: dict[ShardKey, FileMap] = {}
+    requests = _shard_requests(state, shards)
+    for attempt in range(2):
+        results = run_parallel([
+            lambda messages=messages: _complete(state, config, messages, temperature)
+            for _, messages in requests
+        ])
+        _collect(requests, results, responses, outputs)
+        files, problems = _assemble(shards, outputs)
+        if not problems or attempt:
+            break
+        print(f"\n🧩 Regenerating shard(s) with {len(problems)} consistency problem(s).")
+        requests = _shard_requests(state, shards, problems)
+    return _sharded_result(files, problems, responses)
+
+
+async def _agenerate_sharded(
+    state: GraphState, config: RunnableConfig | None, shards: list[EntityShard],
+    temperature: float | None, responses: list,
+) -> tuple[list, str, FileMap]:
+    print(f"\n🧩 {len(shards)} tables — generating {len(shards) + 1} shards in parallel.")
+    outputs: dict[ShardKey, FileMap] = {}
+    requests = _shard_requests(state, shards)
+    for attempt in range(2):
+        results = await asyncio.gather(*(
+            _acomplete(state, config, messages, temperature) for _, messages in requests
+        ))
+        _collect(requests, results, responses, outputs)
+        files, problems = _assemble(shards, outputs)
+        if not problems or attempt:
+            break
+        print(f"\n🧩 Regenerating shard(s) with {len(problems)} consistency problem(s).")
+        requests = _shard_requests(state, shards, problems)
+    return _sharded_result(files, problems, responses)
+
+
+# ---------------------------------------------------------------------------
+# Speculative candidates (PipelineConfig.candidates > 1)
+# ---------------------------------------------------------------------------
+
+
+def _speculative(state: GraphState, config: RunnableConfig | None) -> bool:
+    """Race candidates only if configured and the run budget is not running low."""
+    if get_pipeline_config(config).candidates <= 1:
+        return False
+    if remaining_budget(state, config).low:
+        print("\n💸 Run budget is low — generating a single candidate.")
+        return False
+    return True
+
+
+def _temperatures(config: RunnableConfig | None) -> list[float]:
+    pipeline = get_pipeline_config(config)
+    base = resolve_route("developer", pipeline.routing, pipeline.model).temperature
+    return candidate_temperatures(base, pipeline.candidates)
+
+
+def _review_state(state: GraphState, generation: tuple[list, str, FileMap]) -> dict:
+    return {
+        **state,
+        "server_code": generation[1],
+        "iterations": state.get("iterations", 0) + 1,
     }
+
+
+def _candidate(index: int, temperature: float, generation: tuple, review: dict) -> dict:
+    return {"index": index, "temperature": temperature, "generation": generation, "review": review}
+
+
+def _approved(candidate: dict) -> bool:
+    return candidate["review"].get("final_status") == "approved"
+
+
+def _speculate(state: GraphState, config: RunnableConfig | None) -> tuple[dict | None, list[dict]]:
+    def job(index: int, temperature: float):
+        def run() -> dict:
+            generation = _generate(state, config, temperature)
+            review_state = _review_state(state, generation)
+            response = reviewer._get_reviewer_llm(review_state, config).invoke(
+                reviewer._build_messages(review_state)
+            )
+            return _candidate(index, temperature, generation,
+                              reviewer._parse_review(review_state, response))
+        return run
+
+    jobs = [job(i, t) for i, t in enumerate(_temperatures(config))]
+    return first_accepted(jobs, _approved)
+
+
+async def _aspeculate(
+    state: GraphState, config: RunnableConfig | None
+) -> tuple[dict | None, list[dict]]:
+    def job(index: int, temperature: float):
+        async def run() -> dict:
+            generation = await _agenerate(state, config, temperature)
+            review_state = _review_state(state, generation)
+            response = await reviewer._get_reviewer_llm(review_state, config).ainvoke(
+                reviewer._build_messages(review_state)
+            )
+            return _candidate(index, temperature, generation,
+                              reviewer._parse_review(review_state, response))
+        return run
+
+    jobs = [job(i, t) for i, t in enumerate(_temperatures(config))]
+    return await afirst_accepted(jobs, _approved)
+
+
+def _finish_speculative(state: GraphState, winner: dict | None, finished: list[dict]) -> dict:
+    """Keep the winner (or the candidate with the fewest issues) and its review.
+
+    Every finished candidate's developer and reviewer calls are recorded;
+    calls cancelled mid-flight are not.
+    """
+    best = winner or min(finished, key=lambda c: len(c["review"].get("review_feedback", [])))
+    if winner is not None:
+        print(f"\n🏁 Candidate {winner['index']} (temperature {winner['temperature']}) "
+              f"approved first; {len(finished) - 1} other candidate(s) finished before it.")
+    else:
+        print(f"\n🏁 No candidate approved; keeping candidate {best['index']} "
+              f"with the fewest issues.")
+
+    update = _finish(state, best["generation"])
+    review = {k: v for k, v in best["review"].items() if k != "llm_calls"}
+    calls = []
+    for candidate in finished:
+        tag = {"candidate": candidate["index"]}
+        calls.extend({**record, **tag} for record in candidate["review"]["llm_calls"])
+        calls.extend(
+            {**call_record("developer", r, update["iterations"]), **tag}
+            for r in candidate["generation"][0]
+        )
+    return {**update, "speculative_review": review, "llm_calls": calls}
+
+
+def developer_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Takes the schema (and optional feedback) and produces backend code.
+
+    From the second iteration on, in patch mode, only the changed files or
+    unified diffs are requested and merged into ``files`` (see
+    :mod:`src.utils.patch`); a patch that does not apply falls back to
+    regenerating the whole backend. Schemas with
+    ``PipelineConfig.shard_threshold`` tables or more are generated per
+    entity in parallel (see :mod:`src.utils.sharding`).
+
+    With ``PipelineConfig.candidates > 1`` several candidates are generated
+    and reviewed in parallel, and the first approved one wins (see
+    :mod:`src.utils.speculative`); its review is handed to the reviewer node
+    through ``speculative_review``.
+
+    Args:
+        state: The current graph state with 'db_schema' and optionally
+               'review_feedback' populated.
+        config: The run's RunnableConfig (carries the PipelineConfig).
+
+    Returns:
+        A dict updating 'server_code' and incrementing 'iterations'.
+    """
+    if _speculative(state, config):
+        return _finish_speculative(state, *_speculate(state, config))
+    return _finish(state, _generate(state, config))
+
+
+async def adeveloper_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`developer_node`; losing candidates are cancelled."""
+    if _speculative(state, config):
+        return _finish_speculative(state, *await _aspeculate(state, config))
+    return _finish(state, await _agenerate(state, config))
@@ -0,0 +1,82 @@
+"""Join node: combines the reviewer's verdict and the test run into one round.
+
+Once Integration has written a developer iteration to disk, the reviewer and
+the TDD node run in parallel. Both append to ``review_feedback``, so by the time this
+node runs the feedback holds the review issues and any ``[TEST FAILURE]``
+entry together; here we settle ``final_status`` for the round and check the
+loop is still making progress (see :mod:`src.utils.convergence`).
+"""
+
+from langchain_core.runnables import RunnableConfig
+
+from src.state import GraphState
+from src.utils.budget import BUDGET_EXHAUSTED, remaining_budget
+from src.utils.convergence import detect_stall, fingerprint
+from src.utils.file_map import render_file_map
+
+
+def join_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Approve the round only if the reviewer approved and tests did not fail.
+
+    An unapproved round stops the run with ``final_status =
+    "budget_exhausted"`` once any run budget is spent. Otherwise a round that
+    repeats earlier code or the previous round's feedback sets ``escalation``
+    so the next developer round changes approach; a repeat after escalating
+    stops the run with the stall reason as ``final_status``, while a round
+    that makes progress clears ``escalation`` again.
+
+    Args:
+        state: The graph state after both the reviewer and TDD branches.
+        config: The run's RunnableConfig (carries the budget).
+
+    Returns:
+        A dict updating 'final_status' and 'fingerprints', and possibly
+        'escalation'.
+    """
+    review_approved = state.get("final_status") == "approved"
+    tests_failed = state.get("test_status") == "failed"
+    feedback = state.get("review_feedback", [])
+    test_failures = sum(1 for item in feedback if item.startswith("[TEST FAILURE]"))
+
+    print("\n" + "=" * 60)
+    print("🔗 JOIN NODE — Review and Tests Combined")
+    print("=" * 60)
+    print(f"   Review: {'approved' if review_approved else 'changes requested'}")
+    print(f"   Tests:  {state.get('test_status') or 'skipped'}")
+    if feedback:
+        print(f"   Feedback for the developer: {len(feedback) - test_failures} review "
+              f"issue(s), {test_failures} test failure report(s)")
+
+    # Fingerprint the file map when there is one: a patched round renders its
+    # files differently from the reply text a full round keeps as server_code.
+    code = render_file_map(state["files"]) if state.get("files") else state.get("server_code", "")
+    current = fingerprint(state.get("iterations", 0), code, feedback)
+    update = {
+        "final_status": "approved" if review_approved and not tests_failed else "pending",
+        "fingerprints": [current],
+    }
+    if update["final_status"] == "approved":
+        return update
+
+    spent = remaining_budget(state, config).exhausted
+    if spent:
+        print(f"   Budget exhausted ({spent}) — keeping this iteration's files.")
+        update["final_status"] = BUDGET_EXHAUSTED
+        return update
+
+    reason = detect_stall([*state.get("fingerprints", []), current])
+    if reason and state.get("escalation"):
+        print(f"   No progress after escalating ({reason}) — stopping.")
+        update["final_status"] = reason
+    elif reason:
+        print(f"   No progress ({reason}) — escalating the next developer round.")
+        update["escalation"] = reason
+    elif state.get("escalation"):
+        print("   Progress after escalating — back to the routed developer.")
+        update["escalation"] = None
+    return update
+
+
+async def ajoin_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`join_node` (no I/O, so it just delegates)."""
+    return join_node(state, config)
@@ -1,52 +1,75 @@
 """Reviewer Node: Inspects the generated code for bugs and vulnerabilities."""
 
+import asyncio
+
+from langchain_core.runnables import RunnableConfig
+
+from src.config import get_pipeline_config
 from src.state import GraphState
-from src.utils.llm import get_llm
+from src.utils.file_map import FileMap, render_file_map
+from src.utils.llm import call_record, get_llm
+from src.utils.review_cache import file_verdicts, review_key, schema_hash, stale_files
+from src.utils.review_shards import cross_file_issues, dedupe_issues, review_groups
+from src.utils.sharding import run_parallel
+from src.utils.scheduler import request_priority
+from src.utils.structured_output import ReviewVerdict, format_issue, parse_tool_output
 from src.prompts.reviewer_prompt import (
     REVIEWER_SYSTEM_PROMPT,
     REVIEWER_USER_PROMPT,
+    STATIC_HINTS_SECTION_TEMPLATE,
+    UNCHANGED_FILES_SECTION_TEMPLATE,
 )
 
 
-def reviewer_node(state: GraphState) -> dict:
-    """Reviews the server code against the schema and returns feedback.
-    
-    Args:
-        state: The current graph state with 'db_schema' and 'server_code'.
-    
-    Returns:
-        A dict updating 'review_feedback' and optionally 'final_status'.
-    """
-    llm = get_llm(temperature=0.1)  # Lower temp for more consistent reviews
-
-    messages = [
+def _build_messages(
+    state: GraphState, files: FileMap | None = None, unchanged: list[str] | None = None
+) -> list[dict]:
+    """Review *files* (default: all of ``server_code``), naming the *unchanged* ones."""
+    server_code = state["server_code"] if files is None else render_file_map(files)
+    hints = [
+        hint for hint in state.get("static_hints") or []
+        if files is None or any(hint.startswith(f"[{path}]") for path in files)
+    ]
+    if hints:
+        server_code += "\n\n" + STATIC_HINTS_SECTION_TEMPLATE.format(
+            hints="\n".join(f"- {hint}" for hint in hints)
+        )
+    if unchanged:
+        server_code += "\n\n" + UNCHANGED_FILES_SECTION_TEMPLATE.format(
+            paths="\n".join(f"- {path}" for path in unchanged)
+        )
+    return [
         {"role": "system", "content": REVIEWER_SYSTEM_PROMPT},
         {
             "role": "user",
             "content": REVIEWER_USER_PROMPT.format(
                 db_schema=state["db_schema"],
-                server_code=state["server_code"],
+                server_code=server_code,
             ),
         },
     ]
 
-    response = llm.invoke(messages)
-    review = response.content.strip()
 
-    print("\n" + "=" * 60)
-    print("🔍 REVIEWER NODE — Review Complete")
-    print("=" * 60)
-    print(review)
+def _get_reviewer_llm(state: GraphState, config: RunnableConfig | None):
+    return get_llm(
+        priority=request_priority("reviewer", state.get("iterations", 0)),
+        node="reviewer",
+        schema=ReviewVerdict,
+        pipeline=get_pipeline_config(config),
+    )
 
-    # Parse the review: check if code was approved
-    if review.strip().upper() == "APPROVED":
-        print("\n✅ Code APPROVED by reviewer!")
-        return {
-            "review_feedback": [],
-            "final_status": "approved",
-        }
 
-    # Parse numbered feedback items
+def _is_approval(review: str) -> bool:
+    """True when the reply's first meaningful line is APPROVED (fences ignored)."""
+    for line in review.split("\n"):
+        line = line.strip().strip("`").strip()
+        if line:
+            return line.rstrip(".!").upper() == "APPROVED"
+    return False
+
+
+def _scrape_feedback(review: str) -> list[str]:
+    """Fallback: pull numbered/bulleted items out of a free-text review."""
     feedback_items = []
     for line in review.split("\n"):
         line = line.strip()
@@ -57,9 +80,216 @@ def reviewer_node(state: GraphState) -> dict:
                 feedback_items.append(cleaned)
 
     # If parsing found no items but it's not APPROVED, use the whole response
-    if not feedback_items:
-        feedback_items = [review]
+    return feedback_items or [review]
+
+
+def _read_review(response) -> tuple[bool, list[str], str]:
+    """``(approved, feedback items, review text)`` from one reviewer reply.
+
+    A validated :class:`ReviewVerdict` tool call is used when present; the
+    reply text is parsed only as a fallback.
+    """
+    verdict = parse_tool_output(response, ReviewVerdict)
+    if verdict is not None:
+        approved = verdict.verdict == "approved" and not verdict.issues
+        feedback_items = [format_issue(issue) for issue in verdict.issues]
+        review = "APPROVED" if approved else "\n".join(
+            f"{i}. {item}" for i, item in enumerate(feedback_items, 1)
+        )
+        if not approved and not feedback_items:
+            feedback_items = ["Reviewer requested changes without listing issues."]
+    else:
+        review = response.content.strip()
+        approved = _is_approval(review)
+        feedback_items = [] if approved else _scrape_feedback(review)
+    return approved, feedback_items, review
+
+
+def _parse_review(state: GraphState, response) -> dict:
+    """Turn the reviewer's reply into a state update."""
+    calls = [call_record("reviewer", response, state.get("iterations"))]
+    approved, feedback_items, review = _read_review(response)
+
+    print("\n" + "=" * 60)
+    print("🔍 REVIEWER NODE — Review Complete")
+    print("=" * 60)
+    print(review)
+
+    if approved:
+        print("\n✅ Code APPROVED by reviewer!")
+        return {
+            "review_feedback": [],
+            "final_status": "approved",
+            "llm_calls": calls,
+        }
 
     print(f"\n⚠️  Found {len(feedback_items)} issue(s) to fix.")
 
-    return {"review_feedback": feedback_items}
+    return {"review_feedback": feedback_items, "llm_calls": calls}
+
+
+# ---------------------------------------------------------------------------
+# Per-file verdict cache (see src/utils/review_cache.py)
+# ---------------------------------------------------------------------------
+
+
+def _review_scope(state: GraphState) -> tuple[list[str], list[str]] | None:
+    """``(files to review, unchanged files)``, or None to review ``server_code`` whole."""
+    files = state.get("files")
+    if not files:
+        return None
+    stale = stale_files(files, state.get("review_cache") or {}, schema_hash(state["db_schema"]))
+    return stale, [path for path in files if path not in stale]
+
+
+def _scoped_messages(state: GraphState, scope: tuple[list[str], list[str]] | None) -> list[dict]:
+    if scope is None:
+        return _build_messages(state)
+    stale, unchanged = scope
+    return _build_messages(state, {path: state["files"][path] for path in stale}, unchanged)
+
+
+def _merge_cached(state: GraphState, scope: tuple[list[str], list[str]], update: dict) -> dict:
+    """Cache this review's per-file verdicts and merge in the unchanged files' verdicts.
+
+    The round is approved only if neither the fresh review nor any cached
+    verdict has an open issue. Issues naming no reviewed file cannot be
+    attributed, so such a review caches nothing and its files are reviewed
+    again next time. The cache keeps only the current files' keys.
+    """
+    stale, unchanged = scope
+    files = state["files"]
+    schema = schema_hash(state["db_schema"])
+    previous = state.get("review_cache") or {}
+
+    fresh, unattributed = file_verdicts(stale, update.get("review_feedback", []))
+    cache = {review_key(files[path], schema): previous[review_key(files[path], schema)]
+             for path in unchanged}
+    if not unattributed:
+        cache.update({review_key(files[path], schema): issues for path, issues in fresh.items()})
+    cached_issues = [item for path in unchanged for item in cache[review_key(files[path], schema)]]
+    feedback = [*unattributed, *(item for path in files if path in fresh for item in fresh[path]),
+                *cached_issues]
+
+    if unchanged:
+        print(f"\n📦 Reviewed {len(stale)} changed file(s); reused verdicts for "
+              f"{len(unchanged)} unchanged file(s) ({len(cached_issues)} open issue(s)).")
+    return _settle({**update, "review_feedback": feedback, "review_cache": cache})
+
+
+def _settle(update: dict) -> dict:
+    """Approve the update exactly when it carries no feedback."""
+    update = dict(update)
+    if update["review_feedback"]:
+        update.pop("final_status", None)
+    else:
+        update["final_status"] = "approved"
+    return update
+
+
+def _review_cached_only(state: GraphState, scope: tuple[list[str], list[str]]) -> dict:
+    print("\n🔍 REVIEWER NODE — no changed files; reusing cached verdicts")
+    return _merge_cached(state, scope, {"review_feedback": [], "llm_calls": []})
+
+
+# ---------------------------------------------------------------------------
+# Map-reduce review (PipelineConfig.review_shard_threshold files or more)
+# ---------------------------------------------------------------------------
+
+
+def _review_sharded(
+    state: GraphState, config: RunnableConfig | None, scope: tuple[list[str], list[str]] | None
+) -> bool:
+    threshold = get_pipeline_config(config).review_shard_threshold
+    return scope is not None and threshold > 0 and len(scope[0]) >= threshold
+
+
+def _group_requests(state: GraphState, scope: tuple[list[str], list[str]]) -> list[list[dict]]:
+    """One review prompt per file group; every other file is listed by name."""
+    files = state["files"]
+    groups = review_groups(scope[0])
+    print(f"\n🔍 REVIEWER NODE — reviewing {len(scope[0])} file(s) in "
+          f"{len(groups)} parallel group(s)")
+    return [
+        _build_messages(state, {path: files[path] for path in group},
+                        [path for path in files if path not in group])
+        for group in groups
+    ]
+
+
+def _reduce(state: GraphState, scope: tuple[list[str], list[str]], responses: list) -> dict:
+    """Merge the groups' findings, add cross-file checks and deduplicate."""
+    items: list[str] = []
+    for response in responses:
+        items.extend(_read_review(response)[1])
+    update = _merge_cached(state, scope, {
+        "review_feedback": items,
+        "llm_calls": [call_record("reviewer", r, state.get("iterations")) for r in responses],
+    })
+    cross = cross_file_issues(state["files"])
+    feedback = dedupe_issues([*update["review_feedback"], *cross])
+
+    print(f"   {len(items)} issue(s) from the groups, {len(cross)} cross-file issue(s), "
+          f"{len(feedback)} after merging")
+    if not feedback:
+        print("\n✅ Code APPROVED by reviewer!")
+    return _settle({**update, "review_feedback": feedback})
+
+
+def _reuse_speculative_review(state: GraphState) -> dict:
+    """The developer already reviewed this code while racing candidates."""
+    print("\n🔍 REVIEWER NODE — reusing the review from speculative generation")
+    return {**state["speculative_review"], "llm_calls": []}
+
+
+def reviewer_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Reviews the server code against the schema and returns feedback.
+
+    With a file map in ``files``, verdicts are cached per file (see
+    :mod:`src.utils.review_cache`): only changed files and the files that
+    require them are sent for review, and the cached verdicts of the rest are
+    merged into the result. With ``PipelineConfig.review_shard_threshold``
+    files or more to review, file groups are reviewed in parallel and merged
+    by a local reduce step (see :mod:`src.utils.review_shards`).
+
+    Args:
+        state: The current graph state with 'db_schema' and 'server_code'.
+        config: The run's RunnableConfig (carries the PipelineConfig).
+
+    Returns:
+        A dict updating 'review_feedback', 'review_cache' (when reviewing
+        per file) and optionally 'final_status'.
+    """
+    if state.get("speculative_review") is not None:
+        return _reuse_speculative_review(state)
+    scope = _review_scope(state)
+    if scope is not None and not scope[0]:
+        return _review_cached_only(state, scope)
+    if _review_sharded(state, config, scope):
+        llm = _get_reviewer_llm(state, config)
+        responses = run_parallel([
+            lambda messages=messages: llm.invoke(messages)
+            for messages in _group_requests(state, scope)
+        ])
+        return _reduce(state, scope, responses)
+    response = _get_reviewer_llm(state, config).invoke(_scoped_messages(state, scope))
+    update = _parse_review(state, response)
+    return update if scope is None else _merge_cached(state, scope, update)
+
+
+async def areviewer_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`reviewer_node`."""
+    if state.get("speculative_review") is not None:
+        return _reuse_speculative_review(state)
+    scope = _review_scope(state)
+    if scope is not None and not scope[0]:
+        return _review_cached_only(state, scope)
+    if _review_sharded(state, config, scope):
+        llm = _get_reviewer_llm(state, config)
+        responses = await asyncio.gather(*(
+            llm.ainvoke(messages) for messages in _group_requests(state, scope)
+        ))
+        return _reduce(state, scope, responses)
+    response = await _get_reviewer_llm(state, config).ainvoke(_scoped_messages(state, scope))
+    update = _parse_review(state, response)
+    return update if scope is None else _merge_cached(state, scope, update)
@@ -0,0 +1,49 @@
+"""Schema lint node: checks the architect's DDL against its rules and fixes it locally.
+
+Runs between the Architect and the Developer. The hard rules of
+``ARCHITECT_SYSTEM_PROMPT`` (UUID primary keys with ``gen_random_uuid()``,
+``created_at``/``updated_at TIMESTAMPTZ``, indexed foreign keys, snake_case
+names) are checked with :func:`src.utils.schema_lint.lint_schema`. The
+deterministic fixes are applied to ``db_schema`` before any code is written
+against it, without another LLM call, and every change is reported.
+"""
+
+from langchain_core.runnables import RunnableConfig
+
+from src.state import GraphState
+from src.utils.schema_lint import lint_schema
+
+
+def schema_lint_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Lint and fix the architect's schema.
+
+    Args:
+        state: The current graph state with 'db_schema' populated.
+        config: The run's RunnableConfig (unused; nodes share one signature).
+
+    Returns:
+        A dict with the fixed 'db_schema', the fixes applied
+        ('schema_fixes') and the violations left unfixed ('schema_violations').
+    """
+    linted = lint_schema(state.get("db_schema", ""))
+
+    print("\n" + "=" * 60)
+    print("📐 SCHEMA LINT NODE — Architect Rules")
+    print("=" * 60)
+    for fix in linted.fixes:
+        print(f"   fixed: {fix}")
+    for violation in linted.violations:
+        print(f"   ⚠️  {violation}")
+    if not linted.fixes and not linted.violations:
+        print("   Schema follows the architect rules.")
+
+    return {
+        "db_schema": linted.sql,
+        "schema_fixes": linted.fixes,
+        "schema_violations": linted.violations,
+    }
+
+
+async def aschema_lint_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`schema_lint_node` (no I/O, so it just delegates)."""
+    return schema_lint_node(state, config)
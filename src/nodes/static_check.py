@@ -0,0 +1,62 @@
+"""Static check node: local SQL checks in front of the LLM reviewer.
+
+Runs on the developer's file map right after Integration. Queries that
+interpolate or concatenate request values (see :mod:`src.utils.sql_scan`) and
+queries using tables or columns the schema does not define (see
+:mod:`src.utils.schema_check`) are found in milliseconds without a model;
+when there are any, the round skips the reviewer and the test run and goes
+straight back to the developer through the join node, with the findings as
+``review_feedback``. Queries built from other values (column lists for an
+``UPDATE``, say) are passed to the reviewer as ``static_hints`` instead.
+"""
+
+from langchain_core.runnables import RunnableConfig
+
+from src.state import GraphState
+from src.utils.catalog import parse_catalog
+from src.utils.file_map import file_map_from_code
+from src.utils.schema_check import check_files
+from src.utils.sql_scan import fragment_files, scan_files
+
+
+def static_check_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Scan the generated JavaScript for SQL built from strings or not matching the schema.
+
+    Args:
+        state: The current graph state with 'files' (or 'server_code') and
+            'db_schema'.
+        config: The run's RunnableConfig (unused; nodes share one signature).
+
+    Returns:
+        A dict setting 'static_issues' (empty when clean) and 'static_hints'
+        and, if there are issues, adding them to 'review_feedback' and
+        marking the tests 'skipped' for this round.
+    """
+    files = state.get("files") or file_map_from_code(state.get("server_code", ""))
+    issues = scan_files(files) + check_files(files, parse_catalog(state.get("db_schema", "")))
+    hints = fragment_files(files)
+
+    print("\n" + "=" * 60)
+    print("🧹 STATIC CHECK NODE — SQL Injection and Schema Scan")
+    print("=" * 60)
+    for hint in hints:
+        print(f"   hint: {hint}")
+    if not issues:
+        print("   No queries built from request values and no schema mismatches found.")
+        return {"static_issues": [], "static_hints": hints}
+
+    for issue in issues:
+        print(f"   - {issue}")
+    print(f"\n⚠️  {len(issues)} query issue(s) — back to the developer without an LLM review.")
+    return {
+        "static_issues": issues,
+        "static_hints": hints,
+        "review_feedback": issues,
+        "test_status": "skipped",
+        "test_results": "",
+    }
+
+
+async def astatic_check_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`static_check_node` (no I/O, so it just delegates)."""
+    return static_check_node(state, config)
@@ -1,14 +1,23 @@
 """TDD Test Node: generates Jest tests, runs them, and feeds errors back."""
 
+import asyncio
 import json
 import os
 import subprocess
 
+from langchain_core.runnables import RunnableConfig
+
+from src.config import get_pipeline_config
 from src.state import GraphState
+from src.utils.budget import remaining_budget
 from src.utils.code_parser import parse_code_blocks
-from src.utils.llm import get_llm
+from src.utils.file_map import files_digest
+from src.utils.llm import call_record, get_llm
+from src.utils.scheduler import request_priority
 from src.prompts.tdd_prompt import TDD_SYSTEM_PROMPT, TDD_USER_PROMPT
 
+NPM_TIMEOUT_SECONDS = 120
+
 
 def _list_files(directory: str) -> list[str]:
     """Return relative paths of all files under *directory*."""
@@ -66,9 +75,21 @@ def _npm_not_found_skip() -> dict:
     return {"test_status": "skipped", "test_results": msg}
 
 
-def tdd_test_node(state: GraphState) -> dict:
-    """Generate Jest tests, execute them, and return results or feedback."""
-    output_dir: str = state.get("output_dir") or "./output"
+def _preflight(
+    state: GraphState, output_dir: str, config: RunnableConfig | None = None
+) -> tuple[dict | None, list[str]]:
+    """Check the output dir is testable and the run can afford a test round.
+
+    Returns:
+        ``(skip_result, [])`` when tests cannot run, else ``(None, file_list)``.
+    """
+    # --- Guard: leave the remaining budget to the developer loop ---
+    if remaining_budget(state, config).low:
+        print("\n💸 TDD node: run budget is low — skipping test generation.")
+        return {
+            "test_status": "skipped",
+            "test_results": "Skipped: the run budget is low.",
+        }, []
 
     # --- Guard: output dir must exist ---
     if not os.path.isdir(output_dir):
@@ -76,27 +97,37 @@ def tdd_test_node(state: GraphState) -> dict:
         return {
             "test_status": "skipped",
             "test_results": "Output directory not found.",
-            "final_status": state.get("final_status", ""),
-        }
+        }, []
 
     file_list = _list_files(output_dir)
 
     # --- Guard: package.json must exist ---
-    pkg_path = os.path.join(output_dir, "package.json")
     if "package.json" not in file_list:
         print("\n⚠️  TDD node: no package.json found — skipping tests.")
         return {
             "test_status": "skipped",
             "test_results": "No package.json found in output directory.",
-            "final_status": state.get("final_status", ""),
-        }
+        }, []
+
+    return None, file_list
 
-    # --- Generate test files via LLM ---
-    server_code_content = _read_js_json_files(output_dir, file_list)
-    file_listing_str = "\n".join(f"  - {f}" for f in file_list)
 
-    llm = get_llm(temperature=0.1)
-    messages = [
+def _code_for_prompt(state: GraphState, output_dir: str, file_list: list[str]) -> str:
+    """The .js / .json sources, from the file map when the state has one."""
+    files = state.get("files")
+    if not files:
+        return _read_js_json_files(output_dir, file_list)
+    return "\n\n".join(
+        f"// {path}\n{entry['content']}"
+        for path, entry in sorted(files.items())
+        if path.endswith(".js") or path.endswith(".json")
+    )
+
+
+def _build_messages(state: GraphState, output_dir: str, file_list: list[str]) -> list[dict]:
+    server_code_content = _code_for_prompt(state, output_dir, file_list)
+    file_listing_str = "\n".join(f"  - {f}" for f in file_list)
+    return [
         {"role": "system", "content": TDD_SYSTEM_PROMPT},
         {
             "role": "user",
@@ -107,7 +138,18 @@ def tdd_test_node(state: GraphState) -> dict:
             ),
         },
     ]
-    response = llm.invoke(messages)
+
+
+def _get_tdd_llm(state: GraphState, config: RunnableConfig | None):
+    return get_llm(
+        priority=request_priority("tdd", state.get("iterations", 0)),
+        node="tdd",
+        pipeline=get_pipeline_config(config),
+    )
+
+
+def _write_tests(output_dir: str, response) -> None:
+    """Write generated test files and make package.json runnable with Jest."""
     generated = response.content.strip()
 
     # Write test files to output_dir (parse_code_blocks handles subdirs)
@@ -121,68 +163,53 @@ def tdd_test_node(state: GraphState) -> dict:
             fh.write(content)
 
     # Ensure package.json has jest + supertest + test script
-    _patch_package_json(pkg_path)
+    _patch_package_json(os.path.join(output_dir, "package.json"))
 
     print(f"\n🧪 TDD node — test files written, running npm install + npm test …")
 
-    # --- npm install ---
-    try:
-        install_result = subprocess.run(
-            ["npm", "install"],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd=output_dir,
-        )
-    except FileNotFoundError:
-        return {**_npm_not_found_skip(), "final_status": state.get("final_status", "")}
-    except subprocess.TimeoutExpired:
-        msg = "npm install timed out — skipping tests."
-        print(f"\n⚠️  TDD node: {msg}")
-        return {
-            "test_status": "skipped",
-            "test_results": msg,
-            "final_status": state.get("final_status", ""),
-        }
 
-    if install_result.returncode != 0:
-        msg = f"npm install failed:\n{install_result.stderr}"
-        print(f"\n⚠️  TDD node: npm install failed — skipping tests.")
-        return {
-            "test_status": "skipped",
-            "test_results": msg,
-            "final_status": state.get("final_status", ""),
-        }
+def _digest(state: GraphState) -> str:
+    files = state.get("files")
+    return files_digest(files) if files else ""
 
-    # --- npm test ---
-    try:
-        test_result = subprocess.run(
-            ["npm", "test"],
-            capture_output=True,
-            text=True,
-            timeout=120,
-            cwd=output_dir,
-        )
-    except FileNotFoundError:
-        return {**_npm_not_found_skip(), "final_status": state.get("final_status", "")}
-    except subprocess.TimeoutExpired:
-        msg = "npm test timed out after 120 seconds."
-        print(f"\n⚠️  TDD node: {msg}")
-        return {
-            "test_status": "failed",
-            "test_results": msg,
-            "review_feedback": [f"[TEST FAILURE] {msg}"],
-        }
 
+def _reuse_tests(output_dir: str) -> None:
+    """The code is unchanged since the tests were generated: rerun them as-is."""
+    _patch_package_json(os.path.join(output_dir, "package.json"))
+    print("\n🧪 TDD node — code unchanged, rerunning the existing tests …")
+
+
+def _install_timeout() -> dict:
+    msg = "npm install timed out — skipping tests."
+    print(f"\n⚠️  TDD node: {msg}")
+    return {"test_status": "skipped", "test_results": msg}
+
+
+def _install_failed(install_result) -> dict | None:
+    """Return a skipped result if ``npm install`` failed, else None."""
+    if install_result.returncode == 0:
+        return None
+    msg = f"npm install failed:\n{install_result.stderr}"
+    print(f"\n⚠️  TDD node: npm install failed — skipping tests.")
+    return {"test_status": "skipped", "test_results": msg}
+
+
+def _test_timeout() -> dict:
+    msg = f"npm test timed out after {NPM_TIMEOUT_SECONDS} seconds."
+    print(f"\n⚠️  TDD node: {msg}")
+    return {
+        "test_status": "failed",
+        "test_results": msg,
+        "review_feedback": [f"[TEST FAILURE] {msg}"],
+    }
+
+
+def _test_outcome(test_result) -> dict:
     combined_output = (test_result.stdout or "") + (test_result.stderr or "")
 
     if test_result.returncode == 0:
         print("\n✅ TDD node — all tests passed!")
-        return {
-            "test_status": "passed",
-            "test_results": test_result.stdout,
-            "final_status": "approved",
-        }
+        return {"test_status": "passed", "test_results": test_result.stdout}
 
     # Tests failed — extract errors and feed back to developer
     print("\n❌ TDD node — tests failed. Feeding errors back to developer.")
@@ -192,3 +219,136 @@ def tdd_test_node(state: GraphState) -> dict:
         "test_results": combined_output,
         "review_feedback": [error_feedback],
     }
+
+
+def _run_npm(command: str, output_dir: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        ["npm", command],
+        capture_output=True,
+        text=True,
+        timeout=NPM_TIMEOUT_SECONDS,
+        cwd=output_dir,
+    )
+
+
+async def _arun_npm(command: str, output_dir: str) -> subprocess.CompletedProcess:
+    """Run ``npm <command>`` as an asyncio subprocess.
+
+    Mirrors :func:`subprocess.run` semantics: raises ``FileNotFoundError`` if npm
+    is missing and ``subprocess.TimeoutExpired`` (after killing npm) on timeout.
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "npm",
+        command,
+        cwd=output_dir,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), NPM_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise subprocess.TimeoutExpired(cmd=f"npm {command}", timeout=NPM_TIMEOUT_SECONDS)
+    return subprocess.CompletedProcess(
+        args=["npm", command],
+        returncode=proc.returncode,
+        stdout=stdout.decode("utf-8", errors="replace"),
+        stderr=stderr.decode("utf-8", errors="replace"),
+    )
+
+
+def tdd_test_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Generate Jest tests, execute them, and return results or feedback."""
+    output_dir: str = state.get("output_dir") or get_pipeline_config(config).output_dir
+
+    skipped, file_list = _preflight(state, output_dir, config)
+    if skipped is not None:
+        return skipped
+
+    digest = _digest(state)
+    if digest and digest == state.get("tested_digest"):
+        _reuse_tests(output_dir)
+        return {**_install_and_test(state, output_dir), "tested_digest": digest}
+
+    # --- Generate test files via LLM ---
+    response = _get_tdd_llm(state, config).invoke(_build_messages(state, output_dir, file_list))
+    _write_tests(output_dir, response)
+
+    result = _install_and_test(state, output_dir)
+    return {
+        **result,
+        "tested_digest": digest,
+        "llm_calls": [call_record("tdd", response, state.get("iterations"))],
+    }
+
+
+def _install_and_test(state: GraphState, output_dir: str) -> dict:
+    # --- npm install ---
+    try:
+        install_result = _run_npm("install", output_dir)
+    except FileNotFoundError:
+        return _npm_not_found_skip()
+    except subprocess.TimeoutExpired:
+        return _install_timeout()
+
+    failed = _install_failed(install_result)
+    if failed is not None:
+        return failed
+
+    # --- npm test ---
+    try:
+        test_result = _run_npm("test", output_dir)
+    except FileNotFoundError:
+        return _npm_not_found_skip()
+    except subprocess.TimeoutExpired:
+        return _test_timeout()
+
+    return _test_outcome(test_result)
+
+
+async def atdd_test_node(state: GraphState, config: RunnableConfig | None = None) -> dict:
+    """Async variant of :func:`tdd_test_node` using asyncio subprocesses for npm."""
+    output_dir: str = state.get("output_dir") or get_pipeline_config(config).output_dir
+
+    skipped, file_list = await asyncio.to_thread(_preflight, state, output_dir, config)
+    if skipped is not None:
+        return skipped
+
+    digest = _digest(state)
+    if digest and digest == state.get("tested_digest"):
+        await asyncio.to_thread(_reuse_tests, output_dir)
+        return {**await _ainstall_and_test(state, output_dir), "tested_digest": digest}
+
+    messages = await asyncio.to_thread(_build_messages, state, output_dir, file_list)
+    response = await _get_tdd_llm(state, config).ainvoke(messages)
+    await asyncio.to_thread(_write_tests, output_dir, response)
+
+    result = await _ainstall_and_test(state, output_dir)
+    return {
+        **result,
+        "tested_digest": digest,
+        "llm_calls": [call_record("tdd", response, state.get("iterations"))],
+    }
+
+
+async def _ainstall_and_test(state: GraphState, output_dir: str) -> dict:
+    try:
+        install_result = await _arun_npm("install", output_dir)
+    except FileNotFoundError:
+        return _npm_not_found_skip()
+    except subprocess.TimeoutExpired:
+        return _install_timeout()
+
+    failed = _install_failed(install_result)
+    if failed is not None:
+        return failed
+
+    try:
+        test_result = await _arun_npm("test", output_dir)
+    except FileNotFoundError:
+        return _npm_not_found_skip()
+    except subprocess.TimeoutExpired:
+        return _test_timeout()
+
+    return _test_outcome(test_result)
@@ -37,3 +37,33 @@ Output ONLY the SQL schema."""
 ARCHITECT_USER_PROMPT = """Design the PostgreSQL database schema for the following system:
 
 {requirements}"""
+
+PARTITION_SYSTEM_PROMPT = """You are a senior software architect. Split a large system's
+requirements into bounded contexts (e.g. identity, catalog, ordering, billing) that can
+each be given to a different database architect.
+
+Rules:
+1. Every entity belongs to exactly one context; name entities as snake_case plural
+   table names (e.g. order_items).
+2. Keep tightly coupled entities in the same context; aim for 5-20 entities each.
+3. List in `references` the tables of OTHER contexts that this context's tables need
+   foreign keys to.
+4. Copy every requirement into the context it concerns; shared requirements (naming,
+   auditing, soft deletes) go into every context."""
+
+PARTITION_USER_PROMPT = """Split the following system into bounded contexts:
+
+{requirements}"""
+
+CONTEXT_USER_PROMPT = """Design the PostgreSQL schema for the `{context}` bounded context of a
+larger system. Other contexts are designed separately and merged with yours.
+
+## Tables This Context Owns
+{entities}
+
+## Tables Owned by Other Contexts
+Reference these with REFERENCES <table>(id) where needed, but do NOT create them:
+{references}
+
+## Requirements
+{requirements}"""
@@ -44,3 +44,67 @@ FEEDBACK_SECTION_TEMPLATE = """## Review Feedback (MUST FIX ALL)
 The following issues were found in your previous code. Fix every single one:
 
 {feedback}"""
+
+ESCALATION_SECTION_TEMPLATE = """## Change of Approach
+Your previous attempts {reason}. Do not repeat them: rethink how the code is
+structured and fix the feedback with a different approach."""
+
+PATCH_USER_PROMPT = """Revise the Node.js/Express backend below to address the review feedback.
+
+## Requirements
+{requirements}
+
+## Database Schema
+```sql
+{db_schema}
+```
+
+## Current Files
+{files}
+
+{feedback_section}
+
+Return ONLY the files you change, add or delete; every file you leave out is
+kept exactly as shown above. For each file give either its complete new
+contents, or a unified diff against the current file (`@@ -start,count
++start,count @@` hunks whose context and `-` lines match the current file
+exactly), or mark it deleted."""
+
+SHARED_FILES_USER_PROMPT = """Generate ONLY the shared files of a Node.js/Express backend:
+`package.json`, `server.js` and `db/pool.js`. The routes and controllers are
+written separately; do not generate them.
+
+## Requirements
+{requirements}
+
+## Routes to Mount
+`server.js` MUST require and mount every one of these routers, exactly as listed:
+{routes}
+
+`db/pool.js` MUST export the `pg` Pool; every controller does
+`const pool = require('../db/pool');`.
+
+{feedback_section}"""
+
+ENTITY_FILES_USER_PROMPT = """Generate ONLY these two files of a Node.js/Express backend,
+for the `{table}` table:
+- `{routes_path}`: an `express.Router()` with full CRUD endpoints, exported
+  with `module.exports = router;`. `server.js` mounts it at `{mount_path}`.
+- `{controller_path}`: the handlers, required by the routes file as
+  `require('../controllers/{entity}.controller')`. Query through
+  `const pool = require('../db/pool');`.
+
+## Requirements
+{requirements}
+
+## Database Schema (this table and the tables it references)
+```sql
+{ddl}
+```
+
+{feedback_section}"""
+
+CONSISTENCY_SECTION_TEMPLATE = """## Consistency Problems (MUST FIX)
+The files you generated did not fit the rest of the backend:
+
+{problems}"""
@@ -47,3 +47,17 @@ REVIEWER_USER_PROMPT = """Review the following backend code against the schema.
 
 ## Server Code
 {server_code}"""
+
+UNCHANGED_FILES_SECTION_TEMPLATE = """## Unchanged Files (already reviewed, not shown)
+These files exist and were reviewed in an earlier iteration. Assume they are as
+before; report issues only in the files shown above.
+
+{paths}"""
+
+STATIC_HINTS_SECTION_TEMPLATE = """## Static Check Notes
+A local scan found these queries building SQL text from values that do not come
+from the request (for example a column list for an UPDATE). Placeholders cannot
+express identifiers; report SQL injection only if a request value or an
+unchecked name can reach the SQL.
+
+{hints}"""
@@ -1,8 +1,86 @@
 """Shared state object for the LangGraph workflow."""
 
+import re
 from typing import TypedDict, Annotated
 from operator import add
 
+from src.utils.scheduler import CHARS_PER_TOKEN
+
+# A developer update starting with this item clears the previous round's feedback.
+RESET_FEEDBACK = "__reset_feedback__"
+
+MAX_FEEDBACK_TOKENS = 2000
+MAX_ITEM_TOKENS = 800
+SUMMARY_CHARS = 160
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(item: str) -> str:
+    return _WHITESPACE.sub(" ", item).strip()
+
+
+def _tokens(items: list[str]) -> int:
+    return sum(len(item) for item in items) // CHARS_PER_TOKEN
+
+
+def _shorten(item: str, max_tokens: int) -> str:
+    """Keep the head and tail of an oversized item (e.g. Jest output)."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(item) <= max_chars:
+        return item
+    head = max_chars // 3
+    tail = max_chars - head
+    omitted = len(item) - head - tail
+    return f"{item[:head]}\n… [{omitted} characters omitted] …\n{item[-tail:]}"
+
+
+def _summarize(item: str) -> str:
+    line = _normalize(item)
+    return line if len(line) <= SUMMARY_CHARS else line[: SUMMARY_CHARS - 1] + "…"
+
+
+def cap_feedback(items: list[str], max_tokens: int = MAX_FEEDBACK_TOKENS) -> list[str]:
+    """Bound feedback to about *max_tokens*, newest items kept in full longest.
+
+    Oversized items are cut to their head and tail first; if that is not
+    enough, the oldest items are summarized to one line, then dropped behind
+    an ``(N earlier items omitted)`` note.
+    """
+    items = [_shorten(item, MAX_ITEM_TOKENS) for item in items]
+    for i in range(len(items)):
+        if _tokens(items) <= max_tokens:
+            return items
+        items[i] = _summarize(items[i])
+    dropped = 0
+    while len(items) > 1 and _tokens(items) > max_tokens:
+        items.pop(0)
+        dropped += 1
+    if dropped:
+        items.insert(0, f"({dropped} earlier feedback item(s) omitted)")
+    return items
+
+
+def merge_feedback(existing: list[str] | None, update: list[str] | None) -> list[str]:
+    """Reducer for ``review_feedback``.
+
+    Appends *update* to *existing* unless it starts with :data:`RESET_FEEDBACK`
+    (then the old items are dropped), skips items equal to one already present
+    apart from whitespace, and caps the total with :func:`cap_feedback`, so the
+    developer prompt stays the same size across iterations.
+    """
+    items = list(existing or [])
+    update = list(update or [])
+    if update and update[0] == RESET_FEEDBACK:
+        items, update = [], update[1:]
+    seen = {_normalize(item) for item in items}
+    for item in update:
+        key = _normalize(item)
+        if key and key not in seen:
+            seen.add(key)
+            items.append(item)
+    return cap_feedback(items)
+
 
 class GraphState(TypedDict):
     """The shared memory object passed between all nodes in the graph.
@@ -11,18 +89,68 @@ class GraphState(TypedDict):
         requirements: The user's high-level prompt describing the backend to build.
         db_schema: The generated PostgreSQL schema (CREATE TABLE statements).
         server_code: The generated Node.js/Express backend code.
-        review_feedback: A list of critiques/errors found by the reviewer.
+        review_feedback: This round's critiques/errors from the reviewer and the
+            tests; deduplicated and size-capped by :func:`merge_feedback`.
         iterations: Counter to prevent infinite correction loops.
-        final_status: Whether the code was 'approved' or 'max_iterations_reached'.
+        final_status: 'approved' once the join node sees an approving review and
+            no failed tests, a stall reason from :mod:`src.utils.convergence`
+            if the loop stopped making progress, else 'pending'.
         test_results: Raw stdout/stderr captured from running `npm test`.
         test_status: Outcome of the test run — 'passed', 'failed', or 'skipped'.
+        llm_calls: One record per LLM call: node, iteration, model and endpoint.
+        speculative_review: The reviewer's update for the current code when the
+            developer already reviewed it while racing candidates, else None.
+        files: The developer's output parsed once into path → FileEntry
+            (language, sha256, size, content); see :mod:`src.utils.file_map`.
+        written_files: path → sha256 of the files Integration last wrote.
+        tested_digest: Digest of the file set the TDD node last generated tests for.
+        schema_fixes: What the schema lint changed in the architect's DDL.
+        schema_violations: Architect rules the schema still breaks (not auto-fixable).
+        static_issues: Unsafe queries and schema mismatches the static check
+            found this round; any route the round straight back to the developer.
+        static_hints: Queries the static check found built from values that
+            do not come from the request, for the reviewer to judge.
+        review_cache: Per-file review verdicts (feedback items, empty when
+            clean) keyed by file content hash and schema hash.
+        fingerprints: Code and feedback hashes of every round, for stall detection.
+        escalation: Why developer rounds were escalated, or None.
     """
     requirements: str
     db_schema: str
     server_code: str
-    review_feedback: Annotated[list[str], add]
+    files: dict[str, dict]  # path → FileEntry, parsed once by the developer
+    written_files: dict[str, str]  # path → sha256 last written by Integration
+    tested_digest: str  # files_digest() of the code the current tests target
+    schema_fixes: list[str]  # src/utils/schema_lint.py fixes applied to db_schema
+    schema_violations: list[str]
+    static_issues: list[str]  # sql_scan.py and schema_check.py findings for the current code
+    static_hints: list[str]  # sql_scan.sql_fragments() findings, shown to the reviewer
+    review_cache: dict[str, list[str]]  # review_key() → that file's issues, see src/utils/review_cache.py
+    review_feedback: Annotated[list[str], merge_feedback]
     iterations: int
     final_status: str
     output_dir: str  # Path to the directory where generated files are written
     test_results: str  # Raw stdout/stderr from `npm test` execution
     test_status: str   # Either "passed", "failed", or "skipped"
+    llm_calls: Annotated[list[dict], add]  # Which model/endpoint served each call
+    speculative_review: dict | None  # Review done during candidate racing
+    fingerprints: Annotated[list[dict], add]  # One per round, see src/utils/convergence.py
+    escalation: str | None  # Stall reason that escalated the developer, if any
+
+
+def merge_update(state: dict, update: dict) -> dict:
+    """Fold one node's update into a locally tracked copy of the state.
+
+    Mirrors the graph's reducers for ``llm_calls`` and ``fingerprints``
+    (appended) and ``review_feedback`` (:func:`merge_feedback`); every other
+    key is overwritten.
+    """
+    merged = {**state, **update}
+    if "review_feedback" in update:
+        merged["review_feedback"] = merge_feedback(
+            state.get("review_feedback"), update["review_feedback"]
+        )
+    for key in ("llm_calls", "fingerprints"):
+        if key in update:
+            merged[key] = list(state.get(key, [])) + list(update[key])
+    return merged
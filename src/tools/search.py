@@ -1,26 +1,32 @@
 """Web search tool for the latest PostgreSQL documentation."""
 
-import os
-
+from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 
+from src.config import get_pipeline_config
+
 
 @tool
-def search_postgres_docs(query: str) -> str:
+def search_postgres_docs(query: str, config: RunnableConfig) -> str:
     """Search the web for the latest PostgreSQL documentation and best practices.
 
     Tries Tavily first (if TAVILY_API_KEY is set), then falls back to SerpAPI
     (if SERPAPI_API_KEY is set). If neither key is available, returns a graceful
     message so the agent can proceed with internal knowledge.
 
+    Keys come from the run's PipelineConfig (injected via ``config``), falling
+    back to the environment.
+
     Args:
         query: The search query, e.g. 'PostgreSQL UUID primary key best practices'.
+        config: The run's RunnableConfig, injected by LangChain.
 
     Returns:
         Formatted search results as a string, or a graceful fallback message.
     """
-    tavily_key = os.environ.get("TAVILY_API_KEY")
-    serpapi_key = os.environ.get("SERPAPI_API_KEY")
+    pipeline = get_pipeline_config(config)
+    tavily_key = pipeline.api_key("TAVILY_API_KEY")
+    serpapi_key = pipeline.api_key("SERPAPI_API_KEY")
 
     if tavily_key:
         try:
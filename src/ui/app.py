@@ -1,11 +1,20 @@
 """Streamlit web application for the Autonomous Backend Architect."""
 
+import asyncio
 import io
+import json
 import os
 import zipfile
 
 from dotenv import load_dotenv
 
+from src.config import STARTED_AT_KEY, Budget, PipelineConfig
+from src.state import merge_update
+from src.utils.budget import BUDGET_EXHAUSTED
+from src.utils.checkpoint import get_checkpointer, new_run_id
+from src.utils.llm import continuation_counts, summarize_calls
+from src.utils.metrics import aggregate
+
 
 def _display_node_output(node_name: str, node_output: dict) -> None:
     """Render a single node's output using appropriate Streamlit widgets."""
@@ -17,17 +26,28 @@ def _display_node_output(node_name: str, node_output: dict) -> None:
             if schema:
                 st.code(schema, language="sql")
 
+    elif node_name == "schema_lint_node":
+        fixes = node_output.get("schema_fixes", [])
+        violations = node_output.get("schema_violations", [])
+        if not fixes and not violations:
+            st.success("📐 Schema lint — architect rules followed")
+        else:
+            with st.status("📐 Schema Lint — Fixing Schema...", expanded=True):
+                for fix in fixes:
+                    st.write(f"✅ {fix}")
+                for violation in violations:
+                    st.write(f"⚠️ {violation}")
+                if fixes:
+                    st.code(node_output.get("db_schema", ""), language="sql")
+
     elif node_name == "developer_node":
         with st.status("💻 Developer — Generating Code...", expanded=True):
             iteration = node_output.get("iterations", 0)
             st.caption(f"Iteration: {iteration}")
-            server_code = node_output.get("server_code", "")
-            if server_code:
-                from src.utils.code_parser import parse_code_blocks
-                files = parse_code_blocks(server_code)
-                for fname, content in files.items():
-                    st.subheader(fname)
-                    st.code(content, language="javascript")
+            # The developer already parsed its output into a file map
+            for entry in (node_output.get("files") or {}).values():
+                st.subheader(entry["path"])
+                st.code(entry["content"], language=entry["language"])
 
     elif node_name == "reviewer_node":
         with st.status("🔍 Reviewer — Analyzing Code...", expanded=True):
@@ -39,6 +59,17 @@ def _display_node_output(node_name: str, node_output: dict) -> None:
                 for i, item in enumerate(feedback, 1):
                     st.write(f"{i}. {item}")
 
+    elif node_name == "static_check_node":
+        issues = node_output.get("static_issues", [])
+        for hint in node_output.get("static_hints", []):
+            st.info(f"🧹 {hint}")
+        if not issues:
+            st.success("🧹 Static check — no unsafe queries or schema mismatches")
+        else:
+            with st.status("🧹 Static Check — Query Issues Found", expanded=True):
+                for i, item in enumerate(issues, 1):
+                    st.write(f"{i}. {item}")
+
     elif node_name == "integration_node":
         with st.status("📂 Integration — Writing Files...", expanded=True):
             out_dir = node_output.get("output_dir", "")
@@ -64,6 +95,43 @@ def _display_node_output(node_name: str, node_output: dict) -> None:
             if test_results:
                 st.code(test_results, language="text")
 
+    elif node_name == "join_node":
+        if node_output.get("final_status") == "approved":
+            st.success("🔗 Review and tests passed — round approved")
+        else:
+            st.info("🔗 Review feedback and test results sent back to the developer")
+
+
+async def _stream_pipeline(
+    graph, initial_state: dict | None, pipeline: PipelineConfig, run_id: str | None = None
+) -> tuple[list[tuple[str, dict]], dict]:
+    """Drive the graph with ``astream`` and render each node's output as it arrives.
+
+    *pipeline* carries this session's keys and model, so concurrent sessions
+    never share credentials through ``os.environ``. With *initial_state* None
+    the checkpointed run *run_id* continues after its last completed node,
+    with the settings and start time it was begun with.
+    """
+    config = pipeline.runnable_config(run_id=run_id)
+    events: list[tuple[str, dict]] = []
+    if initial_state is None:
+        snapshot = await graph.aget_state(config)
+        if not snapshot.values:
+            raise ValueError(f"No checkpoint found for run {run_id!r}.")
+        final_state = dict(snapshot.values)
+        pipeline = pipeline.restored(snapshot.metadata)
+        config = pipeline.runnable_config(
+            run_id=run_id, started_at=(snapshot.metadata or {}).get(STARTED_AT_KEY)
+        )
+    else:
+        final_state = dict(initial_state)
+    async for event in graph.astream(initial_state, config):
+        for node_name, node_output in event.items():
+            events.append((node_name, node_output))
+            final_state = merge_update(final_state, node_output)
+            _display_node_output(node_name, node_output)
+    return events, final_state
+
 
 def _show_final_summary(final_state: dict, output_dir: str) -> None:
     """Render the final summary and downloads sections."""
@@ -81,6 +149,8 @@ def _show_final_summary(final_state: dict, output_dir: str) -> None:
         st.success(f"✅ Status: {status}")
     elif status == "pending":
         st.warning(f"⚠️ Status: {status}")
+    elif status == BUDGET_EXHAUSTED:
+        st.warning(f"⏱️ Status: {status} — the files are the last iteration's best effort")
     else:
         st.error(f"❌ Status: {status}")
 
@@ -89,6 +159,33 @@ def _show_final_summary(final_state: dict, output_dir: str) -> None:
     if test_status:
         st.write(f"**Test Status:** {test_status}")
 
+    calls = final_state.get("llm_calls", [])
+    if calls:
+        st.write("**Model calls:**")
+        st.table([
+            {"node": node, "model": model, "endpoint": endpoint, "calls": count}
+            for node, model, endpoint, count in summarize_calls(calls)
+        ])
+        for node, count in continuation_counts(calls).items():
+            st.caption(f"↪ {node}: {count} continuation(s) after hitting the output limit")
+
+        metrics = aggregate(calls)
+        totals = metrics["totals"]
+        st.write("**Tokens and latency:**")
+        cols = st.columns(4)
+        cols[0].metric("Prompt tokens", totals["prompt_tokens"])
+        cols[1].metric("Completion tokens", totals["completion_tokens"])
+        cols[2].metric("LLM time", f"{totals['latency_s']:.1f}s")
+        cols[3].metric("Cache hits", f"{totals['cache_hits']}/{totals['calls']}")
+        st.dataframe(metrics["by_iteration"], use_container_width=True)
+        st.download_button(
+            label="⬇️ Metrics (JSON)",
+            data=json.dumps({**metrics, "calls": calls}, indent=2),
+            file_name="metrics.json",
+            mime="application/json",
+            key="dl_metrics",
+        )
+
     # Downloads section
     if out_dir and os.path.isdir(out_dir):
         st.divider()
@@ -136,8 +233,6 @@ def main_app() -> None:
     with st.sidebar:
         st.header("⚙️ Configuration")
         groq_key = st.text_input("Groq API Key", type="password")
-        if groq_key:
-            os.environ["GROQ_API_KEY"] = groq_key
 
         model_choice = st.selectbox(
             "Model",
@@ -148,14 +243,37 @@ def main_app() -> None:
                 "gemma2-9b-it",
             ],
         )
-        os.environ["LLM_MODEL"] = model_choice
 
         tavily_key = st.text_input("Tavily API Key (optional)", type="password")
-        if tavily_key:
-            os.environ["TAVILY_API_KEY"] = tavily_key
 
         output_dir = st.text_input("Output Directory", value="./output")
 
+        candidates = st.number_input(
+            "Speculative candidates",
+            min_value=1,
+            max_value=5,
+            value=1,
+            help="Generate and review several implementations at once; the first approved wins.",
+        )
+
+        patch_mode = st.checkbox(
+            "Patch mode",
+            value=True,
+            help="From the second iteration on, only changed files or diffs are generated.",
+        )
+
+        with st.expander("⏱️ Run budget"):
+            st.caption("0 means unlimited.")
+            deadline_s = st.number_input("Deadline (seconds)", min_value=0, value=0, step=60)
+            max_tokens = st.number_input("Max tokens", min_value=0, value=0, step=10000)
+            max_llm_calls = st.number_input("Max LLM calls", min_value=0, value=0, step=5)
+
+        resume_id = st.text_input(
+            "Resume Run ID (optional)",
+            value=st.session_state.get("run_id", ""),
+            help="Continue an interrupted run from its last completed node.",
+        )
+
         if st.button("🗑️ Clear History"):
             st.session_state.clear()
             st.rerun()
@@ -167,7 +285,8 @@ def main_app() -> None:
                 "3. Type your backend requirements in the main area.\n"
                 "4. Click **🚀 Generate Backend** to start the pipeline.\n"
                 "5. Watch each agent work in real-time.\n"
-                "6. Download the generated files when done."
+                "6. Download the generated files when done.\n"
+                "7. If a run is interrupted, press **⏯️ Resume Run** to continue it."
             )
 
     # --- Main area ---
@@ -183,22 +302,48 @@ def main_app() -> None:
         height=150,
     )
 
-    generate_clicked = st.button("🚀 Generate Backend")
+    cols = st.columns([1, 1, 4])
+    generate_clicked = cols[0].button("🚀 Generate Backend")
+    resume_clicked = cols[1].button("⏯️ Resume Run", disabled=not resume_id.strip())
 
-    if generate_clicked:
-        if not os.environ.get("GROQ_API_KEY"):
-            load_dotenv()
-        if not os.environ.get("GROQ_API_KEY"):
+    if generate_clicked or resume_clicked:
+        load_dotenv()
+        api_keys = {
+            name: value
+            for name, value in (("GROQ_API_KEY", groq_key), ("TAVILY_API_KEY", tavily_key))
+            if value
+        }
+        pipeline = PipelineConfig(
+            api_keys=api_keys,
+            model=model_choice,
+            output_dir=output_dir,
+            candidates=int(candidates),
+            patch_mode=patch_mode,
+            budget=Budget(
+                deadline_s=deadline_s or None,
+                max_tokens=int(max_tokens) or None,
+                max_llm_calls=int(max_llm_calls) or None,
+            ),
+        )
+        if not pipeline.api_key("GROQ_API_KEY"):
             st.error("❌ Groq API Key is required. Enter it in the sidebar or set GROQ_API_KEY in your environment.")
             return
-        if not prompt.strip():
+        if generate_clicked and not prompt.strip():
             st.error("❌ Please enter your backend requirements.")
             return
 
+        checkpointer = get_checkpointer()
+        if resume_clicked and checkpointer is None:
+            st.error("❌ Cannot resume: checkpointing is off (CHECKPOINT_DIR is empty).")
+            return
+        run_id = resume_id.strip() if resume_clicked else (new_run_id() if checkpointer else None)
+        if run_id:
+            st.caption(f"🔖 Run ID: `{run_id}`")
+
         from src.graph import build_graph
-        graph = build_graph()
+        graph = build_graph(checkpointer)
 
-        initial_state = {
+        initial_state = None if resume_clicked else {
             "requirements": prompt,
             "db_schema": "",
             "server_code": "",
@@ -208,25 +353,25 @@ def main_app() -> None:
             "output_dir": output_dir,
             "test_results": "",
             "test_status": "",
+            "llm_calls": [],
         }
 
-        events: list[tuple[str, dict]] = []
-        final_state: dict = dict(initial_state)
-
         try:
-            for event in graph.stream(initial_state, {"recursion_limit": 25}):
-                for node_name, node_output in event.items():
-                    events.append((node_name, node_output))
-                    final_state = {**final_state, **node_output}
-                    _display_node_output(node_name, node_output)
+            events, final_state = asyncio.run(
+                _stream_pipeline(graph, initial_state, pipeline, run_id)
+            )
         except Exception as exc:
             st.error(f"❌ Pipeline error: {exc}")
+            if run_id:
+                st.session_state.run_id = run_id
+                st.info(f"Fix the problem and press **⏯️ Resume Run** to continue run `{run_id}`.")
             return
 
+        st.session_state.run_id = run_id or ""
         st.session_state.final_state = final_state
         st.session_state.events = events
 
-        _show_final_summary(final_state, output_dir)
+        _show_final_summary(final_state, final_state.get("output_dir", output_dir))
 
     elif "final_state" in st.session_state:
         # Re-display results from previous run without re-running the pipeline
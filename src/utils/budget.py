@@ -0,0 +1,65 @@
+"""Time, token and call budgets for a run.
+
+A :class:`src.config.Budget` on the run's PipelineConfig caps wall-clock time
+(counted from :meth:`PipelineConfig.runnable_config`), total tokens and LLM
+calls. Usage is read from the ``llm_calls`` state key. The join node stops the
+developer loop with ``final_status = "budget_exhausted"`` once any limit is
+spent, keeping the last iteration's files, and nodes switch to cheaper
+strategies once a limit runs low.
+"""
+
+import time
+from dataclasses import dataclass
+
+from langchain_core.runnables import RunnableConfig
+
+from src.config import STARTED_AT_KEY, get_pipeline_config
+
+BUDGET_EXHAUSTED = "budget_exhausted"
+
+# A limit counts as low once less than this fraction of it is left.
+LOW_BUDGET_FRACTION = 0.25
+
+
+@dataclass(frozen=True)
+class Remaining:
+    """What is left of each limit (None = unlimited)."""
+
+    seconds: float | None = None
+    tokens: int | None = None
+    llm_calls: int | None = None
+    low: bool = False
+
+    @property
+    def exhausted(self) -> str | None:
+        """Which limit is used up, or None."""
+        if self.seconds is not None and self.seconds <= 0:
+            return "deadline"
+        if self.tokens is not None and self.tokens <= 0:
+            return "tokens"
+        if self.llm_calls is not None and self.llm_calls <= 0:
+            return "llm_calls"
+        return None
+
+
+def remaining_budget(state: dict, config: RunnableConfig | None) -> Remaining:
+    """The run's remaining budget given the calls recorded in *state*."""
+    budget = get_pipeline_config(config).budget
+    calls = state.get("llm_calls") or []
+    started_at = ((config or {}).get("configurable") or {}).get(STARTED_AT_KEY)
+
+    seconds = tokens = llm_calls = None
+    fractions: list[float] = []
+    if budget.deadline_s is not None and started_at is not None:
+        seconds = budget.deadline_s - (time.time() - started_at)
+        fractions.append(seconds / budget.deadline_s if budget.deadline_s else 0.0)
+    if budget.max_tokens is not None:
+        used = sum((c.get("prompt_tokens") or 0) + (c.get("completion_tokens") or 0) for c in calls)
+        tokens = budget.max_tokens - used
+        fractions.append(tokens / budget.max_tokens if budget.max_tokens else 0.0)
+    if budget.max_llm_calls is not None:
+        llm_calls = budget.max_llm_calls - len(calls)
+        fractions.append(llm_calls / budget.max_llm_calls if budget.max_llm_calls else 0.0)
+
+    low = any(f < LOW_BUDGET_FRACTION for f in fractions)
+    return Remaining(seconds=seconds, tokens=tokens, llm_calls=llm_calls, low=low)
@@ -0,0 +1,322 @@
+"""An in-memory catalog of the architect's schema.
+
+:func:`parse_catalog` reads the ``CREATE TABLE``, ``CREATE INDEX`` and
+``ALTER TABLE ... ADD``/``ALTER COLUMN`` statements of the architect's DDL
+into tables with their columns (type, nullability, default), primary key,
+unique constraints, foreign keys and indexes; ``LIKE`` and ``INHERITS``
+bring in the source table's columns. Names are unquoted, lower-cased and stripped of
+their schema, as in :mod:`src.utils.ddl`. Like that module this is not a SQL
+parser; it handles the column and constraint forms the architect writes and
+skips anything else.
+"""
+
+import re
+from dataclasses import dataclass, field, replace
+
+from src.utils.ddl import bare_name, index_table, split_statements, statement_key
+
+_NAME = r"(?:\"[^\"]+\"|[\w.]+)"
+_COLUMN_CLAUSE = re.compile(
+    r"\b(?:NOT\s+NULL|NULL|DEFAULT|PRIMARY\s+KEY|REFERENCES|UNIQUE|CHECK|CONSTRAINT|GENERATED|COLLATE)\b",
+    re.IGNORECASE,
+)
+_REFERENCE = re.compile(rf"REFERENCES\s+(?P<table>{_NAME})\s*(?:\((?P<columns>[^)]*)\))?", re.IGNORECASE)
+_TABLE_CONSTRAINT = re.compile(
+    rf"(?:CONSTRAINT\s+{_NAME}\s+)?(?P<kind>PRIMARY\s+KEY|FOREIGN\s+KEY|UNIQUE|CHECK|EXCLUDE)\b"
+    r"\s*(?:\((?P<columns>[^)]*)\))?",
+    re.IGNORECASE,
+)
+_ALTER_TABLE = re.compile(
+    rf"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(?P<name>{_NAME})\s+(?P<actions>.*)",
+    re.IGNORECASE | re.DOTALL,
+)
+_ADD = re.compile(r"ADD\s+(?:COLUMN\s+)?(?:IF\s+NOT\s+EXISTS\s+)?", re.IGNORECASE)
+_ALTER_COLUMN = re.compile(
+    rf"ALTER\s+(?:COLUMN\s+)?(?P<name>{_NAME})\s+(?P<action>SET\s+DEFAULT|(?:SET\s+DATA\s+)?TYPE"
+    r"|SET\s+NOT\s+NULL|DROP\s+NOT\s+NULL|DROP\s+DEFAULT)\s*(?P<value>.*)",
+    re.IGNORECASE | re.DOTALL,
+)
+_USING = re.compile(r"\s+USING\b.*", re.IGNORECASE | re.DOTALL)
+_UNIQUE_INDEX = re.compile(r"CREATE\s+UNIQUE\s+INDEX\b", re.IGNORECASE)
+_INDEX_ON = re.compile(r"\bON\s+(?:ONLY\s+)?[\w.\"]+\s*(?:USING\s+\w+\s*)?\(", re.IGNORECASE)
+_COLUMN_NAME = re.compile(rf"(?P<name>{_NAME})\s*")
+_LIKE = re.compile(rf"LIKE\s+(?P<table>{_NAME})", re.IGNORECASE)
+_INHERITS = re.compile(r"^\s*INHERITS\s*\((?P<tables>[^)]*)\)", re.IGNORECASE)
+_COLUMN_LIST = re.compile(
+    rf"CREATE\s+(?:(?:GLOBAL|LOCAL)\s+)?(?:TEMP(?:ORARY)?\s+|UNLOGGED\s+)?TABLE\s+"
+    rf"(?:IF\s+NOT\s+EXISTS\s+)?{_NAME}\s*\(",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Column:
+    """One column of a table."""
+
+    name: str
+    type: str  # As written, e.g. "VARCHAR(255)" or "TIMESTAMPTZ"
+    nullable: bool = True
+    default: str | None = None
+
+
+@dataclass(frozen=True)
+class ForeignKey:
+    """A foreign key from *columns* to *ref_columns* of *table*."""
+
+    columns: tuple[str, ...]
+    table: str
+    ref_columns: tuple[str, ...] = ()  # Empty: the referenced table's primary key
+
+
+@dataclass(frozen=True)
+class Index:
+    """A ``CREATE INDEX`` on one table; expression entries are kept as written."""
+
+    name: str
+    table: str
+    columns: tuple[str, ...]
+    unique: bool = False
+
+
+@dataclass
+class Table:
+    """A table with its columns, in declaration order, and its constraints."""
+
+    name: str
+    columns_known: bool = True  # False for CREATE TABLE ... AS SELECT: any column may exist
+    copies: tuple[str, ...] = ()  # Tables whose columns LIKE / INHERITS bring in
+    columns: dict[str, Column] = field(default_factory=dict)
+    primary_key: tuple[str, ...] = ()
+    unique: list[tuple[str, ...]] = field(default_factory=list)
+    foreign_keys: list[ForeignKey] = field(default_factory=list)
+    indexes: list[Index] = field(default_factory=list)
+
+    def indexed(self, columns: tuple[str, ...]) -> bool:
+        """Whether an index, the primary key or a unique constraint starts with *columns*."""
+        keys = [self.primary_key, *self.unique, *(index.columns for index in self.indexes)]
+        return any(key[:len(columns)] == columns for key in keys)
+
+
+@dataclass
+class Catalog:
+    """The tables of a schema, by bare name."""
+
+    tables: dict[str, Table] = field(default_factory=dict)
+
+    def table(self, name: str) -> Table | None:
+        return self.tables.get(bare_name(name))
+
+    def has_column(self, table: str, column: str) -> bool:
+        found = self.table(table)
+        return found is not None and (not found.columns_known or bare_name(column) in found.columns)
+
+
+def _depths(text: str) -> list[int]:
+    """Parenthesis depth at each index of *text*; -1 inside a quoted string."""
+    depths = []
+    depth = 0
+    quote = None
+    for char in text:
+        if quote:
+            depths.append(-1)
+            if char == quote:
+                quote = None
+            continue
+        if char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        depths.append(-1 if quote else depth)
+    return depths
+
+
+def split_top_level(text: str) -> list[str]:
+    """Split *text* at the commas outside parentheses and quotes."""
+    depths = _depths(text)
+    parts = []
+    start = 0
+    for i, char in enumerate(text):
+        if char == "," and depths[i] == 0:
+            parts.append(text[start:i].strip())
+            start = i + 1
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def _parenthesized(text: str, start: int) -> str:
+    """The text inside the parentheses opening at *start*."""
+    depths = _depths(text)
+    for end in range(start + 1, len(text)):
+        if text[end] == ")" and depths[end] == depths[start] - 1:
+            return text[start + 1:end]
+    return text[start + 1:]
+
+
+def table_parts(statement: str) -> tuple[str, list[str], str] | None:
+    """Split a ``CREATE TABLE`` statement into the text before ``(``, its definitions and the rest.
+
+    None when the statement has no column list (``CREATE TABLE x AS SELECT ...``).
+    """
+    match = _COLUMN_LIST.match(statement)
+    if match is None:
+        return None
+    start = match.end() - 1
+    body = _parenthesized(statement, start)
+    return statement[:start], split_top_level(body), statement[start + len(body) + 2:]
+
+
+def column_spelling(definition: str) -> str | None:
+    """The column a table definition entry declares, as written; None for a table-level clause."""
+    if _TABLE_CONSTRAINT.match(definition) or _LIKE.match(definition):
+        return None
+    match = _COLUMN_NAME.match(definition)
+    return match.group("name").strip('"') if match else None
+
+
+def _names(columns: str | None) -> tuple[str, ...]:
+    return tuple(bare_name(name.strip()) for name in split_top_level(columns or ""))
+
+
+def _index_columns(columns: str) -> tuple[str, ...]:
+    """Index entries: a plain column (ordering dropped) as its name, expressions as written."""
+    entries = []
+    for entry in split_top_level(columns):
+        if "(" in entry:
+            entries.append(" ".join(entry.lower().split()))
+        else:
+            entries.append(bare_name(entry.split()[0]))
+    return tuple(entries)
+
+
+def _column(definition: str, table: Table) -> None:
+    """Add one column definition, with its inline constraints, to *table*."""
+    match = _COLUMN_NAME.match(definition)
+    if match is None:
+        return
+    name, rest = bare_name(match.group("name")), definition[match.end():]
+    depths = _depths(rest)
+    clauses = [match for match in _COLUMN_CLAUSE.finditer(rest) if depths[match.start()] == 0]
+    type_end = clauses[0].start() if clauses else len(rest)
+    nullable, default = True, None
+    for i, match in enumerate(clauses):
+        clause = rest[match.start():clauses[i + 1].start() if i + 1 < len(clauses) else len(rest)]
+        keyword = " ".join(match.group().upper().split())
+        if keyword == "NOT NULL":
+            nullable = False
+        elif keyword == "DEFAULT":
+            default = clause[len("DEFAULT"):].strip() or "NULL"
+        elif keyword == "PRIMARY KEY":
+            nullable = False
+            table.primary_key = (name,)
+        elif keyword == "UNIQUE":
+            table.unique.append((name,))
+        elif keyword == "REFERENCES":
+            reference = _REFERENCE.match(clause)
+            if reference:
+                table.foreign_keys.append(ForeignKey(
+                    (name,), bare_name(reference.group("table")), _names(reference.group("columns"))
+                ))
+    table.columns[name] = Column(name, " ".join(rest[:type_end].split()), nullable, default)
+
+
+def _table_constraint(definition: str, table: Table) -> bool:
+    """Record a table-level constraint; False if *definition* is not one."""
+    match = _TABLE_CONSTRAINT.match(definition)
+    if match is None:
+        return False
+    kind = " ".join(match.group("kind").upper().split())
+    columns = _names(match.group("columns"))
+    if kind == "PRIMARY KEY":
+        table.primary_key = columns
+        for name in columns:
+            if name in table.columns:
+                table.columns[name] = replace(table.columns[name], nullable=False)
+    elif kind == "UNIQUE":
+        table.unique.append(columns)
+    elif kind == "FOREIGN KEY":
+        reference = _REFERENCE.search(definition, match.end())
+        if reference:
+            table.foreign_keys.append(ForeignKey(
+                columns, bare_name(reference.group("table")), _names(reference.group("columns"))
+            ))
+    return True
+
+
+def _add_definition(definition: str, table: Table) -> None:
+    if not _table_constraint(definition, table):
+        _column(definition, table)
+
+
+def _alter_column(table: Table, match: re.Match) -> None:
+    """Apply ``ALTER COLUMN ... SET DEFAULT / TYPE / [SET|DROP] NOT NULL / DROP DEFAULT``."""
+    name = bare_name(match.group("name"))
+    column = table.columns.get(name)
+    if column is None:
+        return
+    action = " ".join(match.group("action").upper().split())
+    value = match.group("value").strip()
+    if action == "SET DEFAULT":
+        column = replace(column, default=value)
+    elif action.endswith("TYPE"):
+        column = replace(column, type=" ".join(_USING.sub("", value).split()))
+    elif action == "SET NOT NULL":
+        column = replace(column, nullable=False)
+    elif action == "DROP NOT NULL":
+        column = replace(column, nullable=True)
+    else:
+        column = replace(column, default=None)
+    table.columns[name] = column
+
+
+def _copy_columns(catalog: Catalog, table: Table, source: str) -> None:
+    """Bring in *source*'s columns (``LIKE source``, ``INHERITS (source)``)."""
+    table.copies += (source,)
+    copied = catalog.tables.get(source)
+    if copied is None or not copied.columns_known:
+        table.columns_known = False
+        return
+    for name, column in copied.columns.items():
+        table.columns.setdefault(name, column)
+
+
+def parse_catalog(sql: str) -> Catalog:
+    """Build the catalog of the tables, columns and indexes *sql* creates."""
+    catalog = Catalog()
+    for statement in split_statements(sql):
+        statement = statement.rstrip(";").strip()
+        key = statement_key(statement)
+        if key is not None and key[0] == "table":
+            table = catalog.tables.setdefault(key[1], Table(key[1]))
+            parts = table_parts(statement)
+            if parts is None:
+                table.columns_known = False
+                continue
+            _, definitions, tail = parts
+            inherits = _INHERITS.match(tail)
+            for definition in definitions:
+                like = _LIKE.match(definition)
+                if like:
+                    _copy_columns(catalog, table, bare_name(like.group("table")))
+                else:
+                    _add_definition(definition, table)
+            for parent in _names(inherits.group("tables")) if inherits else ():
+                _copy_columns(catalog, table, parent)
+        elif key is not None and key[0] == "index":
+            on = _INDEX_ON.search(statement)
+            table = catalog.tables.get(index_table(statement) or "")
+            if on and table is not None:
+                name = "" if key[1] == "on" else key[1]  # CREATE INDEX ON t (...)
+                columns = _index_columns(_parenthesized(statement, on.end() - 1))
+                unique = bool(_UNIQUE_INDEX.match(statement))
+                table.indexes.append(Index(name, table.name, columns, unique))
+        elif (alter := _ALTER_TABLE.match(statement)) is not None:
+            table = catalog.tables.get(bare_name(alter.group("name")))
+            for action in split_top_level(alter.group("actions")) if table else []:
+                add = _ADD.match(action)
+                if add:
+                    _add_definition(action[add.end():].strip(), table)
+                elif (alter_column := _ALTER_COLUMN.match(action)) is not None:
+                    _alter_column(table, alter_column)
+    return catalog
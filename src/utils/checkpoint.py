@@ -0,0 +1,382 @@
+"""Durable LangGraph checkpoints for resumable pipeline runs.
+
+LangGraph saves the graph state after every node through a checkpointer. The
+in-memory saver loses it with the process, so a crash in the TDD node (``npm
+install`` timeouts are common) used to throw away the architect schema and
+every developer iteration. :class:`SQLiteCheckpointSaver` keeps the same data
+in a SQLite file instead; streaming the graph again with the run's
+``thread_id`` and ``None`` as input continues after the last completed node.
+
+Storage mirrors :class:`langgraph.checkpoint.memory.InMemorySaver`: channel
+values are stored once per version in ``blobs``, so a checkpoint only adds the
+channels its node changed. Like the LLM cache, the file runs in WAL mode and
+every operation opens its own connection.
+"""
+
+import asyncio
+import os
+import random
+import sqlite3
+import threading
+import uuid
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+DEFAULT_CHECKPOINT_DIR = ".checkpoints"
+
+_DB_FILENAME = "checkpoints.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_id     TEXT,
+    type          TEXT NOT NULL,
+    checkpoint    BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata      BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel       TEXT NOT NULL,
+    version       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    value         BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id     TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id       TEXT NOT NULL,
+    idx           INTEGER NOT NULL,
+    channel       TEXT NOT NULL,
+    type          TEXT NOT NULL,
+    value         BLOB,
+    task_path     TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+def new_run_id() -> str:
+    """A fresh run id, used as the checkpoint ``thread_id``."""
+    return uuid.uuid4().hex[:12]
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer backed by a SQLite file.
+
+    Args:
+        directory: Directory holding the checkpoint database (created if missing).
+    """
+
+    def __init__(self, directory: str) -> None:
+        super().__init__()
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, _DB_FILENAME)
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Same as the LLM cache: a connection per operation is safe across
+        # threads, and the busy timeout serializes writers from other processes.
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    # -- reading ----------------------------------------------------------------
+
+    def _load_values(
+        self, conn: sqlite3.Connection, thread_id: str, ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        values: dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT type, value FROM blobs "
+                "WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, ns, channel, str(version)),
+            ).fetchone()
+            if row is not None and row[0] != "empty":
+                values[channel] = self.serde.loads_typed((row[0], row[1]))
+        return values
+
+    def _tuple(self, conn: sqlite3.Connection, row: tuple) -> CheckpointTuple:
+        thread_id, ns, checkpoint_id, parent_id, type_, blob, metadata_type, metadata = row
+        checkpoint: Checkpoint = self.serde.loads_typed((type_, blob))
+        writes = conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? "
+            "ORDER BY task_id, idx",
+            (thread_id, ns, checkpoint_id),
+        ).fetchall()
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint_id,
+            }},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_values(
+                    conn, thread_id, ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {
+                    "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": parent_id,
+                }}
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((wtype, value)))
+                for task_id, channel, wtype, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        """The checkpoint named by *config*, or the thread's latest one."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        query = "SELECT * FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        params: list[Any] = [thread_id, ns]
+        if checkpoint_id:
+            query += " AND checkpoint_id = ?"
+            params.append(checkpoint_id)
+        else:
+            # Checkpoint ids are time-ordered UUIDs, so the newest sorts last.
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+
+        conn = self._connect()
+        try:
+            row = conn.execute(query, params).fetchone()
+            return self._tuple(conn, row) if row is not None else None
+        finally:
+            conn.close()
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Checkpoints newest first, optionally narrowed to one thread/namespace."""
+        query = "SELECT * FROM checkpoints WHERE 1 = 1"
+        params: list[Any] = []
+        configurable = (config or {}).get("configurable") or {}
+        if "thread_id" in configurable:
+            query += " AND thread_id = ?"
+            params.append(configurable["thread_id"])
+        if "checkpoint_ns" in configurable:
+            query += " AND checkpoint_ns = ?"
+            params.append(configurable["checkpoint_ns"])
+        if configurable.get("checkpoint_id"):
+            query += " AND checkpoint_id = ?"
+            params.append(configurable["checkpoint_id"])
+        if before is not None and get_checkpoint_id(before):
+            query += " AND checkpoint_id < ?"
+            params.append(get_checkpoint_id(before))
+        query += " ORDER BY checkpoint_id DESC"
+
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+            found = 0
+            for row in rows:
+                if limit is not None and found >= limit:
+                    break
+                if filter:
+                    metadata = self.serde.loads_typed((row[6], row[7]))
+                    if any(metadata.get(k) != v for k, v in filter.items()):
+                        continue
+                found += 1
+                yield self._tuple(conn, row)
+        finally:
+            conn.close()
+
+    # -- writing ----------------------------------------------------------------
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Store *checkpoint* and the channel values that changed in it."""
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        ns = configurable.get("checkpoint_ns", "")
+        stored = checkpoint.copy()
+        values = stored.pop("channel_values")
+        blobs = [
+            (thread_id, ns, channel, str(version),
+             *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        type_, blob = self.serde.dumps_typed(stored)
+        metadata_type, metadata_blob = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (thread_id, ns, checkpoint["id"], configurable.get("checkpoint_id"),
+                     type_, blob, metadata_type, metadata_blob),
+                )
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": ns, "checkpoint_id": checkpoint["id"],
+        }}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store a task's pending writes against the current checkpoint."""
+        configurable = config["configurable"]
+        key = (configurable["thread_id"], configurable.get("checkpoint_ns", ""),
+               configurable["checkpoint_id"])
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            rows.append((
+                *key, task_id, WRITES_IDX_MAP.get(channel, idx), channel,
+                *self.serde.dumps_typed(value), task_path,
+            ))
+
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for row in rows:
+                    # Regular writes are first-wins; special ones (errors,
+                    # interrupts) have negative indices and are replaced.
+                    verb = "INSERT OR REPLACE" if row[4] < 0 else "INSERT OR IGNORE"
+                    conn.execute(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", row)
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Remove every checkpoint, value and write stored for *thread_id*."""
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for table in ("checkpoints", "blobs", "writes"):
+                    conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+                conn.execute("COMMIT")
+            finally:
+                conn.close()
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        # Same format as InMemorySaver: zero-padded so versions sort as text.
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- async ------------------------------------------------------------------
+    # SQLite calls are short; run them in a worker thread so ``astream`` never
+    # blocks the event loop.
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in tuples:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+_savers: dict[str, SQLiteCheckpointSaver] = {}
+_savers_lock = threading.Lock()
+
+
+def get_checkpointer() -> SQLiteCheckpointSaver | None:
+    """Return the process-wide checkpointer, or None when checkpointing is off.
+
+    Checkpoints go to ``CHECKPOINT_DIR`` (default ``.checkpoints``); set it to
+    an empty string to turn them off.
+    """
+    directory = os.environ.get("CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR)
+    if not directory:
+        return None
+
+    directory = os.path.abspath(directory)
+    with _savers_lock:
+        saver = _savers.get(directory)
+        if saver is None:
+            saver = SQLiteCheckpointSaver(directory)
+            _savers[directory] = saver
+    return saver
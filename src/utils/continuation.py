@@ -0,0 +1,146 @@
+"""Continuation stitching for LLM replies cut off at the output-token limit.
+
+When a reply ends with ``finish_reason == "length"`` the conversation is sent
+back with the partial reply and a request to carry on. The pieces are then
+stitched so fenced code blocks come out whole: a block the model re-opens in
+the continuation is merged back into the block that was cut off, and text the
+model repeats from the end of the previous piece is dropped.
+"""
+
+import os
+from typing import Any
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, convert_to_messages
+
+DEFAULT_MAX_CONTINUATIONS = 3
+
+# Repeated text shorter than this is only trusted when it is a whole partial line.
+_MIN_OVERLAP = 20
+_MAX_OVERLAP = 2000
+
+CONTINUE_PROMPT = (
+    "Your previous reply was cut off because it hit the output limit. Continue "
+    "exactly where it stopped. Do not repeat anything already written and do "
+    "not restart the current file. If you were inside a code block, carry on "
+    "inside it without opening a new fence."
+)
+
+
+def max_continuations() -> int:
+    """Continuation requests allowed per call (``LLM_MAX_CONTINUATIONS``; 0 disables)."""
+    return int(os.environ.get("LLM_MAX_CONTINUATIONS", DEFAULT_MAX_CONTINUATIONS))
+
+
+def is_truncated(response: Any) -> bool:
+    """True for a plain-text reply that stopped on the output-token limit."""
+    metadata = getattr(response, "response_metadata", None)
+    if not isinstance(metadata, dict) or metadata.get("finish_reason") != "length":
+        return False
+    if getattr(response, "tool_calls", None) or getattr(response, "invalid_tool_calls", None):
+        return False  # a cut-off tool call cannot be resumed as text
+    return isinstance(getattr(response, "content", None), str)
+
+
+def continuation_messages(messages: Any, partial: str) -> list[BaseMessage]:
+    """The original conversation, the partial reply and a request to continue."""
+    if isinstance(messages, str):
+        history = [HumanMessage(content=messages)]
+    elif hasattr(messages, "to_messages"):
+        history = messages.to_messages()
+    else:
+        history = convert_to_messages(messages)
+    return [*history, AIMessage(content=partial), HumanMessage(content=CONTINUE_PROMPT)]
+
+
+def _fence_lines(text: str) -> list[str]:
+    return [line.strip() for line in text.split("\n") if line.strip().startswith("```")]
+
+
+def _open_block_tag(text: str) -> str | None:
+    """The opening fence line of the block *text* ends inside, or None."""
+    fences = _fence_lines(text)
+    return fences[-1] if len(fences) % 2 == 1 else None
+
+
+def _open_block_first_line(text: str) -> str:
+    """First body line of the block *text* ends inside (usually ``// filename``)."""
+    start = text.rfind("```")
+    body = text[start:].split("\n", 2)
+    return body[1].strip() if len(body) > 1 else ""
+
+
+def _overlap(previous: str, continuation: str) -> int:
+    """Length of the longest suffix of *previous* the continuation starts with."""
+    partial_line = previous.rsplit("\n", 1)[-1]
+    limit = min(len(previous), len(continuation), _MAX_OVERLAP)
+    for size in range(limit, 0, -1):
+        if previous.endswith(continuation[:size]):
+            if size >= _MIN_OVERLAP or (partial_line.strip() and size == len(partial_line)):
+                return size
+    return 0
+
+
+def stitch(previous: str, continuation: str) -> str:
+    """Join a continuation onto the text it continues.
+
+    Args:
+        previous: Text produced so far (ends where the model was cut off).
+        continuation: The model's next piece.
+
+    Returns:
+        The combined text, with a re-opened code fence (and a repeated
+        filename comment) removed and repeated text dropped.
+    """
+    open_tag = _open_block_tag(previous)
+    stripped = continuation.lstrip("\n")
+
+    if open_tag is not None and stripped.startswith("```"):
+        # The model re-opened the block it was writing: drop the new fence,
+        # and the filename comment if it repeats the open block's.
+        _, _, rest = stripped.partition("\n")
+        first_line, _, after = rest.partition("\n")
+        if first_line.strip() and first_line.strip() == _open_block_first_line(previous):
+            rest = after
+        # A re-opened block starts on a fresh line; unless the model repeated
+        # it, the cut-off partial line is unfinished and is rewritten below.
+        head, _, partial_line = previous.rpartition("\n")
+        if partial_line and not rest.startswith(partial_line):
+            previous = head + "\n"
+        continuation = rest
+    elif open_tag is None and stripped.startswith("```") and not previous.endswith("\n"):
+        continuation = "\n" + stripped
+
+    size = _overlap(previous, continuation)
+    return previous + continuation[size:]
+
+
+def merge_responses(first: Any, content: str, last: Any, continuations: int) -> AIMessage:
+    """Build the stitched reply: *first*'s metadata, *last*'s finish reason.
+
+    Token usage is summed over every piece and the number of continuation
+    requests is recorded as ``response_metadata["continuations"]``.
+    """
+    metadata = dict(getattr(first, "response_metadata", None) or {})
+    last_metadata = getattr(last, "response_metadata", None) or {}
+    metadata["finish_reason"] = last_metadata.get("finish_reason")
+    if "endpoint" in last_metadata:
+        metadata["endpoint"] = last_metadata["endpoint"]
+    metadata["continuations"] = continuations
+    return AIMessage(
+        content=content,
+        response_metadata=metadata,
+        usage_metadata=_sum_usage(first, last),
+        id=getattr(first, "id", None),
+    )
+
+
+def _sum_usage(*responses: Any) -> dict[str, int] | None:
+    totals = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+    seen = False
+    for response in responses:
+        usage = getattr(response, "usage_metadata", None)
+        if isinstance(usage, dict):
+            seen = True
+            for key in totals:
+                totals[key] += int(usage.get(key) or 0)
+    return totals if seen else None
@@ -0,0 +1,65 @@
+"""Convergence and no-progress detection for the developer loop.
+
+After every round the join node fingerprints the developer's code and the
+round's feedback. A round that reproduces code from an earlier iteration, or
+draws the same complaints as the round before, makes no progress: the next
+round is escalated once (stronger model, "try a different approach" prompt),
+and if that stalls too the run stops with the reason in ``final_status``
+instead of spending the remaining iterations on the same answer.
+"""
+
+import hashlib
+import re
+from typing import Any
+
+STALLED_IDENTICAL_CODE = "stalled_identical_code"
+STALLED_REPEATED_FEEDBACK = "stalled_repeated_feedback"
+STALL_STATUSES = (STALLED_IDENTICAL_CODE, STALLED_REPEATED_FEEDBACK)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def code_fingerprint(server_code: str) -> str:
+    """Hash of the generated code, ignoring whitespace-only differences."""
+    return _digest(_normalize(server_code))
+
+
+def feedback_fingerprint(feedback: list[str]) -> str:
+    """Hash of the set of feedback items (order and whitespace ignored)."""
+    return _digest("\x00".join(sorted({_normalize(item) for item in feedback})))
+
+
+def fingerprint(iteration: int, server_code: str, feedback: list[str]) -> dict[str, Any]:
+    """The record the join node appends to ``fingerprints`` for one round."""
+    return {
+        "iteration": iteration,
+        "code": code_fingerprint(server_code),
+        "feedback": feedback_fingerprint(feedback) if feedback else None,
+    }
+
+
+def detect_stall(history: list[dict[str, Any]]) -> str | None:
+    """Why the latest round in *history* made no progress, or None.
+
+    Returns:
+        :data:`STALLED_IDENTICAL_CODE` when the latest code matches any
+        earlier iteration (a fixed point or a cycle),
+        :data:`STALLED_REPEATED_FEEDBACK` when the latest feedback equals the
+        previous round's, else None.
+    """
+    if len(history) < 2:
+        return None
+    latest, earlier = history[-1], history[:-1]
+    if any(entry["code"] == latest["code"] for entry in earlier):
+        return STALLED_IDENTICAL_CODE
+    if latest["feedback"] is not None and latest["feedback"] == earlier[-1]["feedback"]:
+        return STALLED_REPEATED_FEEDBACK
+    return None
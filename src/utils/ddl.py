@@ -0,0 +1,136 @@
+"""Lightweight parsing of the architect's PostgreSQL DDL.
+
+Just enough structure to split a schema by table and to merge sub-schemas:
+statements with their kind and name, each ``CREATE TABLE`` statement with the
+tables its foreign keys reference, plus the ``CREATE TYPE``/``CREATE DOMAIN``
+definitions tables may use. This is not a SQL parser — statements are found
+by matching parentheses and quotes, which is enough for the DDL the architect
+writes.
+"""
+
+import re
+
+_CREATE_TABLE = re.compile(
+    r"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>[\w.\"]+)\s*\(",
+    re.IGNORECASE,
+)
+_CREATE_TYPE = re.compile(r"CREATE\s+(?:TYPE|DOMAIN)\s+[\w.\"]+\s", re.IGNORECASE)
+_CREATE_ANY = re.compile(
+    r"CREATE\s+(?:OR\s+REPLACE\s+)?(?:UNIQUE\s+)?(?:UNLOGGED\s+)?"
+    r"(?P<kind>TABLE|TYPE|DOMAIN|INDEX|EXTENSION|SEQUENCE|VIEW|FUNCTION|TRIGGER)\s+"
+    r"(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?(?P<name>[\w.\"]+)",
+    re.IGNORECASE,
+)
+_INDEX_ON = re.compile(r"\bON\s+(?:ONLY\s+)?(?P<name>[\w.\"]+)", re.IGNORECASE)
+_REFERENCES = re.compile(r"REFERENCES\s+(?P<name>[\w.\"]+)", re.IGNORECASE)
+_LINE_COMMENT = re.compile(r"--[^\n]*")
+
+
+def bare_name(name: str) -> str:
+    """``public."Users"`` → ``users``."""
+    return name.split(".")[-1].strip('"').lower()
+
+
+def _statement_end(sql: str, start: int) -> int:
+    """Index just past the statement starting at *start* (its ``;`` or end of text)."""
+    depth = 0
+    quoted = dollar_quoted = False
+    for i in range(start, len(sql)):
+        char = sql[i]
+        if sql.startswith("$$", i):
+            dollar_quoted = not dollar_quoted  # function bodies
+        elif dollar_quoted:
+            continue
+        elif char == "'":
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == ";" and depth <= 0:
+            return i + 1
+    return len(sql)
+
+
+def split_statements(sql: str) -> list[str]:
+    """The schema's statements, in order, with comments removed."""
+    sql = _LINE_COMMENT.sub("", sql)
+    statements = []
+    position = 0
+    while position < len(sql):
+        end = _statement_end(sql, position)
+        statement = sql[position:end].strip()
+        if statement:
+            statements.append(statement)
+        position = end
+    return statements
+
+
+def statement_key(statement: str) -> tuple[str, str] | None:
+    """``("table", "users")``-style kind and bare name of a CREATE statement, else None."""
+    match = _CREATE_ANY.match(statement)
+    if match is None:
+        return None
+    return match.group("kind").lower(), bare_name(match.group("name"))
+
+
+def index_table(statement: str) -> str | None:
+    """The table a ``CREATE INDEX`` statement indexes."""
+    match = _INDEX_ON.search(statement)
+    return bare_name(match.group("name")) if match else None
+
+
+def parse_tables(sql: str) -> dict[str, str]:
+    """Map each table name (unquoted, lower-case, schema dropped) to its statement."""
+    sql = _LINE_COMMENT.sub("", sql)
+    return {
+        bare_name(match.group("name")): sql[match.start():_statement_end(sql, match.start())].strip()
+        for match in _CREATE_TABLE.finditer(sql)
+    }
+
+
+def type_definitions(sql: str) -> list[str]:
+    """The schema's ``CREATE TYPE`` and ``CREATE DOMAIN`` statements."""
+    sql = _LINE_COMMENT.sub("", sql)
+    return [
+        sql[match.start():_statement_end(sql, match.start())].strip()
+        for match in _CREATE_TYPE.finditer(sql)
+    ]
+
+
+def referenced_tables(statement: str) -> list[str]:
+    """Tables a ``CREATE TABLE`` statement's foreign keys point at, in order."""
+    names: list[str] = []
+    for match in _REFERENCES.finditer(statement):
+        name = bare_name(match.group("name"))
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def entity_name(table: str) -> str:
+    """Singular entity name for a table: ``order_items`` → ``order_item``."""
+    if table.endswith("ies") and len(table) > 3:
+        return table[:-3] + "y"
+    if table.endswith(("sses", "xes", "ches", "shes")):
+        return table[:-2]
+    if table.endswith("s") and not table.endswith(("ss", "us", "is")):
+        return table[:-1]
+    return table
+
+
+def rename_references(statement: str, renames: dict[str, str]) -> str:
+    """Point ``REFERENCES x`` and ``CREATE INDEX ... ON x`` at ``renames[x]``."""
+    def rename(match: re.Match) -> str:
+        target = renames.get(bare_name(match.group("name")))
+        if target is None:
+            return match.group(0)
+        return match.group(0)[: match.start("name") - match.start()] + target
+
+    statement = _REFERENCES.sub(rename, statement)
+    key = statement_key(statement)
+    if key is not None and key[0] == "index":
+        statement = _INDEX_ON.sub(rename, statement, count=1)
+    return statement
@@ -0,0 +1,100 @@
+"""Typed file map for the generated backend.
+
+The developer node parses its output once into ``state["files"]``: one
+:class:`FileEntry` per path with the language, a content hash and the size.
+Integration, the TDD node and the UI read that map instead of re-running
+:func:`src.utils.code_parser.parse_code_blocks` over ``server_code`` or
+re-reading the output directory, and the hashes let them skip files that did
+not change since the last iteration.
+"""
+
+import hashlib
+import os
+from typing import TypedDict
+
+from src.utils.code_parser import parse_code_blocks
+from src.utils.structured_output import GeneratedFiles
+
+_LANGUAGES = {
+    ".js": "javascript",
+    ".mjs": "javascript",
+    ".cjs": "javascript",
+    ".ts": "typescript",
+    ".json": "json",
+    ".sql": "sql",
+    ".md": "markdown",
+    ".yml": "yaml",
+    ".yaml": "yaml",
+}
+
+
+class FileEntry(TypedDict):
+    """One generated file."""
+
+    path: str
+    language: str
+    sha256: str
+    size: int
+    content: str
+
+
+FileMap = dict[str, FileEntry]
+
+
+def content_hash(content: str) -> str:
+    """SHA-256 of a file's content."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def language_for(path: str) -> str:
+    """Code fence language for *path*, from its extension."""
+    return _LANGUAGES.get(os.path.splitext(path)[1].lower(), "text")
+
+
+def file_entry(path: str, content: str, language: str | None = None) -> FileEntry:
+    """Build the entry for one file."""
+    return {
+        "path": path,
+        "language": language or language_for(path),
+        "sha256": content_hash(content),
+        "size": len(content.encode("utf-8")),
+        "content": content,
+    }
+
+
+def file_map_from_code(server_code: str) -> FileMap:
+    """Parse labeled code blocks (the developer's text output) into a file map."""
+    return {
+        path: file_entry(path, content)
+        for path, content in parse_code_blocks(server_code).items()
+    }
+
+
+def file_map_from_generated(files: GeneratedFiles) -> FileMap:
+    """Build a file map straight from a validated ``GeneratedFiles`` tool call."""
+    # Strip blank edge lines like parse_code_blocks, so both paths agree.
+    return {
+        f.path: file_entry(f.path, f.content.strip("\n"), f.language)
+        for f in files.files
+    }
+
+
+def render_file_map(file_map: FileMap) -> str:
+    """Render a file map as labeled code blocks, the format ``parse_code_blocks`` reads."""
+    return "\n\n".join(
+        f"```{entry['language']} // {path}\n{entry['content']}\n```"
+        for path, entry in file_map.items()
+    )
+
+
+def files_digest(file_map: FileMap) -> str:
+    """One hash over every path and content hash, to spot an unchanged file set."""
+    digest = hashlib.sha256()
+    for path in sorted(file_map):
+        digest.update(f"{path}\x00{file_map[path]['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def changed_files(file_map: FileMap, written: dict[str, str]) -> list[FileEntry]:
+    """Entries whose hash differs from *written* (path → sha256 last written)."""
+    return [entry for path, entry in file_map.items() if written.get(path) != entry["sha256"]]
@@ -0,0 +1,349 @@
+"""Hedged requests and multi-endpoint failover for LLM calls.
+
+A *target* is one OpenAI-compatible endpoint/model pair. Calls go to the
+primary target first; if it errors or times out, the next target is tried
+(failover). With hedging enabled, a duplicate request is also sent to the next
+target when the primary has not answered within the hedge delay — whichever
+complete answer arrives first wins and the other request is cancelled.
+
+The hedge delay is either fixed or derived from a latency percentile of the
+primary endpoint's observed latencies for that node, so hedges only fire for
+genuinely slow (tail) requests.
+
+Every request counts against the rate limits: the caller admits the first one
+through the scheduler, and each hedge or failover request is admitted through
+the *admit* callback before it is sent.
+"""
+
+import asyncio
+import bisect
+import concurrent.futures
+import json
+import math
+import os
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+DEFAULT_HEDGE_PERCENTILE = 95.0
+MIN_SAMPLES_FOR_PERCENTILE = 20
+
+# Log-spaced histogram bucket upper bounds (seconds): 50 ms … ~10 min.
+_BUCKET_BOUNDS = [0.05 * (1.25 ** i) for i in range(43)]
+
+_hedge_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=16, thread_name_prefix="llm-hedge"
+)
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """An OpenAI-compatible endpoint a call can be sent to.
+
+    Attributes:
+        name: Label used in latency stats and response metadata.
+        base_url: The endpoint's ``/v1`` base URL.
+        model: Model name served by this endpoint.
+        api_key_env: Environment variable holding the API key (None for none).
+        timeout: Per-request timeout in seconds (None for the client default).
+    """
+
+    name: str
+    base_url: str
+    model: str
+    api_key_env: str | None = None
+    timeout: float | None = None
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """When to send the hedge request.
+
+    Attributes:
+        delay: Fixed hedge delay in seconds, used until enough samples exist
+               (or always, when ``percentile`` is None).
+        percentile: Latency percentile of the primary endpoint to hedge at.
+    """
+
+    delay: float = 2.0
+    percentile: float | None = None
+
+
+class LatencyHistogram:
+    """A thread-safe, fixed-bucket latency histogram."""
+
+    def __init__(self) -> None:
+        self._counts = [0] * (len(_BUCKET_BOUNDS) + 1)
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        index = bisect.bisect_left(_BUCKET_BOUNDS, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += 1
+
+    @property
+    def count(self) -> int:
+        return self._total
+
+    def percentile(self, p: float) -> float | None:
+        """Return the bucket upper bound covering the *p*-th percentile."""
+        with self._lock:
+            if self._total == 0:
+                return None
+            rank = max(1, math.ceil(self._total * p / 100.0))
+            seen = 0
+            for index, count in enumerate(self._counts):
+                seen += count
+                if seen >= rank:
+                    if index < len(_BUCKET_BOUNDS):
+                        return _BUCKET_BOUNDS[index]
+                    return _BUCKET_BOUNDS[-1]
+        return None
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+_histograms: dict[tuple[str, str], LatencyHistogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def get_histogram(endpoint: str, node: str | None) -> LatencyHistogram:
+    """Return the latency histogram for calls from *node* to *endpoint*."""
+    key = (endpoint, node or "")
+    with _histograms_lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = LatencyHistogram()
+        return histogram
+
+
+def latency_stats() -> dict[str, dict[str, Any]]:
+    """Return p50/p95/p99 latency per ``endpoint/node``."""
+    with _histograms_lock:
+        items = list(_histograms.items())
+    return {
+        f"{endpoint}/{node}" if node else endpoint: histogram.snapshot()
+        for (endpoint, node), histogram in items
+    }
+
+
+def reset_latency_stats() -> None:
+    with _histograms_lock:
+        _histograms.clear()
+
+
+def hedge_delay(policy: HedgePolicy, endpoint: str, node: str | None) -> float:
+    """Resolve the hedge delay for a call, preferring the observed percentile."""
+    if policy.percentile is not None:
+        histogram = get_histogram(endpoint, node)
+        if histogram.count >= MIN_SAMPLES_FOR_PERCENTILE:
+            observed = histogram.percentile(policy.percentile)
+            if observed is not None:
+                return observed
+    return policy.delay
+
+
+def stamp_endpoint(response: Any, endpoint: str, hedged: bool = False) -> Any:
+    """Record which endpoint served *response* (and whether it was a hedge) in its metadata."""
+    metadata = getattr(response, "response_metadata", None)
+    if isinstance(metadata, dict):
+        metadata["endpoint"] = endpoint
+        metadata["hedged"] = hedged
+    return response
+
+
+def _timed_call(name: str, runnable: Any, node: str | None, args: tuple, kwargs: dict) -> Any:
+    started = time.monotonic()
+    response = runnable.invoke(*args, **kwargs)
+    get_histogram(name, node).record(time.monotonic() - started)
+    return response
+
+
+async def _atimed_call(name: str, runnable: Any, node: str | None, args: tuple, kwargs: dict) -> Any:
+    started = time.monotonic()
+    response = await runnable.ainvoke(*args, **kwargs)
+    get_histogram(name, node).record(time.monotonic() - started)
+    return response
+
+
+def invoke_with_failover(
+    targets: list[tuple[str, Any]],
+    args: tuple,
+    kwargs: dict,
+    node: str | None = None,
+    policy: HedgePolicy | None = None,
+    admit: Callable[[], Any] | None = None,
+) -> Any:
+    """Invoke the first target, hedging and failing over to later ones.
+
+    Args:
+        targets: Ordered ``(endpoint_name, runnable)`` pairs, primary first.
+        args: Positional arguments for ``runnable.invoke``.
+        kwargs: Keyword arguments for ``runnable.invoke``.
+        node: Pipeline node issuing the call (selects the latency histogram).
+        policy: Hedge policy, or None to only fail over on errors.
+        admit: Blocks until the scheduler admits one more request; called
+               before every hedge and failover request (the caller has
+               admitted the first).
+
+    Returns:
+        The first successful response.
+
+    Raises:
+        The last error if every target fails.
+
+    Note:
+        A thread running a losing request cannot be interrupted; its result is
+        discarded. Use :func:`ainvoke_with_failover` for true cancellation.
+    """
+    pending: dict[concurrent.futures.Future, str] = {}
+    remaining = list(targets)
+    last_error: BaseException | None = None
+
+    def launch(admitted: bool = False) -> None:
+        if not admitted and admit is not None:
+            admit()
+        name, runnable = remaining.pop(0)
+        future = _hedge_pool.submit(_timed_call, name, runnable, node, args, kwargs)
+        pending[future] = name
+
+    launch(admitted=True)
+    hedged = False
+    while pending:
+        timeout = None
+        if policy is not None and remaining and not hedged:
+            timeout = hedge_delay(policy, next(iter(pending.values())), node)
+        done, _ = concurrent.futures.wait(
+            pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        if not done:
+            # Primary is slow: hedge to the next target.
+            hedged = True
+            launch()
+            continue
+        for future in done:
+            name = pending.pop(future)
+            error = future.exception()
+            if error is None:
+                for loser in pending:
+                    loser.cancel()
+                return stamp_endpoint(future.result(), name, hedged)
+            last_error = error
+        if not pending and remaining:
+            launch()  # failover
+    assert last_error is not None
+    raise last_error
+
+
+async def ainvoke_with_failover(
+    targets: list[tuple[str, Any]],
+    args: tuple,
+    kwargs: dict,
+    node: str | None = None,
+    policy: HedgePolicy | None = None,
+    admit: Callable[[], Awaitable[Any]] | None = None,
+) -> Any:
+    """Async variant of :func:`invoke_with_failover`; losing requests are cancelled.
+
+    A hedge still waiting for admission when the primary answers is cancelled
+    before it takes any quota.
+    """
+    pending: dict[asyncio.Task, str] = {}
+    remaining = list(targets)
+    last_error: BaseException | None = None
+
+    async def attempt(name: str, runnable: Any, admitted: bool) -> Any:
+        if not admitted and admit is not None:
+            await admit()
+        return await _atimed_call(name, runnable, node, args, kwargs)
+
+    def launch(admitted: bool = False) -> None:
+        name, runnable = remaining.pop(0)
+        task = asyncio.ensure_future(attempt(name, runnable, admitted))
+        pending[task] = name
+
+    launch(admitted=True)
+    hedged = False
+    try:
+        while pending:
+            timeout = None
+            if policy is not None and remaining and not hedged:
+                timeout = hedge_delay(policy, next(iter(pending.values())), node)
+            done, _ = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                hedged = True
+                launch()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                error = task.exception()
+                if error is None:
+                    return stamp_endpoint(task.result(), name, hedged)
+                last_error = error
+            if not pending and remaining:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+    assert last_error is not None
+    raise last_error
+
+
+def fallback_endpoints(entries: Sequence[Mapping[str, Any]] | None = None) -> list[Endpoint]:
+    """Parse fallback endpoint objects; None reads ``LLM_FALLBACK_ENDPOINTS`` (a JSON list)."""
+    if entries is None:
+        raw = os.environ.get("LLM_FALLBACK_ENDPOINTS", "").strip()
+        if not raw:
+            return []
+        entries = json.loads(raw)
+    return [
+        Endpoint(
+            name=entry.get("name") or f"fallback-{i}",
+            base_url=entry["base_url"],
+            model=entry["model"],
+            api_key_env=entry.get("api_key_env"),
+            timeout=entry.get("timeout"),
+        )
+        for i, entry in enumerate(entries, 1)
+    ]
+
+
+def hedge_policy_for(
+    node: str | None,
+    delay: float | None = None,
+    percentile: float | None = None,
+    nodes: Sequence[str] | None = None,
+) -> HedgePolicy | None:
+    """Return the hedge policy for *node*, or None when it should not hedge.
+
+    Hedging is enabled by a *delay* (seconds) and/or a latency *percentile*;
+    *nodes* (default ``developer``) selects which nodes hedge. Each one left
+    None comes from ``LLM_HEDGE_DELAY``, ``LLM_HEDGE_PERCENTILE`` and
+    ``LLM_HEDGE_NODES`` (comma-separated) respectively.
+    """
+    if delay is None and os.environ.get("LLM_HEDGE_DELAY"):
+        delay = float(os.environ["LLM_HEDGE_DELAY"])
+    if percentile is None and os.environ.get("LLM_HEDGE_PERCENTILE"):
+        percentile = float(os.environ["LLM_HEDGE_PERCENTILE"])
+    if delay is None and percentile is None:
+        return None
+    if nodes is None:
+        nodes = os.environ.get("LLM_HEDGE_NODES", "developer").split(",")
+    if node not in {n.strip() for n in nodes if n.strip()}:
+        return None
+    return HedgePolicy(
+        delay=delay if delay is not None else HedgePolicy.delay,
+        percentile=percentile,
+    )
@@ -1,54 +1,658 @@
-"""LLM client configuration."""
+"""LLM client configuration.
 
+``ChatOpenAI`` instances are shared process-wide: :func:`get_llm` returns the
+same client for the same (base_url, model, temperature, tools) and every client
+for a given base URL rides on one keep-alive ``httpx`` connection pool, so node
+invocations do not pay for object construction or TLS handshakes.
+
+What callers get back is a :class:`ManagedLLM`, which admits every request
+through the process-wide :mod:`src.utils.scheduler` so concurrent pipelines
+stay inside the provider's RPM/TPM quotas and ride out 429s, and which
+continues replies truncated at the output-token limit
+(:mod:`src.utils.continuation`).
+"""
+
+import asyncio
+import atexit
 import os
+import threading
+import time
+import weakref
+from dataclasses import replace
 from typing import Any
 
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.config import merge_configs
 from langchain_openai import ChatOpenAI
 
-_GROQ_BASE_URL = "https://api.groq.com/openai/v1"
-_DEFAULT_MODEL = "llama-3.3-70b-versatile"
+from src.config import PipelineConfig
+from src.utils.continuation import (
+    continuation_messages,
+    is_truncated,
+    max_continuations,
+    merge_responses,
+    stitch,
+)
+from src.utils.hedging import (
+    HedgePolicy,
+    ainvoke_with_failover,
+    fallback_endpoints,
+    hedge_policy_for,
+    invoke_with_failover,
+    stamp_endpoint,
+)
+from src.utils.llm_cache import get_response_cache
+from src.utils.routing import Route, resolve_route
+from src.utils.scheduler import DEFAULT_PRIORITY, RequestScheduler, estimate_tokens, get_scheduler
+
+_DEFAULT_MAX_CONNECTIONS = 20
+_DEFAULT_MAX_KEEPALIVE = 10
+_DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+_registry_lock = threading.Lock()
+_clients: dict[tuple, Any] = {}
+_http_clients: dict[str, tuple[httpx.Client, httpx.AsyncClient]] = {}
+_stats = {
+    "clients_created": 0,
+    "client_reuses": 0,
+    "requests": 0,
+    "connections_opened": 0,
+}
+
+
+def _pool_limits() -> httpx.Limits:
+    """Connection pool limits, overridable via ``LLM_POOL_*`` env vars."""
+    return httpx.Limits(
+        max_connections=int(
+            os.environ.get("LLM_POOL_MAX_CONNECTIONS", _DEFAULT_MAX_CONNECTIONS)
+        ),
+        max_keepalive_connections=int(
+            os.environ.get("LLM_POOL_MAX_KEEPALIVE", _DEFAULT_MAX_KEEPALIVE)
+        ),
+        keepalive_expiry=float(
+            os.environ.get("LLM_POOL_KEEPALIVE_EXPIRY", _DEFAULT_KEEPALIVE_EXPIRY)
+        ),
+    )
+
+
+def _bump(counter: str) -> None:
+    with _registry_lock:
+        _stats[counter] += 1
+
+
+def _trace(event_name: str, info: dict) -> None:
+    # httpcore only emits connect_tcp when it has to open a new connection,
+    # so every request without this event reused a pooled one.
+    if event_name == "connection.connect_tcp.complete":
+        _bump("connections_opened")
+
+
+async def _atrace(event_name: str, info: dict) -> None:
+    _trace(event_name, info)
+
+
+def _on_request(request: httpx.Request) -> None:
+    _bump("requests")
+    request.extensions["trace"] = _trace
+
+
+async def _aon_request(request: httpx.Request) -> None:
+    _bump("requests")
+    request.extensions["trace"] = _atrace
+
+
+_SSE_DONE = b"data: [DONE]"
+
+
+class _DrainingStream(httpx.SyncByteStream):
+    """Finishes reading an SSE body that already sent ``[DONE]`` before closing.
+
+    The OpenAI SDK closes a streamed response as soon as it sees ``[DONE]``,
+    before the body's end has been read; httpcore then drops the connection
+    instead of returning it to the pool. Only the (empty) end of the body is
+    left at that point, so reading it here keeps the connection alive.
+    """
+
+    def __init__(self, stream: httpx.SyncByteStream) -> None:
+        self._stream = stream
+        self._chunks = iter(stream)
+        self._tail = b""
+
+    def __iter__(self):
+        while True:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                return
+            self._tail = (self._tail + chunk)[-64:]
+            yield chunk
+
+    def close(self) -> None:
+        if _SSE_DONE in self._tail:
+            for _ in self._chunks:
+                pass
+        self._stream.close()
+
+
+class _AsyncDrainingStream(httpx.AsyncByteStream):
+    """Async variant of :class:`_DrainingStream`."""
+
+    def __init__(self, stream: httpx.AsyncByteStream) -> None:
+        self._stream = stream
+        self._chunks = stream.__aiter__()
+        self._tail = b""
+
+    async def __aiter__(self):
+        while True:
+            try:
+                chunk = await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return
+            self._tail = (self._tail + chunk)[-64:]
+            yield chunk
+
+    async def aclose(self) -> None:
+        if _SSE_DONE in self._tail:
+            async for _ in self._chunks:
+                pass
+        await self._stream.aclose()
+
+
+class _KeepAliveTransport(httpx.BaseTransport):
+    """A pooled transport whose streamed responses drain on close (see above)."""
+
+    def __init__(self, limits: httpx.Limits) -> None:
+        self._transport = httpx.HTTPTransport(limits=limits)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        response = self._transport.handle_request(request)
+        response.stream = _DrainingStream(response.stream)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class _PerLoopAsyncTransport(httpx.AsyncBaseTransport):
+    """Keeps one async connection pool per event loop.
+
+    Pooled asyncio connections are bound to the loop that opened them, and
+    callers such as the Streamlit app start a fresh loop per run, so a single
+    shared pool would hand out connections from a closed loop.
+    """
+
+    def __init__(self, limits: httpx.Limits) -> None:
+        self._limits = limits
+        self._transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = self._transports[loop] = httpx.AsyncHTTPTransport(limits=self._limits)
+        response = await transport.handle_async_request(request)
+        response.stream = _AsyncDrainingStream(response.stream)
+        return response
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _get_http_clients(base_url: str) -> tuple[httpx.Client, httpx.AsyncClient]:
+    """Return the shared sync/async HTTP clients for *base_url*. Caller holds the lock."""
+    pair = _http_clients.get(base_url)
+    if pair is None:
+        limits = _pool_limits()
+        pair = (
+            httpx.Client(
+                transport=_KeepAliveTransport(limits),
+                event_hooks={"request": [_on_request]},
+            ),
+            httpx.AsyncClient(
+                transport=_PerLoopAsyncTransport(limits),
+                event_hooks={"request": [_aon_request]},
+            ),
+        )
+        _http_clients[base_url] = pair
+    return pair
+
+
+def get_pool_stats() -> dict[str, Any]:
+    """Return the pool limits and client/connection reuse counters.
+
+    ``connections_reused`` is the number of HTTP requests that were served on
+    an already-open keep-alive connection.
+    """
+    limits = _pool_limits()
+    with _registry_lock:
+        stats = dict(_stats)
+        stats["clients"] = len(_clients)
+        stats["pools"] = len(_http_clients)
+    stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+    stats["limits"] = {
+        "max_connections": limits.max_connections,
+        "max_keepalive_connections": limits.max_keepalive_connections,
+        "keepalive_expiry": limits.keepalive_expiry,
+    }
+    return stats
+
+
+def shutdown_llm_clients() -> None:
+    """Close every pooled HTTP connection and forget all registered clients.
+
+    Registered with :mod:`atexit`; safe to call more than once.
+    """
+    with _registry_lock:
+        pairs = list(_http_clients.values())
+        _http_clients.clear()
+        _clients.clear()
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    for sync_client, async_client in pairs:
+        sync_client.close()
+        if loop is not None:
+            # Called from async code: close this loop's pool once it is free.
+            loop.create_task(async_client.aclose())
+        # Pools of loops that already finished are released with the loop.
+
+
+atexit.register(shutdown_llm_clients)
+
+
+def _total_tokens(response: Any) -> int | None:
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        return usage.get("total_tokens")
+    return None
+
+
+def call_record(node: str, response: Any, iteration: int | None = None) -> dict[str, Any]:
+    """Describe one LLM call for the run summary and metrics export.
+
+    The record holds the node and iteration, serving model and endpoint,
+    prompt/completion tokens, time to first token and total latency (seconds,
+    see :meth:`ManagedLLM.invoke`), whether the reply came from the response
+    cache, and how many continuation requests a truncated reply needed.
+
+    Args:
+        node: Node that made the call, e.g. ``"reviewer"``.
+        response: The message returned by ``invoke`` / ``ainvoke``.
+        iteration: Developer iteration the call belongs to, if any.
+    """
+    metadata = getattr(response, "response_metadata", None)
+    if not isinstance(metadata, dict):
+        metadata = {}
+    usage = getattr(response, "usage_metadata", None)
+    if not isinstance(usage, dict):
+        usage = {}
+    return {
+        "node": node,
+        "iteration": iteration,
+        "model": metadata.get("model_name") or metadata.get("model"),
+        "endpoint": metadata.get("endpoint"),
+        "prompt_tokens": usage.get("input_tokens", 0),
+        "completion_tokens": usage.get("output_tokens", 0),
+        "ttft_s": metadata.get("ttft_s"),
+        "latency_s": metadata.get("latency_s"),
+        "cache_hit": bool(metadata.get("cache_hit")),
+        "continuations": metadata.get("continuations", 0),
+    }
+
+
+def summarize_calls(calls: list[dict[str, Any]]) -> list[tuple[str, str, str, int]]:
+    """Group call records into ``(node, model, endpoint, count)`` rows, in first-seen order."""
+    counts: dict[tuple[str, str, str], int] = {}
+    for call in calls:
+        key = (call.get("node") or "?", call.get("model") or "?", call.get("endpoint") or "?")
+        counts[key] = counts.get(key, 0) + 1
+    return [(*key, count) for key, count in counts.items()]
+
+
+def continuation_counts(calls: list[dict[str, Any]]) -> dict[str, int]:
+    """Total continuation requests per node (nodes that needed none are omitted)."""
+    totals: dict[str, int] = {}
+    for call in calls:
+        if call.get("continuations"):
+            node = call.get("node") or "?"
+            totals[node] = totals.get(node, 0) + call["continuations"]
+    return totals
+
+
+class _FirstTokenTimer(BaseCallbackHandler):
+    """Notes when the first streamed chunk of a reply arrives."""
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self.first: float | None = None
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.first is None:
+            self.first = time.monotonic()
+
+
+def _stamp_timing(response: Any, started: float, timer: _FirstTokenTimer) -> Any:
+    metadata = getattr(response, "response_metadata", None)
+    if isinstance(metadata, dict):
+        metadata["latency_s"] = round(time.monotonic() - started, 3)
+        metadata["ttft_s"] = (
+            round(timer.first - started, 3) if timer.first is not None else None
+        )
+    return response
+
+
+class ManagedLLM:
+    """A chat model whose invocations go through the request scheduler.
+
+    A ManagedLLM wraps one or more *targets* — ``(endpoint_name, runnable)``
+    pairs, primary first. With a single target calls go straight to it; with
+    fallbacks configured, calls fail over (and optionally hedge) across them
+    via :mod:`src.utils.hedging`.
+
+    Everything other than ``invoke`` / ``ainvoke`` is delegated to the primary
+    runnable, so it can be used wherever a ``ChatOpenAI`` was used before.
+
+    Args:
+        targets: Ordered ``(endpoint_name, runnable)`` pairs.
+        priority: Scheduler priority; see :func:`src.utils.scheduler.request_priority`.
+        max_tokens: Completion budget used for the pre-flight token estimate.
+        node: Pipeline node issuing the calls (keys latency histograms).
+        hedge_policy: When to hedge to the next target, or None to never hedge.
+        scheduler: Admits the calls; None uses the environment's
+                   :func:`~src.utils.scheduler.get_scheduler`.
+    """
+
+    def __init__(
+        self,
+        targets: list[tuple[str, Any]],
+        priority: int = DEFAULT_PRIORITY,
+        max_tokens: int | None = None,
+        node: str | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        scheduler: RequestScheduler | None = None,
+    ) -> None:
+        self.targets = targets
+        self.priority = priority
+        self.max_tokens = max_tokens
+        self.node = node
+        self.hedge_policy = hedge_policy
+        self.scheduler = scheduler
+
+    def _scheduler(self) -> RequestScheduler:
+        return self.scheduler or get_scheduler()
+
+    @property
+    def runnable(self) -> Any:
+        """The primary target's runnable."""
+        return self.targets[0][1]
+
+    def _send(self, args: tuple, kwargs: dict, cost: int) -> Any:
+        if len(self.targets) == 1:
+            return stamp_endpoint(self.runnable.invoke(*args, **kwargs), self.targets[0][0])
+        # Hedges and failovers are requests too: each one is admitted on its own.
+        return invoke_with_failover(
+            self.targets, args, kwargs, self.node, self.hedge_policy,
+            admit=lambda: self._scheduler().acquire(cost, self.priority),
+        )
+
+    async def _asend(self, args: tuple, kwargs: dict, cost: int) -> Any:
+        if len(self.targets) == 1:
+            response = await self.runnable.ainvoke(*args, **kwargs)
+            return stamp_endpoint(response, self.targets[0][0])
+        return await ainvoke_with_failover(
+            self.targets, args, kwargs, self.node, self.hedge_policy,
+            admit=lambda: self._scheduler().aacquire(cost, self.priority),
+        )
+
+    def _call(self, messages: Any, config: Any, kwargs: dict) -> Any:
+        cost = estimate_tokens(messages, self.max_tokens)
+        return self._scheduler().call(
+            lambda: self._send((messages, config), kwargs, cost),
+            cost,
+            self.priority,
+            usage=_total_tokens,
+        )
+
+    async def _acall(self, messages: Any, config: Any, kwargs: dict) -> Any:
+        cost = estimate_tokens(messages, self.max_tokens)
+        return await self._scheduler().acall(
+            lambda: self._asend((messages, config), kwargs, cost),
+            cost,
+            self.priority,
+            usage=_total_tokens,
+        )
+
+    def invoke(self, messages: Any, config: Any = None, **kwargs: Any) -> Any:
+        """Invoke the model once the scheduler admits the request.
+
+        A reply cut off at the output-token limit is continued (up to
+        ``LLM_MAX_CONTINUATIONS`` times) and stitched back together.
+
+        The reply's ``response_metadata`` gains ``latency_s`` and ``ttft_s``
+        (first streamed chunk; None when the route does not stream or the
+        reply was cached), both measured from this call, so they include
+        any wait for rate-limit capacity.
+        """
+        started, timer = time.monotonic(), _FirstTokenTimer()
+        config = merge_configs(config, {"callbacks": [timer]})
+        response = self._call(messages, config, kwargs)
+        for count in range(1, max_continuations() + 1):
+            if not is_truncated(response):
+                break
+            piece = self._call(continuation_messages(messages, response.content), config, kwargs)
+            response = merge_responses(
+                response, stitch(response.content, piece.content), piece, count
+            )
+        return _stamp_timing(response, started, timer)
+
+    async def ainvoke(self, messages: Any, config: Any = None, **kwargs: Any) -> Any:
+        """Async variant of :meth:`invoke`."""
+        started, timer = time.monotonic(), _FirstTokenTimer()
+        config = merge_configs(config, {"callbacks": [timer]})
+        response = await self._acall(messages, config, kwargs)
+        for count in range(1, max_continuations() + 1):
+            if not is_truncated(response):
+                break
+            piece = await self._acall(
+                continuation_messages(messages, response.content), config, kwargs
+            )
+            response = merge_responses(
+                response, stitch(response.content, piece.content), piece, count
+            )
+        return _stamp_timing(response, started, timer)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "targets":
+            raise AttributeError(name)
+        return getattr(self.runnable, name)
+
+
+def _get_chat_model(route: Route, use_cache: bool, pipeline: PipelineConfig) -> ChatOpenAI:
+    """Return the shared ChatOpenAI serving *route*, building it on first use."""
+    # Keyless local servers set api_key_env = "" in their route.
+    api_key = pipeline.api_key(route.api_key_env) if route.api_key_env else "not-needed"
+    cache = get_response_cache() if use_cache else None
+    key = (
+        route.base_url,
+        route.model,
+        route.temperature,
+        route.max_tokens,
+        (),
+        api_key,
+        route.timeout,
+        route.stream,
+        cache.path if cache is not None else None,
+    )
+
+    with _registry_lock:
+        llm = _clients.get(key)
+        if llm is not None:
+            _stats["client_reuses"] += 1
+            return llm
+
+        http_client, http_async_client = _get_http_clients(route.base_url)
+        extra: dict[str, Any] = {}
+        if cache is not None:
+            extra["cache"] = cache
+        if route.timeout is not None:
+            extra["timeout"] = route.timeout
+        if route.max_tokens is not None:
+            extra["max_tokens"] = route.max_tokens
+        llm = ChatOpenAI(
+            model=route.model,
+            temperature=route.temperature,
+            api_key=api_key,
+            base_url=route.base_url,
+            http_client=http_client,
+            http_async_client=http_async_client,
+            # Retries are owned by the scheduler so they re-enter the queue.
+            max_retries=0,
+            # Streaming exposes time-to-first-token; usage arrives in the last chunk.
+            streaming=route.stream,
+            stream_usage=route.stream,
+            **extra,
+        )
+        _clients[key] = llm
+        _stats["clients_created"] += 1
+        return llm
+
+
+def _get_targets(
+    route: Route, use_cache: bool, pipeline: PipelineConfig
+) -> list[tuple[str, ChatOpenAI]]:
+    """The routed model followed by the run's fallback endpoints (or ``LLM_FALLBACK_ENDPOINTS``)."""
+    targets = [(route.endpoint, _get_chat_model(route, use_cache, pipeline))]
+    for endpoint in fallback_endpoints(pipeline.fallback_endpoints):
+        fallback = replace(
+            route,
+            endpoint=endpoint.name,
+            base_url=endpoint.base_url,
+            model=endpoint.model,
+            timeout=endpoint.timeout,
+            api_key_env=endpoint.api_key_env or "",
+        )
+        targets.append((endpoint.name, _get_chat_model(fallback, use_cache, pipeline)))
+    return targets
 
 
 def get_llm(
-    temperature: float = 0.2,
+    temperature: float | None = None,
     model: str | None = None,
-) -> ChatOpenAI:
-    """Returns a configured ChatOpenAI instance pointed at Groq's API.
+    use_cache: bool = True,
+    priority: int = DEFAULT_PRIORITY,
+    node: str | None = None,
+    schema: type | None = None,
+    pipeline: PipelineConfig | None = None,
+) -> ManagedLLM:
+    """Returns a configured chat model for *node*.
+
+    The endpoint, model, temperature, max_tokens and timeout come from the
+    node's route (see :mod:`src.utils.routing`), which defaults to Groq. The
+    underlying ChatOpenAI is shared: repeated calls with the same settings
+    reuse the same client and its pooled keep-alive connections.
 
     Args:
-        temperature: Controls randomness. Lower = more deterministic.
-        model: The Groq model to use. Defaults to the LLM_MODEL env var or
+        temperature: Overrides the routed temperature. Lower = more deterministic.
+        model: Overrides the routed model. Defaults to the LLM_MODEL env var or
                ``llama-3.3-70b-versatile``.
+        use_cache: Consult the on-disk response cache (enabled via
+                   ``LLM_CACHE_DIR``). Pass False to always hit the API.
+        priority: Scheduler priority for this caller's requests.
+        node: Name of the calling node, e.g. ``"developer"``; selects the
+              route, hedge policy and latency histogram.
+        schema: A pydantic model the reply must fill in. It is bound as a
+                forced tool call unless the route sets
+                ``structured_output = false``; read it back with
+                :func:`src.utils.structured_output.parse_tool_output`.
+        pipeline: The run's config; supplies API keys, the default model,
+                  routing, fallback endpoints, hedging and rate limits. Falls
+                  back to the environment when omitted.
 
     Returns:
-        A ChatOpenAI instance ready for invocation.
+        A ManagedLLM ready for invocation.
     """
-    resolved_model = model or os.environ.get("LLM_MODEL", _DEFAULT_MODEL)
-    return ChatOpenAI(
-        model=resolved_model,
-        temperature=temperature,
-        api_key=os.environ.get("GROQ_API_KEY"),
-        base_url=_GROQ_BASE_URL,
+    pipeline = pipeline or PipelineConfig()
+    route = resolve_route(node, pipeline.routing, pipeline.model)
+    if temperature is not None:
+        route = replace(route, temperature=temperature)
+    if model:
+        route = replace(route, model=model)
+
+    targets = _get_targets(route, use_cache, pipeline)
+    if schema is not None and route.structured_output:
+        targets = [
+            (name, _bind_tools(chat_model, [schema], tool_choice=schema.__name__))
+            for name, chat_model in targets
+        ]
+    return ManagedLLM(
+        targets,
+        priority=priority,
+        max_tokens=route.max_tokens,
+        node=node,
+        hedge_policy=hedge_policy_for(
+            node, pipeline.hedge_delay, pipeline.hedge_percentile, pipeline.hedge_nodes
+        ),
+        scheduler=get_scheduler(pipeline.rpm_limit, pipeline.tpm_limit),
     )
 
 
+def _bind_tools(chat_model: ChatOpenAI, tools: list[Any], tool_choice: str | None = None) -> Any:
+    names = tuple(getattr(t, "name", None) or getattr(t, "__name__", repr(t)) for t in tools)
+    key = ("tools", id(chat_model), names, tool_choice)
+    with _registry_lock:
+        bound = _clients.get(key)
+        if bound is not None:
+            _stats["client_reuses"] += 1
+            return bound
+    bound = chat_model.bind_tools(tools, tool_choice=tool_choice)
+    with _registry_lock:
+        return _clients.setdefault(key, bound)
+
+
 def get_llm_with_tools(
     tools: list[Any],
-    temperature: float = 0.2,
+    temperature: float | None = None,
     model: str | None = None,
-) -> ChatOpenAI:
-    """Returns a ChatOpenAI instance (via Groq) with tools bound if any are provided.
+    use_cache: bool = True,
+    priority: int = DEFAULT_PRIORITY,
+    node: str | None = None,
+    pipeline: PipelineConfig | None = None,
+) -> ManagedLLM:
+    """Returns a routed chat model with tools bound if any are provided.
+
+    Bound tool schemas are part of the cache key, so tool-calling turns are
+    cached separately from plain completions. The bound runnable is registered
+    alongside plain clients, keyed by the tool names. Tools are bound to every
+    fallback endpoint as well.
 
     Args:
         tools: List of LangChain tool objects to bind to the LLM.
-        temperature: Controls randomness. Lower = more deterministic.
-        model: The Groq model to use. Defaults to the LLM_MODEL env var or
-               ``llama-3.3-70b-versatile``.
+        temperature: Overrides the routed temperature.
+        model: Overrides the routed model.
+        use_cache: Consult the on-disk response cache (enabled via
+                   ``LLM_CACHE_DIR``).
+        priority: Scheduler priority for this caller's requests.
+        node: Name of the calling node (see :func:`get_llm`).
+        pipeline: The run's config (see :func:`get_llm`).
 
     Returns:
-        A ChatOpenAI instance with tools bound (or plain if tools is empty).
+        A ManagedLLM with tools bound (or plain if tools is empty).
     """
-    llm = get_llm(temperature=temperature, model=model)
+    llm = get_llm(
+        temperature=temperature,
+        model=model,
+        use_cache=use_cache,
+        priority=priority,
+        node=node,
+        pipeline=pipeline,
+    )
     if tools:
-        return llm.bind_tools(tools)
+        llm.targets = [(name, _bind_tools(chat_model, tools)) for name, chat_model in llm.targets]
     return llm
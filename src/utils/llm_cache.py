@@ -0,0 +1,258 @@
+"""Persistent, content-addressed cache for LLM responses.
+
+The cache plugs into LangChain's ``BaseCache`` extension point, so every
+``ChatOpenAI`` built by :func:`src.utils.llm.get_llm` can consult it before
+hitting the network. Entries are keyed by a SHA-256 of the serialized model
+parameters (model, temperature, bound tool schemas, …) and the normalized
+message list, which LangChain already hands us as ``llm_string`` / ``prompt``.
+
+Storage is a single SQLite file in WAL mode, which makes it safe to share
+between threads and between several processes (e.g. parallel CI jobs).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+# Bump when the stored payload format changes so stale entries are ignored.
+CACHE_FORMAT_VERSION = "1"
+
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_DB_FILENAME = "llm_cache.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key         TEXT PRIMARY KEY,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    created_at  REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name  TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """Return the content address for a (prompt, llm_string) pair."""
+    digest = hashlib.sha256()
+    digest.update(CACHE_FORMAT_VERSION.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(llm_string.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(prompt.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """Size-capped LRU response cache backed by SQLite.
+
+    Args:
+        directory: Directory holding the cache database (created if missing).
+        max_entries: Maximum number of cached responses before LRU eviction.
+        max_bytes: Maximum total payload size before LRU eviction.
+        bypass: When True, lookups always miss but fresh responses are still
+                stored — useful to refresh the cache without disabling it.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        bypass: bool = False,
+    ) -> None:
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, _DB_FILENAME)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bypass = bypass
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A fresh connection per operation keeps us safe across threads and
+        # forks; the busy timeout serializes writers from other processes.
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        return conn
+
+    def _count(self, conn: sqlite3.Connection, name: str) -> None:
+        conn.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        """Return cached generations for the request, or None on a miss."""
+        if self.bypass:
+            with self._lock:
+                self._misses += 1
+            return None
+
+        key = cache_key(prompt, llm_string)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+            self._count(conn, "hits" if row is not None else "misses")
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        with self._lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        if row is None:
+            return None
+
+        with warnings.catch_warnings():
+            # ``loads`` is flagged beta in recent langchain-core; the payload
+            # is our own serialized generations, so the warning is just noise.
+            warnings.simplefilter("ignore")
+            generations = loads(row[0])
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                message.response_metadata["cache_hit"] = True
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        """Store generations for the request and evict least-recently-used entries."""
+        key = cache_key(prompt, llm_string)
+        value = dumps(list(return_val))
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, value, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict(conn)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least-recently-used rows until both caps are satisfied."""
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        rows = conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall()
+        doomed: list[str] = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append(key)
+            count -= 1
+            total -= size
+        conn.executemany("DELETE FROM responses WHERE key = ?", [(k,) for k in doomed])
+        for _ in doomed:
+            self._count(conn, "evictions")
+
+    def clear(self, **kwargs: Any) -> None:
+        """Remove every cached response (counters are kept)."""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM responses")
+        finally:
+            conn.close()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters for this process and for the cache's lifetime."""
+        conn = self._connect()
+        try:
+            count, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            lifetime = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        finally:
+            conn.close()
+        with self._lock:
+            hits, misses = self._hits, self._misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "entries": count,
+            "size_bytes": total,
+            "lifetime_hits": lifetime.get("hits", 0),
+            "lifetime_misses": lifetime.get("misses", 0),
+            "lifetime_evictions": lifetime.get("evictions", 0),
+        }
+
+
+_caches: dict[str, SQLiteLLMCache] = {}
+_caches_lock = threading.Lock()
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_response_cache() -> SQLiteLLMCache | None:
+    """Return the process-wide response cache, or None when caching is off.
+
+    Caching is opt-in: set ``LLM_CACHE_DIR`` to enable it. ``LLM_CACHE_MAX_ENTRIES``
+    and ``LLM_CACHE_MAX_MB`` tune the size cap, and ``LLM_CACHE_BYPASS=1`` forces
+    every lookup to miss while still recording fresh responses.
+    """
+    directory = os.environ.get("LLM_CACHE_DIR")
+    if not directory:
+        return None
+
+    directory = os.path.abspath(directory)
+    with _caches_lock:
+        cache = _caches.get(directory)
+        if cache is None:
+            cache = SQLiteLLMCache(
+                directory,
+                max_entries=int(os.environ.get("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(
+                    float(os.environ.get("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES / 1024 / 1024))
+                    * 1024
+                    * 1024
+                ),
+            )
+            _caches[directory] = cache
+    cache.bypass = _env_flag("LLM_CACHE_BYPASS")
+    return cache
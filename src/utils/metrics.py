@@ -0,0 +1,85 @@
+"""Token and latency accounting over a run's LLM call records.
+
+Every node appends one :func:`src.utils.llm.call_record` per LLM call to the
+``llm_calls`` state key. This module adds them up per node, per
+(node, iteration) and for the whole run, and exports everything as JSON.
+"""
+
+import json
+import os
+from typing import Any
+
+_SUMMED = ("prompt_tokens", "completion_tokens", "latency_s")
+
+
+def _empty() -> dict[str, Any]:
+    return {
+        "calls": 0,
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "latency_s": 0.0,
+        "mean_ttft_s": None,
+        "cache_hits": 0,
+    }
+
+
+def _add(bucket: dict[str, Any], call: dict[str, Any], ttfts: list[float]) -> None:
+    bucket["calls"] += 1
+    for key in _SUMMED:
+        bucket[key] += call.get(key) or 0
+    bucket["total_tokens"] = bucket["prompt_tokens"] + bucket["completion_tokens"]
+    bucket["latency_s"] = round(bucket["latency_s"], 3)
+    bucket["cache_hits"] += 1 if call.get("cache_hit") else 0
+    if call.get("ttft_s") is not None:
+        ttfts.append(call["ttft_s"])
+        bucket["mean_ttft_s"] = round(sum(ttfts) / len(ttfts), 3)
+
+
+def aggregate(calls: list[dict[str, Any]]) -> dict[str, Any]:
+    """Add up call records.
+
+    Returns:
+        ``{"totals": {...}, "by_node": {node: {...}}, "by_iteration": [...]}``
+        where each bucket holds calls, prompt/completion/total tokens, summed
+        latency, mean time to first token and cache hits. ``by_iteration``
+        rows also carry ``node`` and ``iteration`` and keep first-seen order.
+    """
+    totals, total_ttfts = _empty(), []
+    by_node: dict[str, dict[str, Any]] = {}
+    node_ttfts: dict[str, list[float]] = {}
+    by_iteration: dict[tuple[str, Any], dict[str, Any]] = {}
+    iteration_ttfts: dict[tuple[str, Any], list[float]] = {}
+
+    for call in calls:
+        node = call.get("node") or "?"
+        key = (node, call.get("iteration"))
+        _add(totals, call, total_ttfts)
+        _add(by_node.setdefault(node, _empty()), call, node_ttfts.setdefault(node, []))
+        row = by_iteration.setdefault(key, {"node": node, "iteration": key[1], **_empty()})
+        _add(row, call, iteration_ttfts.setdefault(key, []))
+
+    return {"totals": totals, "by_node": by_node, "by_iteration": list(by_iteration.values())}
+
+
+def export_metrics(calls: list[dict[str, Any]], path: str) -> None:
+    """Write the raw call records and their aggregates to *path* as JSON."""
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({**aggregate(calls), "calls": calls}, fh, indent=2)
+
+
+def format_metrics_table(metrics: dict[str, Any]) -> list[str]:
+    """Render per-node and total rows for the CLI summary."""
+    lines = [f"   {'node':<10} {'calls':>5} {'prompt':>8} {'compl.':>8} {'latency':>9} {'ttft':>7} {'cached':>6}"]
+    rows = [*metrics["by_node"].items(), ("total", metrics["totals"])]
+    for name, bucket in rows:
+        ttft = bucket["mean_ttft_s"]
+        lines.append(
+            f"   {name:<10} {bucket['calls']:>5} {bucket['prompt_tokens']:>8} "
+            f"{bucket['completion_tokens']:>8} {bucket['latency_s']:>8.1f}s "
+            f"{(f'{ttft:.2f}s' if ttft is not None else '—'):>7} {bucket['cache_hits']:>6}"
+        )
+    return lines
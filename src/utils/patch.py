@@ -0,0 +1,113 @@
+"""Incremental patches from the developer, merged into the previous file map.
+
+From the second iteration on the developer is shown the current files and
+the feedback, and asked for only what changes: whole new contents for new or
+rewritten files, or a unified diff against the current file. Merging is
+strict — every hunk's context and removed lines must match the current file
+(a small line offset is tolerated, content mismatches are not), diffs may only
+target existing files — and any failure raises :class:`PatchError` so the
+developer node can fall back to regenerating the whole backend.
+"""
+
+import re
+
+from src.utils.file_map import FileMap, file_entry
+from src.utils.structured_output import FilePatches
+
+_HUNK_HEADER = re.compile(r"^@@ -(?P<start>\d+)(?:,(?P<count>\d+))? \+\d+(?:,\d+)? @@")
+
+# How far (in lines) a hunk may drift from the line its header names.
+MAX_HUNK_OFFSET = 50
+
+
+class PatchError(ValueError):
+    """A patch that cannot be applied cleanly to the current files."""
+
+
+def _hunks(diff: str) -> list[tuple[int, list[str], list[str]]]:
+    """Parse *diff* into ``(start_index, old_lines, new_lines)`` per hunk."""
+    hunks: list[tuple[int, list[str], list[str]]] = []
+    current: tuple[int, list[str], list[str]] | None = None
+    for line in diff.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            start = int(header.group("start"))
+            # "-0,0" inserts at the top; otherwise the header is 1-based.
+            current = (max(start - 1, 0) if header.group("count") != "0" else start, [], [])
+            hunks.append(current)
+            continue
+        if current is None:
+            if line.startswith(("---", "+++", "diff ", "index ")) or not line.strip():
+                continue
+            raise PatchError(f"unexpected line before the first hunk: {line!r}")
+        if line.startswith("\\"):  # "\ No newline at end of file"
+            continue
+        # Models often drop the leading space of blank context lines.
+        marker, text = (line[0], line[1:]) if line else (" ", "")
+        if marker == " ":
+            current[1].append(text)
+            current[2].append(text)
+        elif marker == "-":
+            current[1].append(text)
+        elif marker == "+":
+            current[2].append(text)
+        else:
+            raise PatchError(f"malformed hunk line: {line!r}")
+    if not hunks:
+        raise PatchError("diff has no hunks")
+    return hunks
+
+
+def _locate(lines: list[str], old: list[str], start: int, floor: int) -> int:
+    """Index where *old* matches *lines*, nearest to *start* and not before *floor*."""
+    for offset in range(MAX_HUNK_OFFSET + 1):
+        for candidate in (start - offset, start + offset) if offset else (start,):
+            if candidate >= floor and lines[candidate:candidate + len(old)] == old:
+                return candidate
+    raise PatchError(f"hunk at line {start + 1} does not match the current file")
+
+
+def apply_unified_diff(original: str, diff: str) -> str:
+    """Apply a unified *diff* to *original* and return the new content.
+
+    Raises:
+        PatchError: If the diff is malformed or a hunk does not apply.
+    """
+    lines = original.splitlines()
+    result: list[str] = []
+    position = 0
+    for start, old, new in _hunks(diff):
+        at = _locate(lines, old, start, position) if old else min(max(start, position), len(lines))
+        result.extend(lines[position:at])
+        result.extend(new)
+        position = at + len(old)
+    result.extend(lines[position:])
+    return "\n".join(result)
+
+
+def apply_patches(previous: FileMap, patches: FilePatches) -> FileMap:
+    """Merge the developer's *patches* into a copy of *previous*.
+
+    Raises:
+        PatchError: If any change does not apply; *previous* is left untouched.
+    """
+    merged = dict(previous)
+    for change in patches.files:
+        if change.delete:
+            if change.path not in merged:
+                raise PatchError(f"cannot delete {change.path}: no such file")
+            del merged[change.path]
+            continue
+        if change.content is not None:
+            content = change.content.strip("\n")
+        elif change.path in merged:
+            content = apply_unified_diff(merged[change.path]["content"], change.diff or "")
+        else:
+            raise PatchError(f"diff for {change.path}, which does not exist")
+        if not content.strip():
+            raise PatchError(f"patch leaves {change.path} empty")
+        language = change.language or (merged[change.path]["language"] if change.path in merged else None)
+        merged[change.path] = file_entry(change.path, content, language)
+    if not merged:
+        raise PatchError("patch removes every file")
+    return merged
@@ -0,0 +1,85 @@
+"""Per-file review verdicts, cached by content and schema hash.
+
+The reviewer attributes every issue to a file, so each file's verdict (its
+issues, or none) can be cached under a key made of the file's content hash and
+the schema's hash. On later iterations only files whose key is not cached —
+changed files — and the files that require them are sent to the reviewer;
+every other file's cached verdict is merged back in. Reviewer prompt size and
+latency then follow the size of the change rather than of the codebase.
+"""
+
+import hashlib
+import posixpath
+import re
+
+from src.utils.file_map import FileEntry, FileMap
+
+_REQUIRE = re.compile(
+    r"""(?:require\(\s*|\bfrom\s+|\bimport\s+)['"](?P<spec>\.{1,2}/[^'"]+)['"]"""
+)
+_ISSUE_FILE = re.compile(r"^\[(?P<path>[^\]]+)\]")
+
+
+def schema_hash(db_schema: str) -> str:
+    """Hash of the schema the files are reviewed against."""
+    return hashlib.sha256(db_schema.encode("utf-8")).hexdigest()[:16]
+
+
+def review_key(entry: FileEntry, schema: str) -> str:
+    """Cache key of one file's verdict: its content hash plus the schema hash."""
+    return f"{entry['path']}:{entry['sha256'][:16]}:{schema}"
+
+
+def _resolve(path: str, spec: str, file_map: FileMap) -> str | None:
+    base = posixpath.normpath(posixpath.join(posixpath.dirname(path), spec))
+    for candidate in (base, f"{base}.js", f"{base}.json", f"{base}/index.js"):
+        if candidate in file_map:
+            return candidate
+    return None
+
+
+def relative_imports(file_map: FileMap) -> dict[str, list[tuple[str, str | None]]]:
+    """path → ``(specifier, resolved path or None)`` for each relative require/import."""
+    return {
+        path: [
+            (match.group("spec"), _resolve(path, match.group("spec"), file_map))
+            for match in _REQUIRE.finditer(entry["content"])
+        ]
+        for path, entry in file_map.items()
+    }
+
+
+def dependencies(file_map: FileMap) -> dict[str, set[str]]:
+    """path → the generated files it requires or imports (relative specifiers only)."""
+    return {
+        path: {target for _, target in imports if target and target != path}
+        for path, imports in relative_imports(file_map).items()
+    }
+
+
+def stale_files(file_map: FileMap, cache: dict[str, list[str]], schema: str) -> list[str]:
+    """Files to review: those without a cached verdict, plus the files requiring them."""
+    changed = {path for path, entry in file_map.items() if review_key(entry, schema) not in cache}
+    dependents = {
+        path for path, required in dependencies(file_map).items() if required & changed
+    }
+    return [path for path in file_map if path in changed | dependents]
+
+
+def issue_file(item: str) -> str | None:
+    """The file a ``[path] ...`` feedback item is about."""
+    match = _ISSUE_FILE.match(item.strip())
+    return match.group("path").strip() if match else None
+
+
+def file_verdicts(reviewed: list[str], feedback: list[str]) -> tuple[dict[str, list[str]], list[str]]:
+    """Split *feedback* into per-file verdicts for *reviewed*, and the unattributed rest."""
+    verdicts: dict[str, list[str]] = {path: [] for path in reviewed}
+    unattributed: list[str] = []
+    for item in feedback:
+        path = issue_file(item)
+        if path in verdicts:
+            verdicts[path].append(item)
+        else:
+            unattributed.append(item)
+    return verdicts, unattributed
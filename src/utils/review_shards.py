@@ -0,0 +1,66 @@
+"""Map-reduce review for large generated backends.
+
+One reviewer call over dozens of files is slow and misses issues as the
+context grows. In sharded mode the files are grouped — each entity's routes
+and controller together, the shared setup files together, anything else on
+its own — and every group is reviewed in its own call, all in parallel (the
+map). The reduce step is local and costs no tokens: it checks what no single
+group can see, such as relative imports that resolve to no file and routers
+never mounted by another file, then deduplicates every finding into the
+usual ``review_feedback`` items.
+"""
+
+import re
+
+from src.utils.file_map import FileMap
+from src.utils.review_cache import dependencies, relative_imports
+
+_ENTITY_FILE = re.compile(r"^(?:routes|controllers)/(?P<entity>[\w-]+)\.(?:routes|controller)\.js$")
+_SHARED = ("server.js", "app.js", "db/pool.js", "package.json")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def review_groups(paths: list[str]) -> list[list[str]]:
+    """Group *paths* for review: shared files, then each entity's pair, then the rest alone."""
+    shared = [path for path in paths if path in _SHARED]
+    entities: dict[str, list[str]] = {}
+    others: list[list[str]] = []
+    for path in paths:
+        if path in _SHARED:
+            continue
+        match = _ENTITY_FILE.match(path)
+        if match:
+            entities.setdefault(match.group("entity"), []).append(path)
+        else:
+            others.append([path])
+    return [group for group in (shared, *entities.values(), *others) if group]
+
+
+def cross_file_issues(file_map: FileMap) -> list[str]:
+    """Problems spanning files, as feedback items in the reviewer's format."""
+    issues = [
+        f"[{path}] (bad_import) requires '{spec}', which is not a generated file"
+        for path, imports in relative_imports(file_map).items()
+        for spec, target in imports
+        if target is None
+    ]
+    if "server.js" in file_map:
+        required = set().union(*dependencies(file_map).values())
+        issues.extend(
+            f"[server.js] (other) {path} is never mounted: no file requires it"
+            for path in file_map
+            if path.startswith("routes/") and path not in required
+        )
+    return issues
+
+
+def dedupe_issues(items: list[str]) -> list[str]:
+    """Drop items repeating an earlier one apart from case and whitespace."""
+    seen: set[str] = set()
+    unique = []
+    for item in items:
+        key = _WHITESPACE.sub(" ", item).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(item)
+    return unique
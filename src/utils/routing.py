@@ -0,0 +1,132 @@
+"""Per-node model and endpoint routing.
+
+Each pipeline node (``architect``, ``developer``, ``reviewer``, ``tdd``) can be
+served by its own OpenAI-compatible endpoint, model, temperature, output
+budget and timeout. Routes are layered:
+
+1. built-in defaults (Groq, ``LLM_MODEL``, the node's historical temperature);
+2. the ``default`` section of the routing config;
+3. the node's own section of the routing config.
+
+The config is read from ``LLM_ROUTING_FILE`` (JSON, or TOML for ``.toml``
+files) or inline JSON in ``LLM_ROUTING``. Example TOML::
+
+    [default]
+    model = "llama-3.3-70b-versatile"
+
+    [reviewer]
+    model = "llama-3.1-8b-instant"
+    max_tokens = 2048
+
+    [tdd]
+    endpoint = "local"
+    base_url = "http://localhost:8000/v1"
+    model = "qwen2.5-coder-7b"
+    api_key_env = ""
+"""
+
+import json
+import os
+import tomllib
+from collections.abc import Mapping
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+DEFAULT_ENDPOINT = "groq"
+
+# Temperatures the nodes have always used; routing config may override them.
+NODE_TEMPERATURES = {
+    "architect": 0.2,
+    "developer": 0.2,
+    "reviewer": 0.1,
+    "tdd": 0.1,
+}
+DEFAULT_TEMPERATURE = 0.2
+
+
+@dataclass(frozen=True)
+class Route:
+    """Where and how a node's LLM calls are served.
+
+    Attributes:
+        endpoint: Label for the endpoint (reported in run summaries).
+        base_url: OpenAI-compatible ``/v1`` base URL.
+        model: Model name.
+        temperature: Sampling temperature.
+        max_tokens: Completion token cap (None = provider default).
+        timeout: Request timeout in seconds (None = client default).
+        api_key_env: Environment variable holding the API key; empty string
+                     for keyless local servers.
+        structured_output: Ask for schema-constrained (tool-call) replies where
+                           the node supports them; turn off for servers
+                           without tool calling.
+        stream: Stream replies, which is how time-to-first-token is measured.
+    """
+
+    endpoint: str = DEFAULT_ENDPOINT
+    base_url: str = GROQ_BASE_URL
+    model: str = DEFAULT_MODEL
+    temperature: float = DEFAULT_TEMPERATURE
+    max_tokens: int | None = None
+    timeout: float | None = None
+    api_key_env: str = "GROQ_API_KEY"
+    structured_output: bool = True
+    stream: bool = True
+
+
+_ROUTE_FIELDS = {f.name for f in fields(Route)}
+
+
+def load_routing_config() -> dict[str, dict[str, Any]]:
+    """Read the raw routing config from ``LLM_ROUTING_FILE`` or ``LLM_ROUTING``.
+
+    Raises:
+        ValueError: If a section contains keys that are not Route fields.
+    """
+    path = os.environ.get("LLM_ROUTING_FILE", "").strip()
+    inline = os.environ.get("LLM_ROUTING", "").strip()
+    if path:
+        if path.endswith(".toml"):
+            with open(path, "rb") as fh:
+                config = tomllib.load(fh)
+        else:
+            with open(path, encoding="utf-8") as fh:
+                config = json.load(fh)
+    elif inline:
+        config = json.loads(inline)
+    else:
+        return {}
+
+    for section, values in config.items():
+        unknown = set(values) - _ROUTE_FIELDS
+        if unknown:
+            raise ValueError(
+                f"Unknown routing keys in [{section}]: {', '.join(sorted(unknown))}"
+            )
+    return config
+
+
+def resolve_route(
+    node: str | None,
+    config: Mapping[str, Mapping[str, Any]] | None = None,
+    model: str | None = None,
+) -> Route:
+    """Return the effective route for *node*.
+
+    Args:
+        node: Node name, e.g. ``"reviewer"``; None resolves the default route.
+        config: Parsed routing config; read from the environment when omitted.
+        model: Built-in default model; ``LLM_MODEL`` when omitted.
+    """
+    if config is None:
+        config = load_routing_config()
+    route = Route(
+        model=model or os.environ.get("LLM_MODEL", DEFAULT_MODEL),
+        temperature=NODE_TEMPERATURES.get(node or "", DEFAULT_TEMPERATURE),
+    )
+    route = replace(route, **config.get("default", {}))
+    if node:
+        route = replace(route, **config.get(node, {}))
+    return route
@@ -0,0 +1,395 @@
+"""Rate-limit-aware request scheduler for LLM calls.
+
+Groq (like most hosted providers) enforces both requests-per-minute (RPM) and
+tokens-per-minute (TPM) quotas per API key. Running several pipelines at once
+easily trips a 429, and an unhandled 429 throws away the whole run. The
+scheduler keeps usage just under the quota instead:
+
+* two token buckets (RPM and TPM) shared by every thread and asyncio task in
+  the process;
+* a pre-flight token estimate for each request, reconciled against the real
+  usage once the response arrives;
+* a priority queue, so a reviewer call on a nearly-finished run is admitted
+  before a fresh architect call;
+* retries with exponential backoff and jitter that honour the provider's
+  ``retry-after`` / ``x-ratelimit-reset-*`` headers.
+"""
+
+import asyncio
+import email.utils
+import heapq
+import itertools
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+# Lower value = admitted first. Later pipeline stages go first so runs that
+# are close to done finish instead of being starved by new ones.
+NODE_PRIORITY = {
+    "reviewer": 0,
+    "tdd": 1,
+    "developer": 2,
+    "architect": 3,
+}
+DEFAULT_PRIORITY = 2
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+DEFAULT_COMPLETION_ESTIMATE = 1024
+
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_CAP_SECONDS = 60.0
+
+_POLL_SECONDS = 0.05
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def request_priority(node: str, iteration: int = 0) -> int:
+    """Return the queue priority for a call from *node* at *iteration*.
+
+    Each completed developer iteration moves a run's calls one step ahead, so
+    an iteration-3 reviewer call outranks an iteration-1 one.
+    """
+    return NODE_PRIORITY.get(node, DEFAULT_PRIORITY) * 10 - iteration
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part.get("text", "") if isinstance(part, dict) else str(part)
+            for part in content
+        )
+    return str(content or "")
+
+
+def estimate_tokens(messages: Any, max_output_tokens: int | None = None) -> int:
+    """Estimate the TPM cost of a request before it is sent.
+
+    Uses the usual ~4 characters per token heuristic for the prompt plus the
+    requested completion budget (or a conservative default).
+
+    Args:
+        messages: A string, a list of message dicts, or LangChain messages.
+        max_output_tokens: The request's ``max_tokens``, if set.
+
+    Returns:
+        Estimated prompt + completion tokens.
+    """
+    if isinstance(messages, str):
+        messages = [messages]
+
+    prompt_chars = 0
+    count = 0
+    for message in messages or []:
+        count += 1
+        if isinstance(message, dict):
+            prompt_chars += len(_content_text(message.get("content")))
+        elif isinstance(message, str):
+            prompt_chars += len(message)
+        else:
+            prompt_chars += len(_content_text(getattr(message, "content", "")))
+            for call in getattr(message, "tool_calls", None) or []:
+                prompt_chars += len(str(call.get("args", "")))
+
+    prompt_tokens = prompt_chars // CHARS_PER_TOKEN + count * MESSAGE_OVERHEAD_TOKENS
+    return prompt_tokens + (max_output_tokens or DEFAULT_COMPLETION_ESTIMATE)
+
+
+def _parse_duration(value: str) -> float | None:
+    """Parse ``retry-after`` style values: seconds, HTTP dates or ``1m2.5s``/``120ms``."""
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if parts and "".join(n + u for n, u in parts) == value.replace(" ", ""):
+        scale = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(n) * scale[u] for n, u in parts)
+
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(parsed.timestamp() - time.time(), 0.0)
+
+
+def retry_after_seconds(exc: BaseException) -> float | None:
+    """Return the server-requested wait carried by *exc*'s response headers, if any."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return max(float(retry_after_ms) / 1000.0, 0.0)
+        except ValueError:
+            pass
+
+    waits = [
+        _parse_duration(headers.get(name) or "")
+        for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens")
+        if headers.get(name)
+    ]
+    waits = [w for w in waits if w is not None]
+    return max(waits) if waits else None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for rate limits, transient server errors, timeouts and connection drops."""
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+
+    try:
+        import openai
+    except ImportError:  # pragma: no cover - openai ships with langchain-openai
+        return False
+    return isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError))
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Exponential backoff with full jitter, never shorter than *retry_after*."""
+    ceiling = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        # Respect the server's floor, plus a little jitter so waiting callers
+        # do not all retry in the same instant.
+        delay = retry_after + random.uniform(0, BACKOFF_BASE_SECONDS)
+    return delay
+
+
+class TokenBucket:
+    """A continuously refilling token bucket. Not thread-safe on its own.
+
+    Args:
+        capacity: Bucket size — the per-minute quota.
+        per_seconds: Window over which a full bucket refills.
+    """
+
+    def __init__(self, capacity: float, per_seconds: float = 60.0) -> None:
+        self.capacity = float(capacity)
+        self.rate = self.capacity / per_seconds
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until *amount* tokens are available (0 if available now)."""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.tokens -= min(amount, self.capacity)
+
+    def adjust(self, delta: float) -> None:
+        """Refund (positive) or charge (negative) tokens after the fact."""
+        self.tokens = min(self.capacity, self.tokens + delta)
+
+
+class RequestScheduler:
+    """Admits LLM requests in priority order within RPM/TPM quotas.
+
+    Args:
+        rpm: Requests per minute, or 0 for no request limit.
+        tpm: Tokens per minute, or 0 for no token limit.
+        max_retries: Retries for retryable errors before giving up.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, max_retries: int = DEFAULT_MAX_RETRIES) -> None:
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_retries = max_retries
+        self._cond = threading.Condition()
+        self._queue: list[tuple[int, int]] = []
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self.stats = {"admitted": 0, "retries": 0, "rate_limited": 0, "queued_seconds": 0.0}
+
+    # --- admission ---------------------------------------------------------
+
+    def _try_admit(self, ticket: tuple[int, int], cost: int) -> float:
+        """Admit *ticket* if it is at the head and quota allows. Caller holds the lock.
+
+        Returns 0.0 when admitted, otherwise the suggested wait in seconds.
+        """
+        now = time.monotonic()
+        if self._queue[0] != ticket:
+            return _POLL_SECONDS
+        wait = max(self._paused_until - now, 0.0)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(cost, now))
+        if wait > 0:
+            return wait
+
+        heapq.heappop(self._queue)
+        if self.requests is not None:
+            self.requests.consume(1, now)
+        if self.tokens is not None:
+            self.tokens.consume(cost, now)
+        self.stats["admitted"] += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def acquire(self, cost: int, priority: int = DEFAULT_PRIORITY) -> None:
+        """Block until a request of *cost* tokens may be sent."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+            while True:
+                wait = self._try_admit(ticket, cost)
+                if wait == 0.0:
+                    break
+                self._cond.wait(timeout=wait)
+            self.stats["queued_seconds"] += time.monotonic() - started
+
+    async def aacquire(self, cost: int, priority: int = DEFAULT_PRIORITY) -> None:
+        """Async variant of :meth:`acquire`; never blocks the event loop."""
+        started = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._seq))
+            heapq.heappush(self._queue, ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_admit(ticket, cost)
+                if wait == 0.0:
+                    break
+                await asyncio.sleep(min(wait, 1.0))
+        except asyncio.CancelledError:
+            with self._cond:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+            raise
+        with self._cond:
+            self.stats["queued_seconds"] += time.monotonic() - started
+
+    def settle(self, estimated: int, actual: int | None) -> None:
+        """Reconcile the TPM bucket with the tokens a response actually used."""
+        if self.tokens is None or actual is None:
+            return
+        with self._cond:
+            self.tokens.adjust(estimated - actual)
+            self._cond.notify_all()
+
+    def _backoff(self, exc: BaseException, attempt: int) -> float:
+        retry_after = retry_after_seconds(exc)
+        delay = backoff_delay(attempt, retry_after)
+        with self._cond:
+            self.stats["retries"] += 1
+            if getattr(exc, "status_code", None) == 429:
+                self.stats["rate_limited"] += 1
+                # Hold every queued caller back, not just this one.
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    # --- execution ---------------------------------------------------------
+
+    def call(
+        self,
+        fn: Callable[[], Any],
+        cost: int,
+        priority: int = DEFAULT_PRIORITY,
+        usage: Callable[[Any], int | None] | None = None,
+    ) -> Any:
+        """Run *fn* once admitted, retrying retryable failures with backoff.
+
+        Args:
+            fn: Zero-argument callable performing the request.
+            cost: Estimated tokens (see :func:`estimate_tokens`).
+            priority: Queue priority (see :func:`request_priority`).
+            usage: Optional callable extracting actual tokens from the result.
+        """
+        attempt = 0
+        while True:
+            self.acquire(cost, priority)
+            try:
+                result = fn()
+            except Exception as exc:  # noqa: BLE001
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                time.sleep(self._backoff(exc, attempt))
+                attempt += 1
+                continue
+            self.settle(cost, usage(result) if usage else None)
+            return result
+
+    async def acall(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        cost: int,
+        priority: int = DEFAULT_PRIORITY,
+        usage: Callable[[Any], int | None] | None = None,
+    ) -> Any:
+        """Async variant of :meth:`call`."""
+        attempt = 0
+        while True:
+            await self.aacquire(cost, priority)
+            try:
+                result = await fn()
+            except Exception as exc:  # noqa: BLE001
+                if attempt >= self.max_retries or not is_retryable(exc):
+                    raise
+                await asyncio.sleep(self._backoff(exc, attempt))
+                attempt += 1
+                continue
+            self.settle(cost, usage(result) if usage else None)
+            return result
+
+
+_schedulers: dict[tuple[int, int], RequestScheduler] = {}  # (rpm, tpm) → scheduler
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(rpm: int | None = None, tpm: int | None = None) -> RequestScheduler:
+    """Return the process-wide scheduler for the given quotas.
+
+    Quotas left None come from ``LLM_RPM_LIMIT`` and ``LLM_TPM_LIMIT`` (unset
+    or 0 means unlimited — retries still apply); retries from
+    ``LLM_MAX_RETRIES``. Callers with the same quotas share one scheduler, and
+    so one pair of buckets.
+    """
+    if rpm is None:
+        rpm = int(os.environ.get("LLM_RPM_LIMIT", 0))
+    if tpm is None:
+        tpm = int(os.environ.get("LLM_TPM_LIMIT", 0))
+    with _scheduler_lock:
+        scheduler = _schedulers.get((rpm, tpm))
+        if scheduler is None:
+            scheduler = _schedulers[(rpm, tpm)] = RequestScheduler(
+                rpm=rpm,
+                tpm=tpm,
+                max_retries=int(os.environ.get("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+        return scheduler
+
+
+def reset_scheduler() -> None:
+    """Drop the process-wide schedulers so the next call re-reads the environment."""
+    with _scheduler_lock:
+        _schedulers.clear()
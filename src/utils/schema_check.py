@@ -0,0 +1,254 @@
+"""Local check of the generated queries against the schema catalog.
+
+The reviewer's "Schema Mismatch" check — queries that use tables or columns
+the architect never created — needs no model either. For each ``.query(...)``
+call found by :mod:`src.utils.sql_scan`, the SQL is recovered when it is a
+string literal, a ``+`` chain of literals, a ``{ text: ... }`` object or a
+variable built that way (template interpolations become a ``$0`` parameter).
+Its table references (``FROM``, ``JOIN``, ``INTO``, ``UPDATE``, ``USING``)
+and column references are then looked up in the :class:`~src.utils.catalog.Catalog`.
+
+The check is conservative: a qualified ``alias.column`` is checked against the
+alias's table, and an unqualified column only when every table in the
+statement is in the catalog (no subqueries, CTEs or set-returning functions
+that could supply it), in which case one of them must have it. Findings are
+feedback items in the reviewer's ``[file] (category) message`` format.
+"""
+
+import difflib
+import re
+
+from src.utils.catalog import Catalog
+from src.utils.file_map import FileMap
+from src.utils.sql_scan import QueryCall, Token, javascript_files, query_calls
+
+_INTERPOLATION = re.compile(r"\$\{(?:[^{}]|\{[^{}]*\})*\}")
+# An interpolation glued to a name (users_${suffix}) makes the name unknowable.
+_GLUED_INTERPOLATION = re.compile(r"\w\$\{|\}(?=\w)")
+_STATEMENT = re.compile(r"^\s*(?:WITH|SELECT|INSERT|UPDATE|DELETE)\b", re.IGNORECASE)
+_SQL_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.DOTALL)
+_SQL_TOKEN = re.compile(
+    r"""(?P<string>'(?:[^']|'')*')
+      | (?P<param>\$\d+)
+      | (?P<ident>"[^"]+"|[A-Za-z_][\w$]*)
+      | (?P<number>\d+(?:\.\d+)?)
+      | (?P<punct>::|[^\s\w])""",
+    re.VERBOSE,
+)
+
+# Words that are never column references (keywords, date parts, literal prefixes).
+_KEYWORDS = frozenset("""
+    all and any array as asc at between both by cascade case cast collate conflict constraint cross
+    current_date current_time current_timestamp current_user default delete desc distinct do else end
+    escape except exists false fetch filter first following for from full group having ilike in inner
+    insert intersect interval into is join last lateral leading left like limit local localtime
+    localtimestamp locked natural next not nothing nowait null nulls of offset on only or order outer
+    over partition preceding range recursive returning right row rows select set similar skip some
+    table then ties to trailing true unbounded union unknown update using values when where window
+    with within without zone
+    century day decade dow doy epoch hour isodow isoyear microseconds millennium milliseconds minute
+    month quarter second week year date time timestamp timestamptz
+""".split())
+_SOURCE_KEYWORDS = frozenset({"from", "join", "into", "update", "using"})
+
+
+def _literal(token: Token) -> str | None:
+    """The SQL text of a string or template literal token, or None if it cannot be known."""
+    body = token.text[1:-1]
+    if token.kind == "string":
+        return body
+    if _GLUED_INTERPOLATION.search(body):
+        return None
+    return _INTERPOLATION.sub("$0", body)
+
+
+def _concatenated(expression: list[Token]) -> str | None:
+    """The SQL of literals joined with ``+``; None if anything else is involved."""
+    literals = []
+    for token in expression:
+        if token.kind in ("string", "template"):
+            literal = _literal(token)
+            if literal is None:
+                return None
+            literals.append(literal)
+        elif not (token.kind == "punct" and token.text == "+"):
+            return None
+    return " ".join(literals) or None
+
+
+def query_sql(call: QueryCall) -> str | None:
+    """The SQL a ``.query(...)`` call runs, when it can be recovered from the source."""
+    if call.variable is not None:
+        # The last plain assignment before the call, plus what was appended after it.
+        pieces: list[str | None] = []
+        for operator, rhs in call.assignments:
+            if operator == "=":
+                pieces = []
+            pieces.append(_concatenated(rhs))
+        sql = " ".join(pieces) if pieces and None not in pieces else None
+    elif call.argument and call.argument[0].text == "{":
+        tokens = call.argument
+        sql = None
+        for i in range(len(tokens) - 2):
+            if tokens[i].text == "text" and tokens[i + 1].text == ":":
+                end = next((j for j in range(i + 2, len(tokens)) if tokens[j].text in (",", "}")),
+                           len(tokens))
+                sql = _concatenated(tokens[i + 2:end])
+                break
+    else:
+        sql = _concatenated(call.argument)
+    return sql if sql and _STATEMENT.match(sql) else None
+
+
+def _tokens(sql: str) -> list[tuple[str, str]]:
+    """``(kind, text)`` SQL tokens; identifiers are unquoted and lower-cased."""
+    tokens = []
+    for match in _SQL_TOKEN.finditer(_SQL_COMMENT.sub(" ", sql)):
+        kind = match.lastgroup
+        text = match.group()
+        if kind == "ident":
+            text = text.strip('"').lower()
+        tokens.append((kind, text))
+    return tokens
+
+
+def _is_name(tokens: list[tuple[str, str]], i: int) -> bool:
+    return i < len(tokens) and tokens[i][0] == "ident" and tokens[i][1] not in _KEYWORDS
+
+
+def _suggestion(name: str, candidates) -> str:
+    close = difflib.get_close_matches(name, list(candidates), n=1)
+    return f" (did you mean `{close[0]}`?)" if close else ""
+
+
+def sql_problems(sql: str, catalog: Catalog) -> list[str]:
+    """Tables and columns *sql* uses that *catalog* does not define, as messages."""
+    tokens = _tokens(sql)
+    problems: list[str] = []
+    ctes = {
+        tokens[i][1] for i in range(len(tokens) - 2)
+        if _is_name(tokens, i) and tokens[i + 1][1] == "as" and tokens[i + 2][1] == "("
+    }
+    aliases: dict[str, str | None] = {}  # alias or table name → catalog table, None if unknown
+    consumed: set[int] = set()
+    open_scope = False  # Some source (subquery, CTE, function, unknown table) has unknown columns
+    insert_target: str | None = None
+
+    calls: list[bool] = []  # For each open parenthesis: is it a function call's?
+    for i, (kind, text) in enumerate(tokens):
+        if text == "(":
+            calls.append(i > 0 and _is_name(tokens, i - 1))
+        elif text == ")" and calls:
+            calls.pop()
+        if kind != "ident" or text not in _SOURCE_KEYWORDS or i in consumed:
+            continue
+        if text == "from" and (calls and calls[-1] or i > 0 and tokens[i - 1][1] == "distinct"):
+            continue  # EXTRACT(YEAR FROM x), IS DISTINCT FROM
+        j = i + 1
+        while True:
+            while j < len(tokens) and tokens[j][1] in ("lateral", "only"):
+                j += 1
+            if j < len(tokens) and tokens[j][1] == "(":
+                if text == "using":
+                    break  # JOIN ... USING (column)
+                open_scope = True
+                depth = 0
+                for j in range(j, len(tokens)):
+                    depth += {"(": 1, ")": -1}.get(tokens[j][1], 0)
+                    if depth == 0:
+                        break
+                table = None
+            elif _is_name(tokens, j):
+                while j + 2 < len(tokens) and tokens[j + 1][1] == "." and tokens[j + 2][0] == "ident":
+                    consumed.add(j)
+                    j += 2  # schema.table
+                consumed.add(j)
+                name = tokens[j][1]
+                table = name if catalog.table(name) else None
+                if j + 1 < len(tokens) and tokens[j + 1][1] == "(" and text != "into":
+                    open_scope = True  # FROM generate_series(...)
+                elif name in ctes:
+                    open_scope = True
+                elif table is None:
+                    open_scope = True
+                    problems.append(
+                        f"table `{name}` is not in the schema{_suggestion(name, catalog.tables)}"
+                    )
+                aliases[name] = table
+                if text == "into":
+                    insert_target = table
+            else:
+                if j < len(tokens) and tokens[j][0] == "param":
+                    open_scope = True  # FROM ${table}
+                break
+            j += 1
+            if j < len(tokens) and tokens[j][1] == "as":
+                j += 1
+            if _is_name(tokens, j):
+                consumed.add(j)
+                aliases[tokens[j][1]] = table
+                j += 1
+            if text not in ("from", "using") or j >= len(tokens) or tokens[j][1] != ",":
+                break
+            j += 1  # FROM a, b
+
+    # Output aliases: "AS name", or a name right after an expression ("count(*) total").
+    output = {
+        tokens[i][1] for i in range(1, len(tokens))
+        if _is_name(tokens, i) and i not in consumed and (
+            tokens[i - 1][1] == "as"
+            or tokens[i - 1][0] in ("string", "number", "param")
+            or tokens[i - 1][1] == ")"
+            or _is_name(tokens, i - 1) and i - 1 not in consumed
+        )
+    }
+    if insert_target is not None:
+        aliases["excluded"] = insert_target
+    known = sorted({table for table in aliases.values() if table is not None})
+
+    for i, (kind, text) in enumerate(tokens):
+        if not _is_name(tokens, i) or i in consumed:
+            continue
+        if i > 0 and tokens[i - 1][1] in ("::", "."):
+            continue  # type cast, or the column part handled with its qualifier
+        if i + 1 < len(tokens) and tokens[i + 1][1] == "(":
+            continue  # function call
+        if i + 2 < len(tokens) and tokens[i + 1][1] == ".":
+            column = tokens[i + 2][1]
+            table = aliases.get(text)
+            if table is not None and tokens[i + 2][0] == "ident" and not catalog.has_column(table, column):
+                problems.append(
+                    f"column `{table}.{column}` is not in the schema"
+                    f"{_suggestion(column, catalog.tables[table].columns)}"
+                )
+            continue
+        if text in output or text in aliases or text in ctes or open_scope or not known:
+            continue
+        if not any(catalog.has_column(table, text) for table in known):
+            columns = [column for table in known for column in catalog.tables[table].columns]
+            where = f"table `{known[0]}`" if len(known) == 1 else "tables " + ", ".join(
+                f"`{table}`" for table in known
+            )
+            problems.append(f"column `{text}` is not in {where}{_suggestion(text, columns)}")
+    return list(dict.fromkeys(problems))
+
+
+def check_source(source: str, catalog: Catalog) -> list[tuple[int, str]]:
+    """``(line, problem)`` for each schema mismatch in the queries of one JavaScript file."""
+    findings = []
+    for call in query_calls(source):
+        sql = query_sql(call)
+        if sql is not None:
+            findings.extend((call.line, problem) for problem in sql_problems(sql, catalog))
+    return findings
+
+
+def check_files(file_map: FileMap, catalog: Catalog) -> list[str]:
+    """Feedback items for every query in the map that does not match *catalog*."""
+    if not catalog.tables:
+        return []
+    return [
+        f"[{path}] (schema_mismatch) line {line}: {problem}"
+        for path, content in javascript_files(file_map).items()
+        for line, problem in check_source(content, catalog)
+    ]
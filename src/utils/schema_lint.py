@@ -0,0 +1,184 @@
+"""Linting the architect's schema against its own rules, with deterministic fixes.
+
+``ARCHITECT_SYSTEM_PROMPT`` asks for a UUID primary key defaulting to
+``gen_random_uuid()``, ``created_at``/``updated_at TIMESTAMPTZ`` columns,
+indexed foreign keys and snake_case names on every table. Models break these
+often enough that the reviewer or the tests would otherwise find them an
+iteration later. :func:`lint_schema` checks them on the
+:mod:`src.utils.catalog` catalog and fixes what can be fixed without changing
+meaning:
+
+- a missing ``id UUID PRIMARY KEY DEFAULT gen_random_uuid()`` is added, and a
+  UUID key without that default gets it;
+- missing timestamp columns are added, and ``TIMESTAMP`` ones become
+  ``TIMESTAMPTZ``;
+- every foreign key without an index gets a ``CREATE INDEX`` at the end.
+
+Non-UUID or composite keys and names that are not snake_case are reported
+but left alone: changing them would break the statements that refer to them.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from src.utils.catalog import Index, Table, column_spelling, parse_catalog, table_parts
+from src.utils.ddl import bare_name, split_statements, statement_key
+
+UUID_DEFAULT = "gen_random_uuid()"
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+MAX_IDENTIFIER_LENGTH = 63  # PostgreSQL's NAMEDATALEN - 1
+
+_SNAKE_CASE = re.compile(r"^[a-z_][a-z0-9_]*$")
+_TIMESTAMP_TYPE = re.compile(
+    r"^(?P<name>\"?\w+\"?\s+)TIMESTAMP(?:\s*\(\d\))?(?:\s+WITHOUT\s+TIME\s+ZONE)?\b", re.IGNORECASE
+)
+_DEFAULT = re.compile(r"\bDEFAULT\s+(?:[\w.]+\s*\([^)]*\)|'[^']*'|\S+)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class LintedSchema:
+    """The fixed DDL, what was changed, and the rule violations left in it."""
+
+    sql: str
+    fixes: list[str] = field(default_factory=list)
+    violations: list[str] = field(default_factory=list)
+
+
+def _is_uuid(type_: str) -> bool:
+    return type_.lower() == "uuid"
+
+
+def _is_timestamptz(type_: str) -> bool:
+    return " ".join(type_.lower().split()) in ("timestamptz", "timestamp with time zone")
+
+
+def _position(definitions: list[str], column: str) -> int | None:
+    """Index of the definition declaring *column*."""
+    for i, definition in enumerate(definitions):
+        spelling = column_spelling(definition)
+        if spelling is not None and bare_name(spelling) == column:
+            return i
+    return None
+
+
+def _lint_table(
+    table: Table, definitions: list[str], alters: list[str], fixes: list[str], violations: list[str]
+) -> None:
+    """Fix one table's *definitions* in place where the rules allow it; report the rest.
+
+    Columns added by a later ``ALTER TABLE ... ADD COLUMN`` are not in
+    *definitions*; their fixes are ``ALTER TABLE`` statements added to *alters*.
+    """
+    name = table.name
+    if table.copies:
+        return  # LIKE / INHERITS: the key and timestamps come with the source table
+    key = table.primary_key
+    if not key and "id" not in table.columns:
+        definitions.insert(0, f"id UUID PRIMARY KEY DEFAULT {UUID_DEFAULT}")
+        fixes.append(f"{name}: added id UUID PRIMARY KEY DEFAULT {UUID_DEFAULT}")
+    elif not key and _is_uuid(table.columns["id"].type):
+        i = _position(definitions, "id")
+        if i is None:
+            alters.append(f"ALTER TABLE {name} ADD PRIMARY KEY (id)")
+        else:
+            definitions[i] += " PRIMARY KEY"
+        fixes.append(f"{name}: made id the primary key")
+        key = ("id",)
+    if len(key) == 1 and _is_uuid(table.columns[key[0]].type):
+        column = table.columns[key[0]]
+        if column.default is None or column.default.lower() != UUID_DEFAULT:
+            i = _position(definitions, column.name)
+            if i is None:
+                alters.append(f"ALTER TABLE {name} ALTER COLUMN {column.name} SET DEFAULT {UUID_DEFAULT}")
+            elif column.default is None:
+                definitions[i] += f" DEFAULT {UUID_DEFAULT}"
+            else:
+                definitions[i] = _DEFAULT.sub(f"DEFAULT {UUID_DEFAULT}", definitions[i], count=1)
+            fixes.append(f"{name}: {column.name} now defaults to {UUID_DEFAULT}")
+    elif key:
+        violations.append(
+            f"{name}: primary key ({', '.join(key)}) is not a single UUID column "
+            f"defaulting to {UUID_DEFAULT}"
+        )
+    elif "id" in table.columns:
+        violations.append(f"{name}: no primary key, and id is {table.columns['id'].type}, not UUID")
+
+    last_column = max((i for i, d in enumerate(definitions) if column_spelling(d)), default=-1)
+    for column_name in TIMESTAMP_COLUMNS:
+        column = table.columns.get(column_name)
+        if column is None:
+            last_column += 1
+            definitions.insert(last_column, f"{column_name} TIMESTAMPTZ NOT NULL DEFAULT NOW()")
+            fixes.append(f"{name}: added {column_name} TIMESTAMPTZ NOT NULL DEFAULT NOW()")
+        elif _is_timestamptz(column.type):
+            continue
+        elif not _TIMESTAMP_TYPE.match(f"{column_name} {column.type}"):
+            violations.append(f"{name}: {column_name} is {column.type}, not TIMESTAMPTZ")
+        else:
+            i = _position(definitions, column_name)
+            if i is None:
+                alters.append(f"ALTER TABLE {name} ALTER COLUMN {column_name} TYPE TIMESTAMPTZ")
+            else:
+                definitions[i] = _TIMESTAMP_TYPE.sub(r"\g<name>TIMESTAMPTZ", definitions[i], count=1)
+            fixes.append(f"{name}: {column_name} changed from {column.type} to TIMESTAMPTZ")
+
+
+def _snake_case_violations(head: str, definitions: list[str]) -> list[str]:
+    table = head.split()[-1].split(".")[-1].strip('"')
+    found = [] if _SNAKE_CASE.match(table) else [f"table {table} is not snake_case"]
+    for definition in definitions:
+        column = column_spelling(definition)
+        if column is not None and not _SNAKE_CASE.match(column):
+            found.append(f"{bare_name(table)}: column {column} is not snake_case")
+    return found
+
+
+def _index_name(table: str, columns: tuple[str, ...]) -> str:
+    return f"idx_{table}_{'_'.join(columns)}"[:MAX_IDENTIFIER_LENGTH]
+
+
+def lint_schema(sql: str) -> LintedSchema:
+    """Check *sql* against the architect's rules and apply the deterministic fixes.
+
+    Returns:
+        The schema with fixes applied (unchanged, comments included, when
+        there are none; otherwise re-emitted statement by statement, as
+        :func:`src.utils.schema_merge.merge_schemas` does), a line per fix,
+        and a line per violation that could not be fixed.
+    """
+    catalog = parse_catalog(sql)
+    fixes: list[str] = []
+    violations: list[str] = []
+    statements: list[str] = []
+    alters: list[str] = []  # Fixes to columns added by ALTER TABLE; they run after it
+    for statement in split_statements(sql):
+        key = statement_key(statement)
+        table = catalog.tables.get(key[1]) if key is not None and key[0] == "table" else None
+        parts = table_parts(statement) if table is not None else None
+        if parts is None:
+            statements.append(statement)
+            continue
+        head, definitions, tail = parts
+        violations.extend(_snake_case_violations(head, definitions))
+        original = list(definitions)
+        _lint_table(table, definitions, alters, fixes, violations)
+        if definitions == original:
+            statements.append(statement)
+        else:
+            body = ",\n  ".join(definitions)
+            statements.append(f"{head.rstrip()} (\n  {body}\n){tail.rstrip()}")
+    statements.extend(alters)
+
+    for table in catalog.tables.values():
+        for foreign_key in table.foreign_keys:
+            if not table.indexed(foreign_key.columns):
+                columns = ", ".join(foreign_key.columns)
+                index = _index_name(table.name, foreign_key.columns)
+                statements.append(f"CREATE INDEX IF NOT EXISTS {index} ON {table.name} ({columns})")
+                table.indexes.append(Index(index, table.name, foreign_key.columns))
+                fixes.append(f"{table.name}: indexed foreign key ({columns})")
+
+    if not fixes:
+        return LintedSchema(sql=sql, violations=violations)
+    fixed = "\n\n".join(s if s.endswith(";") else s + ";" for s in statements)
+    return LintedSchema(sql=fixed, fixes=fixes, violations=violations)
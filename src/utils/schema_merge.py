@@ -0,0 +1,139 @@
+"""Merging per-context sub-schemas into one PostgreSQL schema.
+
+For very large requirements the architect designs one sub-schema per bounded
+context, in parallel (see :mod:`src.nodes.architect`). Each sub-schema only
+sees its own context, so the pieces disagree at the seams: a shared table is
+defined twice, a foreign key points at ``user`` where the owning context
+created ``users``, two contexts declare the same enum. :func:`merge_schemas`
+reconciles them with a local DDL parse and checks the result.
+"""
+
+from dataclasses import dataclass, field
+
+from src.utils.ddl import (
+    entity_name,
+    index_table,
+    parse_tables,
+    referenced_tables,
+    rename_references,
+    split_statements,
+    statement_key,
+)
+
+# Emitted in this order; tables are additionally sorted so referenced tables come first.
+_KIND_ORDER = ("extension", "type", "domain", "sequence", "function", "table", "index")
+
+
+@dataclass(frozen=True)
+class MergedSchema:
+    """The merged DDL and what the merge did or could not fix."""
+
+    sql: str
+    notes: list[str] = field(default_factory=list)  # Duplicates dropped, references renamed
+    problems: list[str] = field(default_factory=list)  # Left for the reviewer / DDL checks
+
+
+def _normalize(statement: str) -> str:
+    return " ".join(statement.split()).lower()
+
+
+def _by_dependency(tables: dict[str, str]) -> list[str]:
+    """Table names with every referenced table before its referrers (cycles keep order)."""
+    ordered: list[str] = []
+    visiting: set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in ordered or name in visiting:
+            return
+        visiting.add(name)
+        for target in referenced_tables(tables[name]):
+            if target in tables and target != name:
+                visit(target)
+        visiting.discard(name)
+        ordered.append(name)
+
+    for name in tables:
+        visit(name)
+    return ordered
+
+
+def merge_schemas(
+    parts: list[tuple[str, str]], owners: dict[str, str] | None = None
+) -> MergedSchema:
+    """Merge ``(context, sql)`` sub-schemas into one schema.
+
+    Args:
+        parts: Each context's name and DDL.
+        owners: Entity name (see :func:`src.utils.ddl.entity_name`) → the
+                context that owns it; its definition wins when several
+                contexts create the same table. Otherwise the first wins.
+
+    Returns:
+        The merged schema. Named objects created twice are kept once;
+        references to a table under another spelling (``user``/``users``)
+        are renamed to the table that exists; references that still do not
+        resolve are reported in ``problems``.
+    """
+    owners = owners or {}
+    named: dict[tuple[str, str], tuple[str, str]] = {}  # (kind, name) → (context, statement)
+    other: dict[str, str] = {}  # normalized → statement, e.g. ALTER TABLE / COMMENT ON
+    notes: list[str] = []
+
+    for context, sql in parts:
+        for statement in split_statements(sql):
+            key = statement_key(statement)
+            if key is None:
+                other.setdefault(_normalize(statement), statement)
+                continue
+            if key not in named:
+                named[key] = (context, statement)
+                continue
+            kept_context, kept = named[key]
+            if _normalize(kept) == _normalize(statement):
+                continue
+            kind, name = key
+            if kind == "table" and owners.get(entity_name(name)) == context:
+                named[key] = (context, statement)
+                kept_context = context
+            notes.append(f"{kind} {name} defined by several contexts; kept {kept_context}'s")
+
+    # Indexes on a table are only valid for the definition that was kept.
+    table_contexts = {name: ctx for (kind, name), (ctx, _) in named.items() if kind == "table"}
+    for (kind, name), (context, statement) in list(named.items()):
+        table = index_table(statement) if kind == "index" else None
+        if table in table_contexts and table_contexts[table] != context:
+            del named[(kind, name)]
+            notes.append(f"index {name} dropped: {table} is defined by {table_contexts[table]}")
+
+    # Point references spelled differently (user → users) at the table that exists.
+    spellings = {entity_name(name): name for name in table_contexts}
+    renames: dict[str, str] = {}
+    for _, statement in named.values():
+        for target in referenced_tables(statement):
+            match = spellings.get(entity_name(target))
+            if target not in table_contexts and match:
+                renames[target] = match
+    for target, match in renames.items():
+        notes.append(f"references to {target} renamed to {match}")
+    named = {key: (ctx, rename_references(stmt, renames)) for key, (ctx, stmt) in named.items()}
+    other = {norm: rename_references(stmt, renames) for norm, stmt in other.items()}
+
+    tables = {name: stmt for (kind, name), (_, stmt) in named.items() if kind == "table"}
+    statements: list[str] = []
+    for kind in _KIND_ORDER:
+        if kind == "table":
+            statements.extend(tables[name] for name in _by_dependency(tables))
+        else:
+            statements.extend(stmt for (k, _), (_, stmt) in named.items() if k == kind)
+    statements.extend(stmt for (k, _), (_, stmt) in named.items() if k not in _KIND_ORDER)
+    statements.extend(other.values())
+    sql = "\n\n".join(s if s.endswith(";") else s + ";" for s in statements)
+
+    merged_tables = parse_tables(sql)
+    problems = [
+        f"{name} references {target}, which no context defines"
+        for name, statement in merged_tables.items()
+        for target in referenced_tables(statement)
+        if target not in merged_tables
+    ]
+    return MergedSchema(sql=sql, notes=notes, problems=problems)
@@ -0,0 +1,106 @@
+"""Per-entity sharding of developer generation for large schemas.
+
+With ``PipelineConfig.shard_threshold`` tables or more, one developer call is
+slow and often truncated. Instead the schema is split by table: each entity's
+``routes/<entity>.routes.js`` and ``controllers/<entity>.controller.js`` are
+generated in their own call, all in parallel, next to a small shared call for
+``server.js``, ``db/pool.js`` and ``package.json``. Latency then follows the
+largest entity rather than the whole schema. The assembled files are checked
+for consistency (every route file present and mounted in ``server.js``, every
+controller wired to its routes and the pool) before they leave the node.
+"""
+
+import concurrent.futures
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+from src.utils.ddl import entity_name, parse_tables, referenced_tables, type_definitions
+from src.utils.file_map import FileMap
+
+T = TypeVar("T")
+
+SHARED_FILES = ("server.js", "db/pool.js", "package.json")
+
+_shard_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=16, thread_name_prefix="llm-shard"
+)
+
+
+@dataclass(frozen=True)
+class EntityShard:
+    """One table's slice of the backend."""
+
+    entity: str
+    table: str
+    ddl: str  # The table's statement, the tables it references, and shared types
+
+    @property
+    def routes_path(self) -> str:
+        return f"routes/{self.entity}.routes.js"
+
+    @property
+    def controller_path(self) -> str:
+        return f"controllers/{self.entity}.controller.js"
+
+    @property
+    def mount_path(self) -> str:
+        return f"/api/{self.table}"
+
+
+def entity_shards(db_schema: str) -> list[EntityShard]:
+    """One shard per table, each carrying the DDL it needs to be written alone."""
+    tables = parse_tables(db_schema)
+    types = type_definitions(db_schema)
+    shards = []
+    for table, statement in tables.items():
+        context = [tables[name] for name in referenced_tables(statement)
+                   if name in tables and name != table]
+        entity = entity_name(table)
+        if any(shard.entity == entity for shard in shards):
+            entity = table  # e.g. "status" and "statuses"
+        shards.append(EntityShard(
+            entity=entity,
+            table=table,
+            ddl="\n\n".join([*types, *context, statement]),
+        ))
+    return shards
+
+
+def shards_for(db_schema: str, threshold: int) -> list[EntityShard]:
+    """Shards for *db_schema* if it has at least *threshold* tables, else []."""
+    if threshold <= 0:
+        return []
+    shards = entity_shards(db_schema)
+    return shards if len(shards) >= threshold else []
+
+
+def run_parallel(jobs: list[Callable[[], T]]) -> list[T]:
+    """Run *jobs* in threads and return their results in order (first error raises)."""
+    return list(_shard_pool.map(lambda job: job(), jobs))
+
+
+def _mentions(content: str, module: str) -> bool:
+    """Does *content* require/import *module* (a path without ``.js``)?"""
+    return re.search(rf"['\"](?:\.{{1,2}}/)*{re.escape(module)}(?:\.js)?['\"]", content) is not None
+
+
+def check_consistency(files: FileMap, shards: list[EntityShard]) -> list[tuple[str, str]]:
+    """Problems in the assembled files, as ``(path, message)`` pairs."""
+    problems = [(path, "file is missing") for path in SHARED_FILES if path not in files]
+    server = files.get("server.js", {}).get("content", "")
+    for shard in shards:
+        routes = files.get(shard.routes_path)
+        controller = files.get(shard.controller_path)
+        if routes is None:
+            problems.append((shard.routes_path, "file is missing"))
+        elif not _mentions(routes["content"], f"controllers/{shard.entity}.controller"):
+            problems.append((shard.routes_path, f"does not require {shard.controller_path}"))
+        if controller is None:
+            problems.append((shard.controller_path, "file is missing"))
+        elif not _mentions(controller["content"], "db/pool"):
+            problems.append((shard.controller_path, "does not require db/pool.js"))
+        if "server.js" in files and not _mentions(server, f"routes/{shard.entity}.routes"):
+            problems.append(("server.js", f"does not mount {shard.routes_path} at {shard.mount_path}"))
+    return problems
@@ -0,0 +1,92 @@
+"""First-accepted-wins racing for speculative candidates.
+
+With ``PipelineConfig.candidates > 1`` the developer node generates several
+implementations at once, each at its own temperature, and reviews each one as
+soon as it is written. The first candidate the reviewer approves wins and the
+remaining in-flight calls are cancelled, trading a little extra token spend
+for fewer sequential developer↔reviewer rounds.
+"""
+
+import asyncio
+import concurrent.futures
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Candidate i runs at the routed temperature plus i steps, capped at the max.
+TEMPERATURE_STEP = 0.25
+MAX_TEMPERATURE = 1.0
+
+_speculative_pool = concurrent.futures.ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="llm-speculative"
+)
+
+
+def candidate_temperatures(base: float, count: int) -> list[float]:
+    """Temperatures for *count* candidates, starting at the routed *base*."""
+    return [round(min(base + i * TEMPERATURE_STEP, MAX_TEMPERATURE), 2) for i in range(count)]
+
+
+def first_accepted(
+    jobs: list[Callable[[], T]], accept: Callable[[T], bool]
+) -> tuple[T | None, list[T]]:
+    """Run *jobs* in threads and stop at the first result *accept* approves.
+
+    Returns:
+        ``(winner, finished)``: the accepted result (None if no job's result
+        was accepted) and every result that completed, in completion order.
+
+    Raises:
+        The last error if every job fails.
+
+    Note:
+        Threads already running a losing job cannot be interrupted; their
+        results are discarded. Use :func:`afirst_accepted` for cancellation.
+    """
+    pending = {_speculative_pool.submit(job) for job in jobs}
+    finished: list[T] = []
+    last_error: BaseException | None = None
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            error = future.exception()
+            if error is not None:
+                last_error = error
+                continue
+            finished.append(future.result())
+            if accept(finished[-1]):
+                for loser in pending:
+                    loser.cancel()
+                return finished[-1], finished
+    if not finished and last_error is not None:
+        raise last_error
+    return None, finished
+
+
+async def afirst_accepted(
+    jobs: list[Callable[[], Awaitable[T]]], accept: Callable[[T], bool]
+) -> tuple[T | None, list[T]]:
+    """Async variant of :func:`first_accepted`; losing jobs are cancelled."""
+    pending = {asyncio.ensure_future(job()) for job in jobs}
+    finished: list[T] = []
+    last_error: BaseException | None = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if error is not None:
+                    last_error = error
+                    continue
+                finished.append(task.result())
+                if accept(finished[-1]):
+                    return finished[-1], finished
+    finally:
+        for task in pending:
+            task.cancel()
+    if not finished and last_error is not None:
+        raise last_error
+    return None, finished
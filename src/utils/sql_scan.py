@@ -0,0 +1,524 @@
+"""Local static scan for SQL built from strings in the generated JavaScript.
+
+The reviewer's first check — queries assembled by string interpolation or
+concatenation instead of ``$1`` placeholders — needs no model. This module
+tokenizes each ``.js`` file (strings, template literals and comments are
+recognized, so code inside them is not mistaken for calls) and inspects the
+first argument of every ``.query(...)`` call, following a variable back to
+its nearest assignment in scope and any ``+=`` onto it. An argument builds
+SQL from values when it is a template literal that interpolates something,
+or a ``+`` concatenation of a string with something that is not a constant —
+joining literals, or variables holding only literals, is just how long
+queries are wrapped. ``$${i}``-style interpolations that only number
+placeholders are allowed.
+
+Such a query is unsafe when a value it interpolates reaches the request
+(``req``/``request``) or a parameter of an enclosing function, through
+variables, destructuring and ``for ... of`` loops; arguments of predicate
+methods such as ``.filter(...)`` do not flow into the result. The rest —
+typically ``SET ${fields.map(...).join(', ')}`` over an allow-listed column
+list, which placeholders cannot express — are only worth a look and are
+reported separately by :func:`sql_fragments`.
+
+Findings are feedback items in the reviewer's ``[file] (category) message``
+format.
+"""
+
+import re
+from dataclasses import dataclass
+
+from src.utils.file_map import FileMap
+
+JS_SUFFIXES = (".js", ".mjs", ".cjs")
+_IDENTIFIER = re.compile(r"[A-Za-z_$][\w$]*")
+# A new statement starts here even without a semicolon before it.
+_STATEMENT_KEYWORDS = {"const", "let", "var", "return", "if", "for", "while", "throw", "try"}
+_DECLARATIONS = ("const", "let", "var")
+_CONTROL_KEYWORDS = {"if", "for", "while", "switch", "catch", "with"}
+# Values read from these come from the client.
+_REQUEST_NAMES = {"req", "request"}
+# Methods whose arguments are predicates or lookups: nothing in them reaches the result.
+_PREDICATE_METHODS = {"filter", "find", "findIndex", "some", "every", "includes", "indexOf", "has"}
+
+
+@dataclass(frozen=True)
+class Token:
+    """One lexical token of a JavaScript file."""
+
+    kind: str  # "string", "template", "ident", "punct"
+    text: str
+    line: int
+    interpolates: bool = False  # template literal with a ${...} that is not a $${n} placeholder
+
+
+def _template_end(source: str, start: int) -> tuple[int, bool]:
+    """End index of the template literal opening at *start*, and whether it interpolates."""
+    i = start + 1
+    interpolates = False
+    while i < len(source):
+        char = source[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "`":
+            return i + 1, interpolates
+        if source.startswith("${", i):
+            if source[i - 1] != "$":
+                interpolates = True
+            depth = 1
+            i += 2
+            while i < len(source) and depth:
+                if source[i] == "{":
+                    depth += 1
+                elif source[i] == "}":
+                    depth -= 1
+                elif source[i] == "`":
+                    i, nested = _template_end(source, i)
+                    interpolates = interpolates or nested
+                    continue
+                i += 1
+            continue
+        i += 1
+    return len(source), interpolates
+
+
+def _interpolations(template: str) -> list[str]:
+    """The ``${...}`` expressions of a template literal, except ``$${n}`` placeholder numbers."""
+    expressions = []
+    i = 1
+    while i < len(template) - 1:
+        if template[i] == "\\":
+            i += 2
+            continue
+        if not template.startswith("${", i):
+            i += 1
+            continue
+        depth = 1
+        j = i + 2
+        while j < len(template) and depth:
+            if template[j] == "`":
+                j = _template_end(template, j)[0]
+                continue
+            depth += {"{": 1, "}": -1}.get(template[j], 0)
+            j += 1
+        if template[i - 1] != "$":
+            expressions.append(template[i + 2:j - 1])
+        i = j
+    return expressions
+
+
+def tokenize(source: str) -> list[Token]:
+    """Split JavaScript into strings, template literals, identifiers and punctuation."""
+    tokens: list[Token] = []
+    i = 0
+    line = 1
+    while i < len(source):
+        char = source[i]
+        if char.isspace():
+            line += char == "\n"
+            i += 1
+        elif source.startswith("//", i):
+            end = source.find("\n", i)
+            i = len(source) if end == -1 else end
+        elif source.startswith("/*", i):
+            end = source.find("*/", i + 2)
+            end = len(source) if end == -1 else end + 2
+            line += source.count("\n", i, end)
+            i = end
+        elif char in "'\"":
+            end = i + 1
+            while end < len(source) and source[end] not in (char, "\n"):
+                end += 2 if source[end] == "\\" else 1
+            tokens.append(Token("string", source[i:end + 1], line))
+            i = end + 1
+        elif char == "`":
+            end, interpolates = _template_end(source, i)
+            tokens.append(Token("template", source[i:end], line, interpolates))
+            line += source.count("\n", i, end)
+            i = end
+        else:
+            match = _IDENTIFIER.match(source, i)
+            if match:
+                tokens.append(Token("ident", match.group(), line))
+                i = match.end()
+            else:
+                tokens.append(Token("punct", source[i:i + 2] if source.startswith("+=", i) else char, line))
+                i += len(tokens[-1].text)
+    return tokens
+
+
+def _expression(tokens: list[Token], start: int, stops: tuple[str, ...]) -> list[Token]:
+    """Tokens from *start* up to the first of *stops* at bracket depth 0."""
+    depth = 0
+    expression = []
+    for token in tokens[start:]:
+        if depth == 0 and expression and token.kind == "ident" and token.text in _STATEMENT_KEYWORDS:
+            break
+        if token.kind == "punct":
+            if token.text in "([{":
+                depth += 1
+            elif token.text in ")]}":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif depth == 0 and token.text in stops:
+                break
+        expression.append(token)
+    return expression
+
+
+def _blocks(tokens: list[Token]) -> list[tuple[int, ...]]:
+    """For each token, the indices of the ``{`` blocks it is inside, outermost first."""
+    stack: list[int] = []
+    blocks = []
+    for i, token in enumerate(tokens):
+        if token.kind == "punct" and token.text == "}" and stack:
+            stack.pop()
+        blocks.append(tuple(stack))
+        if token.kind == "punct" and token.text == "{":
+            stack.append(i)
+    return blocks
+
+
+def _contains(blocks: list[tuple[int, ...]], outer: int, inner: int) -> bool:
+    """Whether token *inner* is inside the block that token *outer* is in."""
+    return blocks[inner][:len(blocks[outer])] == blocks[outer]
+
+
+def _matching(tokens: list[Token]) -> dict[int, int]:
+    """Index of the matching bracket of each bracket token, in both directions."""
+    pairs: dict[int, int] = {}
+    stack: list[int] = []
+    for i, token in enumerate(tokens):
+        if token.kind != "punct":
+            continue
+        if token.text in "([{":
+            stack.append(i)
+        elif token.text in ")]}" and stack:
+            j = stack.pop()
+            pairs[i], pairs[j] = j, i
+    return pairs
+
+
+def _functions(tokens: list[Token]) -> list[tuple[set[str], int, int]]:
+    """``(parameter names, body start, body end)`` of each function and arrow function."""
+    pairs = _matching(tokens)
+    functions = []
+    for i, token in enumerate(tokens[:-1]):
+        if token.text == "=" and tokens[i + 1].text == ">" and i > 0:  # arrow function
+            if tokens[i - 1].kind == "ident":
+                parameters = {tokens[i - 1].text}
+            elif tokens[i - 1].text == ")" and i - 1 in pairs:
+                parameters = {t.text for t in tokens[pairs[i - 1] + 1:i - 1] if t.kind == "ident"}
+            else:
+                continue
+            start = i + 2
+            if start < len(tokens) and tokens[start].text == "{":
+                end = pairs.get(start, len(tokens) - 1) + 1
+            else:
+                end = start + len(_expression(tokens, start, (",", ";")))
+            functions.append((parameters, start, end))
+        elif token.text == ")" and tokens[i + 1].text == "{" and pairs.get(i, 0) > 0:
+            before = tokens[pairs[i] - 1]  # function name(...) {, function (...) {, name(...) {
+            if before.kind == "ident" and before.text not in _CONTROL_KEYWORDS:
+                parameters = {t.text for t in tokens[pairs[i] + 1:i] if t.kind == "ident"}
+                functions.append((parameters, i + 1, pairs.get(i + 1, len(tokens) - 1) + 1))
+    return functions
+
+
+def _property(tokens: list[Token], i: int) -> bool:
+    """Whether identifier *i* is a property (``obj.name``) rather than a variable (``...name``)."""
+    return i > 0 and tokens[i - 1].text == "." and not (i > 2 and tokens[i - 2].text == tokens[i - 3].text == ".")
+
+
+def _assignments(
+    tokens: list[Token], blocks: list[tuple[int, ...]], name: str, before: int
+) -> list[tuple[str, int, int]]:
+    """``(operator, start, end)`` right-hand sides of what *name* holds at index *before*.
+
+    That is the nearest preceding ``name = ...`` in scope — in the block of
+    *before* or one enclosing it, so a same-named variable of another function
+    is ignored — and every later ``=``/``+=`` onto *name* inside its block.
+    """
+    found = []
+    for i in range(before - 1):
+        token, following = tokens[i], tokens[i + 1]
+        if token.kind != "ident" or token.text != name or following.text not in ("=", "+="):
+            continue
+        if i > 0 and tokens[i - 1].text == ".":
+            continue  # obj.name = ...
+        if following.text == "=" and i + 2 < len(tokens) and tokens[i + 2].text in ("=", ">"):
+            continue  # == / === / =>
+        # For += only the appended part matters: a constant " AND x = $2" is fine.
+        found.append((following.text, i + 2, i + 2 + len(_expression(tokens, i + 2, (";", ",")))))
+    visible = [start for operator, start, _ in found if operator == "=" and _contains(blocks, start, before)]
+    if not visible:
+        return []
+    return [
+        (operator, start, end) for operator, start, end in found
+        if start >= visible[-1] and _contains(blocks, visible[-1], start)
+    ]
+
+
+def _declarations(
+    tokens: list[Token], blocks: list[tuple[int, ...]], name: str, before: int
+) -> list[tuple[int, int]]:
+    """``(start, end)`` of what destructuring and ``for ... of`` declarations of *name* read.
+
+    ``const { name } = req.body`` reads ``req.body``, ``for (const name of rows)``
+    reads ``rows``; only declarations visible at index *before* count.
+    """
+    spans = []
+    for i in range(1, before):
+        token = tokens[i]
+        if token.kind != "ident" or token.text != name or _property(tokens, i):
+            continue
+        following = tokens[i + 1].text
+        if tokens[i - 1].text in _DECLARATIONS and following in ("of", "in"):
+            if _contains(blocks, i, before):
+                spans.append((i + 2, i + 2 + len(_expression(tokens, i + 2, ()))))
+            continue
+        if following == ":":
+            continue  # { key: name } destructures into the other name
+        depth = 0
+        j = i - 1
+        while j > 0:
+            text = tokens[j].text if tokens[j].kind == "punct" else ""
+            if text and text in ")]}":
+                depth += 1
+            elif text and text in "([{":
+                if depth == 0:
+                    break
+                depth -= 1
+            elif text == ";" and depth == 0:
+                break
+            j -= 1
+        # The pattern's own braces are not a block: scope by the declaration keyword.
+        if tokens[j].text in ("{", "[") and tokens[j - 1].text in _DECLARATIONS and _contains(blocks, j - 1, before):
+            close = j + 1 + len(_expression(tokens, j + 1, ()))
+            if close + 1 < len(tokens) and tokens[close + 1].text == "=":
+                start = close + 2
+                spans.append((start, start + len(_expression(tokens, start, (";", ",")))))
+    return spans
+
+
+def _free_names(tokens: list[Token]) -> set[str]:
+    """Variables *tokens* read from outside them.
+
+    Property names, object keys, the parameters of functions inside *tokens*
+    and the arguments of predicate methods (``.filter(...)``, ``.includes(...)``)
+    are left out; template literals contribute their interpolations.
+    """
+    pairs = _matching(tokens)
+    skipped: set[int] = set()
+    for i in range(1, len(tokens) - 1):
+        if tokens[i - 1].text == "." and tokens[i].text in _PREDICATE_METHODS and tokens[i + 1].text == "(":
+            skipped.update(range(i + 1, pairs.get(i + 1, len(tokens) - 1) + 1))
+    names: set[str] = set()
+    for i, token in enumerate(tokens):
+        if i in skipped:
+            continue
+        if token.kind == "template":
+            for expression in _interpolations(token.text):
+                names |= _free_names(tokenize(expression))
+        elif token.kind == "ident" and not _property(tokens, i):
+            if i + 1 < len(tokens) and tokens[i + 1].text == ":" and i > 0 and tokens[i - 1].text in ("{", ","):
+                continue  # { key: value }
+            names.add(token.text)
+    for parameters, _, _ in _functions(tokens):
+        names -= parameters
+    return names
+
+
+def _tainted(
+    tokens: list[Token],
+    blocks: list[tuple[int, ...]],
+    functions: list[tuple[set[str], int, int]],
+    names: set[str],
+    at: int,
+    seen: frozenset[str] = frozenset(),
+) -> bool:
+    """Whether any of *names*, read at index *at*, holds a request value or a function parameter."""
+    for name in names - seen:
+        if name in _REQUEST_NAMES:
+            return True
+        if any(name in parameters and start <= at < end for parameters, start, end in functions):
+            return True
+        sources = [(s, e) for _, s, e in _assignments(tokens, blocks, name, at)]
+        sources += _declarations(tokens, blocks, name, at)
+        if any(_tainted(tokens, blocks, functions, _free_names(tokens[s:e]), s, seen | {name})
+               for s, e in sources):
+            return True
+    return False
+
+
+def _operands(tokens: list[Token], start: int, end: int) -> list[tuple[int, int]]:
+    """``(start, end)`` of each operand of the top-level ``+`` chain in ``tokens[start:end]``."""
+    operands = []
+    depth = 0
+    begin = start
+    for i in range(start, end):
+        text = tokens[i].text if tokens[i].kind == "punct" else ""
+        if text and text in "([{":
+            depth += 1
+        elif text and text in ")]}":
+            depth -= 1
+        elif text == "+" and depth == 0:
+            operands.append((begin, i))
+            begin = i + 1
+    operands.append((begin, end))
+    return operands
+
+
+def _constant(
+    tokens: list[Token], blocks: list[tuple[int, ...]], start: int, end: int, seen: frozenset[str]
+) -> bool:
+    """Whether ``tokens[start:end]`` is a ``+`` chain of literals and variables holding only literals."""
+    for begin, stop in _operands(tokens, start, end):
+        operand = tokens[begin:stop]
+        if operand and all(
+            token.kind == "string"
+            or token.kind == "template" and not token.interpolates
+            or token.kind == "punct" and (token.text.isdigit() or token.text == ".")
+            for token in operand
+        ):
+            continue
+        if len(operand) == 1 and operand[0].kind == "ident" and operand[0].text not in seen:
+            name = operand[0].text
+            held = _assignments(tokens, blocks, name, begin)
+            if held and all(_constant(tokens, blocks, s, e, seen | {name}) for _, s, e in held):
+                continue
+        return False
+    return True
+
+
+def _unsafe(
+    tokens: list[Token],
+    blocks: list[tuple[int, ...]],
+    functions: list[tuple[set[str], int, int]],
+    start: int,
+    end: int,
+) -> tuple[str, bool] | None:
+    """How ``tokens[start:end]`` builds SQL from values and whether they reach the request, or None."""
+    expression = tokens[start:end]
+    templates = [token for token in expression if token.kind == "template" and token.interpolates]
+    has_plus = any(token.kind == "punct" and token.text == "+" for token in expression)
+    has_string = any(token.kind in ("string", "template") for token in expression) or has_plus and any(
+        tokens[s].kind in ("string", "template")
+        for begin, stop in _operands(tokens, start, end)
+        if stop - begin == 1 and tokens[begin].kind == "ident"
+        for _, s, e in _assignments(tokens, blocks, tokens[begin].text, begin)
+        if e > s
+    )
+    # Joining constant pieces ('SELECT ... ' + 'WHERE id = $1') is just line wrapping.
+    concatenated = has_string and has_plus and not _constant(tokens, blocks, start, end, frozenset())
+    if not templates and not concatenated:
+        return None
+    names = set().union(*(_free_names([token]) for token in templates))
+    if concatenated:
+        for begin, stop in _operands(tokens, start, end):
+            if not _constant(tokens, blocks, begin, stop, frozenset()):
+                names |= _free_names(tokens[begin:stop])
+    reason = "a template literal interpolating values" if templates else "string concatenation"
+    return reason, _tainted(tokens, blocks, functions, names, start)
+
+
+@dataclass(frozen=True)
+class QueryCall:
+    """One ``.query(...)`` call: its first argument and what was assigned to it, if a variable."""
+
+    line: int
+    argument: list[Token]
+    assignments: list[tuple[str, list[Token]]]  # ("=" or "+=", right-hand side), in order
+
+    @property
+    def variable(self) -> str | None:
+        if len(self.argument) == 1 and self.argument[0].kind == "ident":
+            return self.argument[0].text
+        return None
+
+
+def _query_spans(tokens: list[Token], blocks: list[tuple[int, ...]]):
+    """``(call index, argument span, assignment spans)`` of each ``.query(...)`` call."""
+    for i in range(len(tokens) - 2):
+        if not (tokens[i].text == "." and tokens[i + 1].text == "query" and tokens[i + 2].text == "("):
+            continue
+        argument = (i + 3, i + 3 + len(_expression(tokens, i + 3, (",",))))
+        is_variable = argument[1] - argument[0] == 1 and tokens[argument[0]].kind == "ident"
+        assignments = _assignments(tokens, blocks, tokens[argument[0]].text, i) if is_variable else []
+        yield i, argument, assignments
+
+
+def query_calls(source: str) -> list[QueryCall]:
+    """Every ``.query(...)`` call in *source*, in order."""
+    tokens = tokenize(source)
+    return [
+        QueryCall(
+            tokens[i + 1].line,
+            tokens[start:end],
+            [(operator, tokens[s:e]) for operator, s, e in assignments],
+        )
+        for i, (start, end), assignments in _query_spans(tokens, _blocks(tokens))
+    ]
+
+
+def _findings(source: str) -> list[tuple[int, str, bool]]:
+    """``(line, reason, reaches the request)`` for each ``.query(...)`` whose SQL is built from values."""
+    tokens = tokenize(source)
+    blocks = _blocks(tokens)
+    functions = _functions(tokens)
+    findings = []
+    for i, (start, end), assignments in _query_spans(tokens, blocks):
+        found = _unsafe(tokens, blocks, functions, start, end)
+        if found is None:
+            built = [
+                (f"{reason} (assigned to `{tokens[start].text}`)", tainted)
+                for reason, tainted in (
+                    _unsafe(tokens, blocks, functions, s, e) or (None, False) for _, s, e in assignments
+                )
+                if reason
+            ]
+            found = next((item for item in built if item[1]), built[0] if built else None)
+        if found:
+            findings.append((tokens[i + 1].line, *found))
+    return findings
+
+
+def scan_source(source: str) -> list[tuple[int, str]]:
+    """``(line, reason)`` for each ``.query(...)`` whose SQL is built from request values."""
+    return [(line, reason) for line, reason, tainted in _findings(source) if tainted]
+
+
+def sql_fragments(source: str) -> list[tuple[int, str]]:
+    """``(line, reason)`` for each ``.query(...)`` whose SQL is built from other values.
+
+    These are usually identifier lists (``SET ${sets.join(', ')}``) that
+    placeholders cannot express; whether they are safe depends on where the
+    identifiers come from, which the reviewer judges.
+    """
+    return [(line, reason) for line, reason, tainted in _findings(source) if not tainted]
+
+
+def javascript_files(file_map: FileMap) -> dict[str, str]:
+    """path → content of the map's JavaScript files."""
+    return {path: entry["content"] for path, entry in file_map.items() if path.endswith(JS_SUFFIXES)}
+
+
+def scan_files(file_map: FileMap) -> list[str]:
+    """Feedback items for every unsafe query in the map's JavaScript files."""
+    return [
+        f"[{path}] (sql_injection) line {line}: query SQL is built with {reason}; "
+        f"use $1, $2, ... placeholders and pass the values as the query's parameter array"
+        for path, content in javascript_files(file_map).items()
+        for line, reason in scan_source(content)
+    ]
+
+
+def fragment_files(file_map: FileMap) -> list[str]:
+    """Hints for the reviewer on every query in the map built from non-request values."""
+    return [
+        f"[{path}] (sql_fragment) line {line}: query SQL is built with {reason} that do not "
+        f"come from the request; check that only allow-listed identifiers (e.g. column names) reach it"
+        for path, content in javascript_files(file_map).items()
+        for line, reason in sql_fragments(content)
+    ]
@@ -0,0 +1,128 @@
+"""Schema-constrained outputs for the reviewer, the developer and the architect's plan.
+
+The schemas are bound to the model as a forced tool call, so the reply arrives
+as JSON arguments instead of free text. Arguments are validated locally with
+pydantic; when a reply carries no valid call (the endpoint ignored the tool,
+or the JSON was cut off) callers fall back to parsing the text.
+"""
+
+from typing import Any, Literal, TypeVar
+
+from pydantic import BaseModel, Field, ValidationError, model_validator
+
+IssueCategory = Literal[
+    "sql_injection",
+    "error_handling",
+    "schema_mismatch",
+    "missing_crud",
+    "bad_import",
+    "input_validation",
+    "foreign_key",
+    "credentials",
+    "other",
+]
+
+
+class ReviewIssue(BaseModel):
+    """One specific bug or vulnerability found in the code."""
+
+    file: str = Field(description="Path of the file with the problem, e.g. controllers/user.controller.js")
+    category: IssueCategory = Field(description="Kind of problem")
+    message: str = Field(description="What is wrong and where, in one or two sentences")
+
+
+class ReviewVerdict(BaseModel):
+    """Submit the review: approve the code, or request changes listing every issue."""
+
+    verdict: Literal["approved", "changes_requested"]
+    issues: list[ReviewIssue] = Field(
+        default_factory=list, description="Every issue found; empty when approved"
+    )
+
+
+class GeneratedFile(BaseModel):
+    """One source file of the generated backend."""
+
+    path: str = Field(description="Relative path, e.g. routes/user.routes.js or package.json")
+    language: str = Field(default="javascript", description="Code fence language, e.g. javascript or json")
+    content: str = Field(description="Complete file contents")
+
+
+class GeneratedFiles(BaseModel):
+    """Submit the complete backend as a list of files."""
+
+    files: list[GeneratedFile] = Field(min_length=1)
+
+
+class FileChange(BaseModel):
+    """One changed, new or deleted file: full contents, a unified diff, or delete."""
+
+    path: str = Field(description="Relative path, e.g. controllers/user.controller.js")
+    language: str | None = Field(default=None, description="Code fence language for new files")
+    content: str | None = Field(default=None, description="Complete new contents of the file")
+    diff: str | None = Field(
+        default=None, description="Unified diff against the current file (@@ hunks)"
+    )
+    delete: bool = Field(default=False, description="Remove the file")
+
+    @model_validator(mode="after")
+    def _one_kind_of_change(self) -> "FileChange":
+        if sum((self.content is not None, self.diff is not None, self.delete)) != 1:
+            raise ValueError("set exactly one of content, diff or delete")
+        return self
+
+
+class FilePatches(BaseModel):
+    """Submit only the files that change; unchanged files are kept as they are."""
+
+    files: list[FileChange] = Field(min_length=1)
+
+
+class BoundedContext(BaseModel):
+    """One bounded context of the system, designed as its own sub-schema."""
+
+    name: str = Field(description="Short snake_case name, e.g. billing")
+    requirements: str = Field(description="The parts of the requirements this context covers, verbatim or closely paraphrased")
+    entities: list[str] = Field(description="snake_case plural table names this context owns")
+    references: list[str] = Field(
+        default_factory=list,
+        description="Tables owned by other contexts that this context's tables point at",
+    )
+
+
+class BoundedContexts(BaseModel):
+    """Submit the split of the requirements into bounded contexts; every entity in exactly one."""
+
+    contexts: list[BoundedContext] = Field(min_length=1)
+
+
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def parse_tool_output(response: Any, schema: type[SchemaT]) -> SchemaT | None:
+    """Validate the *schema* tool call in *response*, or return None.
+
+    Args:
+        response: An AIMessage from a model with *schema* bound as a tool.
+        schema: The pydantic model the call's arguments must satisfy.
+    """
+    for call in getattr(response, "tool_calls", None) or []:
+        if not isinstance(call, dict) or call.get("name") != schema.__name__:
+            continue
+        try:
+            return schema.model_validate(call.get("args") or {})
+        except ValidationError:
+            return None
+    return None
+
+
+def format_issue(issue: ReviewIssue) -> str:
+    """Render an issue as a feedback line for the developer prompt."""
+    return f"[{issue.file}] ({issue.category}) {issue.message}"
+
+
+def render_files(files: GeneratedFiles) -> str:
+    """Render files as labeled code blocks, the format ``parse_code_blocks`` reads."""
+    return "\n\n".join(
+        f"```{f.language} // {f.path}\n{f.content.strip(chr(10))}\n```" for f in files.files
+    )
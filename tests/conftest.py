@@ -0,0 +1,166 @@
+"""Shared fixtures: local OpenAI-compatible stub servers."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class _QuietServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        pass  # clients dropping keep-alive connections at teardown
+
+
+def _pick(value, turn: int):
+    if isinstance(value, list):
+        return value[min(turn, len(value) - 1)]
+    return value
+
+
+def _sse_chunks(request: dict, content: str, finish_reason: str) -> list[bytes]:
+    """A streamed reply: content in two deltas, the finish reason, then usage."""
+
+    def chunk(delta: dict, finish: str | None = None, usage: dict | None = None) -> bytes:
+        payload = {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": request["model"],
+            "choices": [] if usage else [
+                {"index": 0, "delta": delta, "finish_reason": finish}
+            ],
+        }
+        if usage:
+            payload["usage"] = usage
+        return f"data: {json.dumps(payload)}\n\n".encode()
+
+    half = len(content) // 2
+    chunks = [
+        chunk({"role": "assistant", "content": content[:half]}),
+        chunk({"content": content[half:]}),
+        chunk({}, finish_reason),
+    ]
+    if (request.get("stream_options") or {}).get("include_usage"):
+        chunks.append(chunk({}, usage={
+            "prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5,
+        }))
+    chunks.append(b"data: [DONE]\n\n")
+    return chunks
+
+
+class StubServer:
+    """A local ``/v1/chat/completions`` server with scriptable behaviour.
+
+    Attributes:
+        reply: Content returned in the assistant message, or a list of
+               contents returned in turn (the last one repeats).
+        delay: Seconds to sleep before answering.
+        status: HTTP status to return (non-200 sends an error body).
+        finish_reason: ``finish_reason`` to report, or a list used in turn.
+        chunk_delay: Seconds between the first and the remaining chunks of a
+                     streamed (``"stream": true``) reply.
+        requests: Parsed JSON bodies of every request received.
+        headers: Headers of every request received.
+    """
+
+    def __init__(
+        self,
+        reply: str | list[str] = "stub reply",
+        delay: float = 0.0,
+        status: int = 200,
+        finish_reason: str | list[str] = "stop",
+        chunk_delay: float = 0.0,
+    ):
+        self.reply = reply
+        self.chunk_delay = chunk_delay
+        self.delay = delay
+        self.status = status
+        self.finish_reason = finish_reason
+        self.requests: list[dict] = []
+        self.headers: list[dict] = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length))
+                stub.requests.append(request)
+                stub.headers.append({k.lower(): v for k, v in self.headers.items()})
+                turn = len(stub.requests) - 1
+                if stub.delay:
+                    time.sleep(stub.delay)
+                chunks: list[bytes] = []
+                if stub.status != 200:
+                    body = json.dumps({"error": {"message": "stub error"}}).encode()
+                elif request.get("stream"):
+                    chunks = _sse_chunks(
+                        request, _pick(stub.reply, turn), _pick(stub.finish_reason, turn)
+                    )
+                    body = b"".join(chunks)
+                else:
+                    body = json.dumps({
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": request["model"],
+                        "choices": [{
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": _pick(stub.reply, turn),
+                            },
+                            "finish_reason": _pick(stub.finish_reason, turn),
+                        }],
+                        "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+                    }).encode()
+                try:
+                    self.send_response(stub.status)
+                    self.send_header(
+                        "Content-Type", "text/event-stream" if chunks else "application/json"
+                    )
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    if chunks:
+                        self.wfile.write(chunks[0])
+                        self.wfile.flush()
+                        time.sleep(stub.chunk_delay)
+                        self.wfile.write(b"".join(chunks[1:]))
+                    else:
+                        self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # client gave up (e.g. a cancelled hedge)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = _QuietServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}/v1"
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def openai_stub():
+    """Factory fixture: ``openai_stub(reply=..., delay=..., status=...)``."""
+    servers: list[StubServer] = []
+
+    def make(**kwargs) -> StubServer:
+        server = StubServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.close()
@@ -0,0 +1,104 @@
+"""Tests for src/utils/budget.py and budget-based termination."""
+
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.config import STARTED_AT_KEY, Budget, PipelineConfig
+from src.graph import build_graph, should_continue
+from src.nodes.join import join_node
+from src.nodes.tdd_test import tdd_test_node
+from src.utils.budget import BUDGET_EXHAUSTED, remaining_budget
+
+_CALL = {"node": "developer", "prompt_tokens": 300, "completion_tokens": 100}
+
+
+def _config(**budget):
+    return PipelineConfig(budget=Budget(**budget)).runnable_config()
+
+
+def test_remaining_budget_counts_tokens_and_calls():
+    remaining = remaining_budget({"llm_calls": [_CALL, _CALL]}, _config(max_tokens=1000, max_llm_calls=10))
+
+    assert (remaining.tokens, remaining.llm_calls) == (200, 8)
+    assert remaining.low  # 20% of the tokens left
+    assert remaining.exhausted is None
+    assert remaining_budget({"llm_calls": [_CALL] * 3}, _config(max_tokens=1000)).exhausted == "tokens"
+
+
+def test_deadline_counts_from_the_run_config():
+    config = _config(deadline_s=10)
+    config["configurable"][STARTED_AT_KEY] = time.time() - 11
+
+    assert remaining_budget({}, config).exhausted == "deadline"
+    assert remaining_budget({}, _config(deadline_s=10)).exhausted is None
+    assert remaining_budget({}, None) == remaining_budget({}, _config())
+
+
+def test_join_stops_unapproved_round_when_budget_is_spent():
+    state = {"server_code": "x", "review_feedback": ["fix"], "iterations": 1,
+             "final_status": "pending", "llm_calls": [_CALL, _CALL]}
+    config = _config(max_llm_calls=2)
+
+    update = join_node(state, config)
+
+    assert update["final_status"] == BUDGET_EXHAUSTED
+    assert should_continue({**state, **update}, config) == "end"
+    # An approved round stays approved.
+    assert join_node({**state, "final_status": "approved", "review_feedback": []},
+                     config)["final_status"] == "approved"
+
+
+def test_tdd_skips_test_generation_when_budget_is_low(tmp_path, monkeypatch):
+    import src.nodes.tdd_test as tdd_test
+
+    (tmp_path / "package.json").write_text("{}")
+    monkeypatch.setattr(tdd_test, "get_llm", lambda **kw: 1 / 0)
+
+    result = tdd_test_node({"output_dir": str(tmp_path), "llm_calls": [_CALL] * 9},
+                           _config(max_llm_calls=10))
+
+    assert result["test_status"] == "skipped"
+
+
+class _FakeLLM:
+    def __init__(self, content):
+        self.content = content
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return AIMessage(content=self.content)
+
+
+def test_graph_stops_on_call_budget_with_files_written(tmp_path, monkeypatch):
+    import src.nodes.architect as architect
+    import src.nodes.developer as developer
+    import src.nodes.reviewer as reviewer
+
+    replies = iter(range(100))
+    monkeypatch.setattr(architect, "_get_available_tools", lambda pipeline=None: [])
+    monkeypatch.setattr(architect, "get_llm", lambda **kw: _FakeLLM("CREATE TABLE t ();"))
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: _FakeLLM(
+        f"```javascript\n// server.js\n// v{next(replies)}\n```"))
+    monkeypatch.setattr(reviewer, "get_llm", lambda **kw: _FakeLLM(f"1. issue {next(replies)}"))
+
+    state = {
+        "requirements": "r", "db_schema": "", "server_code": "", "review_feedback": [],
+        "iterations": 0, "final_status": "pending", "output_dir": str(tmp_path),
+        "test_results": "", "test_status": "", "llm_calls": [],
+    }
+    pipeline = PipelineConfig(max_iterations=10, budget=Budget(max_llm_calls=5))
+
+    async def run():
+        final = {}
+        async for values in build_graph().astream(
+                state, pipeline.runnable_config(), stream_mode="values"):
+            final = values
+        return final
+
+    final = asyncio.run(run())
+
+    # architect + two developer/reviewer rounds = 5 calls, then stop.
+    assert final["final_status"] == BUDGET_EXHAUSTED
+    assert len(final["llm_calls"]) == 5
+    assert (tmp_path / "server.js").exists()
@@ -0,0 +1,139 @@
+"""Tests for src/config.py: run-scoped configuration instead of os.environ."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig, get_pipeline_config
+from src.graph import build_graph, should_continue
+from src.nodes.architect import _get_available_tools
+from src.utils.llm import get_llm, shutdown_llm_clients
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    for name in ("GROQ_API_KEY", "TAVILY_API_KEY", "SERPAPI_API_KEY", "LLM_MODEL",
+                 "LLM_ROUTING", "LLM_ROUTING_FILE", "LLM_CACHE_DIR", "LLM_FALLBACK_ENDPOINTS"):
+        monkeypatch.delenv(name, raising=False)
+    shutdown_llm_clients()
+    yield
+    shutdown_llm_clients()
+
+
+def test_default_config_reads_environment(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "from-env")
+    pipeline = get_pipeline_config(None)
+
+    assert pipeline.api_key("GROQ_API_KEY") == "from-env"
+    assert PipelineConfig(api_keys={"GROQ_API_KEY": "own"}).api_key("GROQ_API_KEY") == "own"
+
+
+def test_search_tool_enabled_by_run_key_only():
+    names = [t.name for t in _get_available_tools(PipelineConfig(api_keys={"TAVILY_API_KEY": "k"}))]
+    assert "search_postgres_docs" in names
+    assert "search_postgres_docs" not in [t.name for t in _get_available_tools()]
+
+
+def test_iteration_limit_comes_from_run_config():
+    state = {"review_feedback": ["fix it"], "iterations": 1}
+    assert should_continue(state, PipelineConfig(max_iterations=1).runnable_config()) == "end"
+    assert should_continue(state, PipelineConfig(max_iterations=5).runnable_config()) == (
+        "developer_node"
+    )
+
+
+def test_failover_hedging_and_rate_limits_come_from_run_config(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "k")
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "5")
+    monkeypatch.setenv("LLM_RPM_LIMIT", "0")
+    east = PipelineConfig(
+        fallback_endpoints=[{"name": "east", "base_url": "http://east/v1", "model": "m"}],
+        hedge_delay=0.5,
+        rpm_limit=30,
+    )
+    west = PipelineConfig(
+        fallback_endpoints=[{"name": "west", "base_url": "http://west/v1", "model": "m"}],
+        hedge_percentile=90,
+        hedge_nodes=["reviewer"],
+    )
+
+    east_llm = get_llm(node="developer", pipeline=east)
+    west_llm = get_llm(node="reviewer", pipeline=west)
+
+    assert [name for name, _ in east_llm.targets][1:] == ["east"]
+    assert [name for name, _ in west_llm.targets][1:] == ["west"]
+    assert east_llm.hedge_policy.delay == 0.5
+    assert west_llm.hedge_policy.percentile == 90 and west_llm.hedge_policy.delay == 5
+    assert get_llm(node="developer", pipeline=west).hedge_policy is None
+    assert east_llm.scheduler.requests.capacity == 30
+    assert west_llm.scheduler.requests is None
+    assert len(get_llm(node="developer", pipeline=PipelineConfig(fallback_endpoints=[])).targets) == 1
+
+
+def test_concurrent_runs_keep_their_own_keys_and_models(openai_stub):
+    """Two configs in one event loop never see each other's key or model."""
+    server = openai_stub()
+    routing = {"default": {"base_url": server.base_url}}
+    first = PipelineConfig(api_keys={"GROQ_API_KEY": "key-a"}, model="model-a", routing=routing)
+    second = PipelineConfig(api_keys={"GROQ_API_KEY": "key-b"}, model="model-b", routing=routing)
+
+    async def main():
+        await asyncio.gather(
+            get_llm(node="developer", pipeline=first).ainvoke("hi"),
+            get_llm(node="developer", pipeline=second).ainvoke("hi"),
+        )
+
+    asyncio.run(main())
+
+    seen = {
+        (request["model"], headers["authorization"])
+        for request, headers in zip(server.requests, server.headers)
+    }
+    assert seen == {("model-a", "Bearer key-a"), ("model-b", "Bearer key-b")}
+
+
+class _CannedLLM:
+    """Stands in for ManagedLLM: returns one canned reply."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        return AIMessage(content=self.reply)
+
+
+def test_graph_threads_config_to_every_node(tmp_path, monkeypatch):
+    import src.nodes.architect as architect
+    import src.nodes.developer as developer
+    import src.nodes.reviewer as reviewer
+
+    seen: list = []
+
+    def fake(reply):
+        def factory(**kw):
+            seen.append(kw.get("pipeline"))
+            return _CannedLLM(reply)
+        return factory
+
+    monkeypatch.setattr(architect, "_get_available_tools", lambda pipeline=None: [])
+    monkeypatch.setattr(architect, "get_llm", fake("CREATE TABLE t ();"))
+    monkeypatch.setattr(developer, "get_llm", fake("```javascript\n// server.js\nx\n```"))
+    monkeypatch.setattr(reviewer, "get_llm", fake("1. still broken"))
+
+    pipeline = PipelineConfig(model="m", max_iterations=1, output_dir=str(tmp_path))
+    state = {
+        "requirements": "r", "db_schema": "", "server_code": "", "review_feedback": [],
+        "iterations": 0, "final_status": "pending", "output_dir": "", "test_results": "",
+        "test_status": "", "llm_calls": [],
+    }
+
+    async def collect():
+        return [node async for event in build_graph().astream(
+            state, pipeline.runnable_config()) for node in event]
+
+    nodes = asyncio.run(collect())
+
+    assert nodes.count("developer_node") == 1  # max_iterations=1 stops the loop
+    assert seen and all(p is pipeline for p in seen)
+    assert (tmp_path / "server.js").exists()  # output dir taken from the config
@@ -0,0 +1,99 @@
+"""Tests for src/utils/continuation.py and truncated-reply handling in get_llm."""
+
+import asyncio
+import json
+
+import pytest
+
+from src.utils.code_parser import parse_code_blocks
+from src.utils.continuation import stitch
+from src.utils.llm import call_record, get_llm, shutdown_llm_clients
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    for name in ("LLM_ROUTING_FILE", "LLM_CACHE_DIR", "LLM_FALLBACK_ENDPOINTS",
+                 "LLM_MAX_CONTINUATIONS"):
+        monkeypatch.delenv(name, raising=False)
+    shutdown_llm_clients()
+    yield
+    shutdown_llm_clients()
+
+
+def _route_to(monkeypatch, server):
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({"default": {"base_url": server.base_url}}))
+
+
+# ---------------------------------------------------------------------------
+# stitch()
+# ---------------------------------------------------------------------------
+
+
+def test_stitch_plain_continuation():
+    assert stitch("const a = fo", "o();\n```") == "const a = foo();\n```"
+
+
+def test_stitch_drops_reopened_fence_and_filename():
+    previous = "```javascript\n// routes/users.js\nconst a = 1;\nconst b = "
+    continuation = "```javascript\n// routes/users.js\nconst b = 2;\n```\n"
+
+    stitched = stitch(previous, continuation)
+
+    assert stitched == "```javascript\n// routes/users.js\nconst a = 1;\nconst b = 2;\n```\n"
+    assert parse_code_blocks(stitched) == {"routes/users.js": "const a = 1;\nconst b = 2;"}
+
+
+def test_stitch_drops_repeated_text():
+    previous = "```js\n// a.js\nmodule.exports = function handler(req, res) {\n"
+    continuation = "module.exports = function handler(req, res) {\n  res.send(1);\n}\n```"
+
+    stitched = stitch(previous, continuation)
+
+    assert stitched.count("module.exports") == 1
+    assert parse_code_blocks(stitched)["a.js"].endswith("res.send(1);\n}")
+
+
+def test_stitch_new_block_after_closed_block_starts_on_new_line():
+    assert stitch("```js\n// a.js\nx\n```", "```js\n// b.js\ny\n```") == (
+        "```js\n// a.js\nx\n```\n```js\n// b.js\ny\n```"
+    )
+
+
+# ---------------------------------------------------------------------------
+# Against a stub server
+# ---------------------------------------------------------------------------
+
+
+def test_truncated_reply_is_continued(openai_stub, monkeypatch):
+    server = openai_stub(
+        reply=["```js\n// server.js\nconst app = ", "express();\n```"],
+        finish_reason=["length", "stop"],
+    )
+    _route_to(monkeypatch, server)
+
+    response = get_llm(node="developer").invoke([{"role": "user", "content": "go"}])
+
+    assert response.content == "```js\n// server.js\nconst app = express();\n```"
+    assert response.response_metadata["continuations"] == 1
+    assert response.usage_metadata["total_tokens"] == 10
+    assert call_record("developer", response)["continuations"] == 1
+    # The partial reply is sent back as the assistant turn.
+    follow_up = server.requests[1]["messages"]
+    assert follow_up[-2] == {"role": "assistant", "content": "```js\n// server.js\nconst app = "}
+
+
+def test_continuations_are_capped(openai_stub, monkeypatch):
+    server = openai_stub(reply="x", finish_reason="length")
+    _route_to(monkeypatch, server)
+    monkeypatch.setenv("LLM_MAX_CONTINUATIONS", "2")
+
+    response = asyncio.run(get_llm(node="developer").ainvoke("go"))
+
+    assert len(server.requests) == 3
+    assert response.response_metadata["continuations"] == 2
+    assert response.response_metadata["finish_reason"] == "length"
@@ -0,0 +1,125 @@
+"""Tests for src/utils/convergence.py and stall handling in the graph."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.graph import build_graph, should_continue
+from src.nodes.developer import _build_messages, _get_developer_llm
+from src.nodes.join import join_node
+from src.utils.convergence import (
+    STALLED_IDENTICAL_CODE,
+    STALLED_REPEATED_FEEDBACK,
+    code_fingerprint,
+    detect_stall,
+    feedback_fingerprint,
+    fingerprint,
+)
+
+
+def test_fingerprints_ignore_whitespace_and_order():
+    assert code_fingerprint("a  = 1;\n") == code_fingerprint("a = 1;")
+    assert feedback_fingerprint(["x", "y  z"]) == feedback_fingerprint(["y z", "x", "x"])
+    assert feedback_fingerprint(["x"]) != feedback_fingerprint(["y"])
+
+
+def test_detect_stall():
+    first = fingerprint(1, "code a", ["fix x"])
+
+    assert detect_stall([first]) is None
+    assert detect_stall([first, fingerprint(2, "code b", ["fix y"])]) is None
+    assert detect_stall([first, fingerprint(2, "code a ", ["fix y"])]) == STALLED_IDENTICAL_CODE
+    assert detect_stall([first, fingerprint(2, "code b", ["fix  x"])]) == STALLED_REPEATED_FEEDBACK
+    # A cycle back to an older iteration counts as well.
+    cycle = [first, fingerprint(2, "code b", ["fix y"]), fingerprint(3, "code a", ["fix z"])]
+    assert detect_stall(cycle) == STALLED_IDENTICAL_CODE
+
+
+def _round(**overrides):
+    state = {
+        "server_code": "same", "review_feedback": ["fix x"], "iterations": 2,
+        "final_status": "pending", "test_status": "skipped",
+        "fingerprints": [fingerprint(1, "same", ["fix x"])],
+    }
+    state.update(overrides)
+    return state
+
+
+def test_join_escalates_then_stops():
+    update = join_node(_round())
+    assert update["escalation"] == STALLED_IDENTICAL_CODE
+    assert update["final_status"] == "pending"
+
+    update = join_node(_round(escalation=STALLED_IDENTICAL_CODE))
+    assert update["final_status"] == STALLED_IDENTICAL_CODE
+    assert should_continue({**_round(), **update}) == "end"
+
+
+def test_join_clears_escalation_once_the_loop_progresses():
+    update = join_node(_round(server_code="new", review_feedback=["fix y"],
+                              escalation=STALLED_IDENTICAL_CODE))
+    assert update["escalation"] is None
+    assert update["final_status"] == "pending"
+
+    # The next stall escalates again instead of stopping the run.
+    state = _round(server_code="new", fingerprints=[fingerprint(1, "new", ["fix y"])],
+                   escalation=update["escalation"])
+    assert join_node(state)["escalation"] == STALLED_IDENTICAL_CODE
+
+
+def test_escalated_developer_changes_model_and_prompt(monkeypatch):
+    import src.nodes.developer as developer
+
+    seen = {}
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: seen.update(kw))
+    state = {"requirements": "r", "db_schema": "s", "review_feedback": ["fix x"],
+             "escalation": STALLED_REPEATED_FEEDBACK}
+
+    _get_developer_llm(state, PipelineConfig(escalation_model="big").runnable_config())
+
+    assert seen["model"] == "big"
+    assert "different approach" in _build_messages(state)[-1]["content"]
+    assert "Change of Approach" not in _build_messages({**state, "escalation": None})[-1]["content"]
+
+
+class _FakeLLM:
+    def __init__(self, content, calls=None):
+        self.content, self.calls = content, calls
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        if self.calls is not None:
+            self.calls.append(1)
+        return AIMessage(content=self.content)
+
+
+def test_graph_stops_when_developer_repeats_itself(tmp_path, monkeypatch):
+    import src.nodes.architect as architect
+    import src.nodes.developer as developer
+    import src.nodes.reviewer as reviewer
+
+    developer_calls: list = []
+    monkeypatch.setattr(architect, "_get_available_tools", lambda pipeline=None: [])
+    monkeypatch.setattr(architect, "get_llm", lambda **kw: _FakeLLM("CREATE TABLE t ();"))
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: _FakeLLM(
+        "```javascript\n// server.js\nx\n```", developer_calls))
+    monkeypatch.setattr(reviewer, "get_llm", lambda **kw: _FakeLLM("1. Still broken"))
+
+    state = {
+        "requirements": "r", "db_schema": "", "server_code": "", "review_feedback": [],
+        "iterations": 0, "final_status": "pending", "output_dir": str(tmp_path),
+        "test_results": "", "test_status": "", "llm_calls": [],
+    }
+
+    async def run():
+        final = {}
+        config = PipelineConfig(max_iterations=5).runnable_config()
+        async for values in build_graph().astream(state, config, stream_mode="values"):
+            final = values
+        return final
+
+    final = asyncio.run(run())
+
+    # Round 2 repeats round 1 and escalates; round 3 repeats again and stops.
+    assert len(developer_calls) == 3
+    assert final["final_status"] == STALLED_IDENTICAL_CODE
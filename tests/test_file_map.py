@@ -0,0 +1,88 @@
+"""Tests for src/utils/file_map.py and the nodes that consume the file map."""
+
+import os
+from unittest.mock import MagicMock, patch
+
+from langchain_core.messages import AIMessage
+
+from src.nodes.developer import developer_node
+from src.nodes.integration import integration_node
+from src.nodes.tdd_test import _build_messages, tdd_test_node
+from src.utils.file_map import (
+    changed_files,
+    file_map_from_code,
+    file_map_from_generated,
+    files_digest,
+)
+from src.utils.structured_output import GeneratedFiles
+
+CODE = (
+    "```javascript\n// server.js\nconst app = 1;\n```\n"
+    "```json\n// package.json\n{\"name\": \"api\"}\n```"
+)
+
+
+def test_text_and_tool_outputs_build_the_same_map():
+    generated = GeneratedFiles.model_validate({"files": [
+        {"path": "server.js", "content": "const app = 1;\n"},
+        {"path": "package.json", "language": "json", "content": '{"name": "api"}'},
+    ]})
+
+    from_text = file_map_from_code(CODE)
+    from_tool = file_map_from_generated(generated)
+
+    assert from_text == from_tool
+    assert from_text["package.json"]["language"] == "json"
+    assert from_text["server.js"]["size"] == len("const app = 1;")
+    assert files_digest(from_text) == files_digest(from_tool)
+
+
+def test_changed_files_compares_hashes():
+    files = file_map_from_code(CODE)
+    written = {"server.js": files["server.js"]["sha256"], "package.json": "stale"}
+
+    assert [e["path"] for e in changed_files(files, written)] == ["package.json"]
+
+
+def test_developer_parses_output_once_into_state():
+    with patch("src.nodes.developer.get_llm") as get_llm:
+        get_llm.return_value.invoke.return_value = AIMessage(content=CODE)
+        update = developer_node({"requirements": "r", "db_schema": "s", "review_feedback": []})
+
+    assert set(update["files"]) == {"server.js", "package.json"}
+
+
+def test_integration_writes_from_map_and_skips_unchanged(tmp_path):
+    files = file_map_from_code(CODE)
+    state = {"output_dir": str(tmp_path), "server_code": "", "db_schema": "", "files": files}
+
+    first = integration_node(state)
+    (tmp_path / "server.js").write_text("edited on disk")
+    changed = {**files, "package.json": file_map_from_code(
+        "```json\n// package.json\n{\"name\": \"v2\"}\n```")["package.json"]}
+    integration_node({**state, "files": changed, "written_files": first["written_files"]})
+
+    # server.js was unchanged in the map, so it was not rewritten.
+    assert (tmp_path / "server.js").read_text() == "edited on disk"
+    assert "v2" in (tmp_path / "package.json").read_text()
+
+
+def test_tdd_prompt_uses_file_map_and_reuses_tests_for_same_code(tmp_path):
+    files = file_map_from_code(CODE)
+    (tmp_path / "package.json").write_text('{"name": "api"}')
+    (tmp_path / "notes.js").write_text("not generated code")
+    state = {"output_dir": str(tmp_path), "db_schema": "", "files": files, "iterations": 1}
+
+    prompt = _build_messages(state, str(tmp_path), ["package.json", "notes.js"])[-1]["content"]
+    assert "const app = 1;" in prompt and "not generated code" not in prompt
+
+    npm_ok = MagicMock(returncode=0, stdout="ok", stderr="")
+    with patch("src.nodes.tdd_test.get_llm") as get_llm, \
+            patch("src.nodes.tdd_test.subprocess.run", return_value=npm_ok):
+        get_llm.return_value.invoke.return_value = AIMessage(content="")
+        first = tdd_test_node(state)
+        second = tdd_test_node({**state, "tested_digest": first["tested_digest"]})
+
+    assert get_llm.return_value.invoke.call_count == 1
+    assert second["test_status"] == "passed" and "llm_calls" not in second
+    assert os.path.exists(tmp_path / "package.json")
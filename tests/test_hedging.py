@@ -0,0 +1,171 @@
+"""Tests for src/utils/hedging.py, exercised against local stub servers."""
+
+import asyncio
+import json
+import time
+
+import pytest
+
+from src.utils.hedging import (
+    HedgePolicy,
+    LatencyHistogram,
+    get_histogram,
+    hedge_delay,
+    hedge_policy_for,
+    reset_latency_stats,
+)
+from src.utils.llm import get_llm, shutdown_llm_clients
+from src.utils.scheduler import get_scheduler, reset_scheduler
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    monkeypatch.delenv("LLM_CACHE_DIR", raising=False)
+    monkeypatch.delenv("LLM_ROUTING_FILE", raising=False)
+    for name in ("LLM_HEDGE_DELAY", "LLM_HEDGE_PERCENTILE", "LLM_HEDGE_NODES"):
+        monkeypatch.delenv(name, raising=False)
+    shutdown_llm_clients()
+    reset_latency_stats()
+    yield
+    shutdown_llm_clients()
+
+
+def _configure(monkeypatch, primary, secondary):
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({"default": {"base_url": primary.base_url}}))
+    monkeypatch.setenv("LLM_FALLBACK_ENDPOINTS", json.dumps([
+        {"name": "backup", "base_url": secondary.base_url, "model": "backup-model"},
+    ]))
+
+
+# ---------------------------------------------------------------------------
+# Histogram and policy
+# ---------------------------------------------------------------------------
+
+
+def test_histogram_percentile():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.record(0.1)
+    for _ in range(10):
+        histogram.record(5.0)
+    assert histogram.percentile(50) < 0.2
+    assert histogram.percentile(99) >= 5.0
+
+
+def test_hedge_delay_uses_percentile_once_enough_samples():
+    policy = HedgePolicy(delay=9.0, percentile=95)
+    assert hedge_delay(policy, "groq", "developer") == 9.0
+
+    for _ in range(30):
+        get_histogram("groq", "developer").record(0.2)
+    assert hedge_delay(policy, "groq", "developer") < 1.0
+
+
+def test_hedge_policy_only_for_selected_nodes(monkeypatch):
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.5")
+    assert hedge_policy_for("developer").delay == 0.5
+    assert hedge_policy_for("reviewer") is None
+
+
+# ---------------------------------------------------------------------------
+# Against stub servers
+# ---------------------------------------------------------------------------
+
+
+def test_failover_on_server_error(openai_stub, monkeypatch):
+    """A 500 from the primary fails over to the next endpoint."""
+    primary = openai_stub(status=500)
+    secondary = openai_stub(reply="from backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+
+    response = get_llm(model="primary-model", node="reviewer").invoke("hi")
+
+    assert response.content == "from backup"
+    assert response.response_metadata["endpoint"] == "backup"
+    assert len(primary.requests) == 1
+
+
+def test_hedge_wins_when_primary_is_slow(openai_stub, monkeypatch):
+    """After the hedge delay the backup is raced and its faster answer wins."""
+    primary = openai_stub(reply="slow primary", delay=2.0)
+    secondary = openai_stub(reply="fast backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.1")
+
+    started = time.monotonic()
+    response = get_llm(model="primary-model", node="developer").invoke("hi")
+
+    assert response.content == "fast backup"
+    assert response.response_metadata["hedged"] is True
+    assert time.monotonic() - started < 1.5
+
+
+def test_no_hedge_when_primary_is_fast(openai_stub, monkeypatch):
+    primary = openai_stub(reply="primary")
+    secondary = openai_stub(reply="backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "1.0")
+
+    response = get_llm(model="primary-model", node="developer").invoke("hi")
+
+    assert response.content == "primary"
+    assert secondary.requests == []
+    assert get_histogram("groq", "developer").count == 1
+
+
+def test_async_hedge_cancels_loser(openai_stub, monkeypatch):
+    primary = openai_stub(reply="slow primary", delay=2.0)
+    secondary = openai_stub(reply="fast backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.1")
+
+    async def main():
+        started = time.monotonic()
+        llm = get_llm(model="primary-model", node="developer")
+        response = await llm.ainvoke("hi")
+        return response, time.monotonic() - started
+
+    response, elapsed = asyncio.run(main())
+    assert response.content == "fast backup"
+    assert elapsed < 1.5
+
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv("LLM_RPM_LIMIT", "600")
+    reset_scheduler()
+    yield get_scheduler()
+    reset_scheduler()
+
+
+def test_hedge_request_is_admitted(openai_stub, monkeypatch, scheduler):
+    """The hedge takes its own scheduler admission, not just the primary."""
+    primary = openai_stub(reply="slow primary", delay=2.0)
+    secondary = openai_stub(reply="fast backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_HEDGE_DELAY", "0.1")
+
+    response = get_llm(model="primary-model", node="developer").invoke("hi")
+
+    assert response.response_metadata["hedged"] is True
+    assert scheduler.stats["admitted"] == 2
+
+
+def test_async_failover_request_is_admitted(openai_stub, monkeypatch, scheduler):
+    primary = openai_stub(status=500)
+    secondary = openai_stub(reply="from backup")
+    _configure(monkeypatch, primary, secondary)
+    monkeypatch.setenv("LLM_MAX_RETRIES", "0")
+
+    async def main():
+        return await get_llm(model="primary-model", node="reviewer").ainvoke("hi")
+
+    assert asyncio.run(main()).content == "from backup"
+    assert scheduler.stats["admitted"] == 2
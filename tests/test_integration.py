@@ -93,11 +93,11 @@ def test_state_updated_with_output_dir(tmp_path):
     assert result["output_dir"] == str(tmp_path)
 
 
-def test_final_status_preserved(tmp_path):
-    """final_status from the incoming state is preserved in the update."""
+def test_final_status_left_to_reviewer(tmp_path):
+    """final_status is not written: the reviewer and join node own it."""
     result = integration_node(_make_state(tmp_path))
 
-    assert result["final_status"] == "approved"
+    assert "final_status" not in result
 
 
 def test_empty_server_code_no_crash(tmp_path):
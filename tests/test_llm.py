@@ -0,0 +1,96 @@
+"""Tests for src/utils/llm.py (shared client registry and connection pool)."""
+
+import json
+
+import pytest
+
+from src.utils.llm import get_llm, get_llm_with_tools, get_pool_stats, shutdown_llm_clients
+from src.tools.postgres_reference import lookup_postgres_best_practices
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def _fresh_registry(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    monkeypatch.delenv("LLM_CACHE_DIR", raising=False)
+    monkeypatch.delenv("LLM_ROUTING_FILE", raising=False)
+    shutdown_llm_clients()
+    yield
+    shutdown_llm_clients()
+
+
+@pytest.fixture
+def stub_server(openai_stub, monkeypatch):
+    server = openai_stub()
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({"default": {"base_url": server.base_url}}))
+    return server
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+
+def test_same_settings_return_shared_client():
+    """Identical (model, temperature) requests reuse one ChatOpenAI instance."""
+    reuses = get_pool_stats()["client_reuses"]  # Counted process-wide
+    first = get_llm(temperature=0.2, model="m")
+    second = get_llm(temperature=0.2, model="m")
+    assert first.runnable is second.runnable
+    assert get_pool_stats()["client_reuses"] == reuses + 1
+
+
+def test_different_settings_get_distinct_clients_sharing_a_pool():
+    """Different temperatures get their own client but the same HTTP pool."""
+    a = get_llm(temperature=0.1, model="m")
+    b = get_llm(temperature=0.2, model="m")
+    assert a.runnable is not b.runnable
+    assert a.http_client is b.http_client
+    stats = get_pool_stats()
+    assert stats["clients"] == 2
+    assert stats["pools"] == 1
+
+
+def test_bound_tools_are_registered():
+    """Binding the same tools twice returns the same runnable."""
+    tools = [lookup_postgres_best_practices]
+    first = get_llm_with_tools(tools, model="m")
+    assert first.runnable is get_llm_with_tools(tools, model="m").runnable
+
+
+def test_pool_limits_from_env(monkeypatch):
+    """LLM_POOL_* env vars override the default pool limits."""
+    monkeypatch.setenv("LLM_POOL_MAX_CONNECTIONS", "7")
+    limits = get_pool_stats()["limits"]
+    assert limits["max_connections"] == 7
+
+
+def test_keep_alive_connection_is_reused(stub_server):
+    """Sequential calls ride on a single keep-alive connection."""
+    before = get_pool_stats()
+    llm = get_llm(model="stub-model")
+    for _ in range(3):
+        assert llm.invoke("hi").content == "stub reply"
+
+    after = get_pool_stats()
+    assert after["requests"] - before["requests"] == 3
+    assert after["connections_opened"] - before["connections_opened"] == 1
+
+
+def test_shutdown_clears_registry():
+    """shutdown_llm_clients forgets every client so new ones are built."""
+    first = get_llm(model="m")
+    shutdown_llm_clients()
+    assert get_llm(model="m").runnable is not first.runnable
+
+
+def test_async_pool_survives_new_event_loops(stub_server):
+    """Each asyncio.run gets its own async pool instead of stale connections."""
+    import asyncio
+
+    llm = get_llm(model="stub-model")
+    for _ in range(2):
+        assert asyncio.run(llm.ainvoke("hi")).content == "stub reply"
@@ -0,0 +1,114 @@
+"""Tests for src/utils/llm_cache.py"""
+
+import multiprocessing
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.outputs import ChatGeneration
+from langchain_core.messages import AIMessage
+
+from src.utils.llm_cache import SQLiteLLMCache, cache_key, get_response_cache
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+def _generation(text: str) -> list[ChatGeneration]:
+    return [ChatGeneration(message=AIMessage(content=text))]
+
+
+def _writer(directory: str, worker: int) -> None:
+    cache = SQLiteLLMCache(directory)
+    for i in range(20):
+        cache.update(f"prompt-{worker}-{i}", "llm", _generation(f"{worker}-{i}"))
+
+
+# ---------------------------------------------------------------------------
+# Tests
+# ---------------------------------------------------------------------------
+
+
+def test_cache_key_depends_on_prompt_and_llm_string():
+    """Changing either half of the request changes the content address."""
+    base = cache_key("prompt", "model=a temperature=0.2")
+    assert base == cache_key("prompt", "model=a temperature=0.2")
+    assert base != cache_key("prompt", "model=a temperature=0.3")
+    assert base != cache_key("other prompt", "model=a temperature=0.2")
+
+
+def test_roundtrip_and_counters(tmp_path):
+    """A stored response is returned on lookup and counted as a hit."""
+    cache = SQLiteLLMCache(str(tmp_path))
+    assert cache.lookup("p", "llm") is None
+
+    cache.update("p", "llm", _generation("hello"))
+    cached = cache.lookup("p", "llm")
+
+    assert cached[0].message.content == "hello"
+    assert cached[0].message.response_metadata["cache_hit"] is True
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+
+
+def test_lru_eviction_by_entry_count(tmp_path):
+    """The least recently used entry is evicted once max_entries is exceeded."""
+    cache = SQLiteLLMCache(str(tmp_path), max_entries=2)
+    cache.update("a", "llm", _generation("a"))
+    cache.update("b", "llm", _generation("b"))
+    assert cache.lookup("a", "llm") is not None  # touch "a" so "b" is now LRU
+
+    cache.update("c", "llm", _generation("c"))
+
+    assert cache.lookup("b", "llm") is None
+    assert cache.lookup("a", "llm") is not None
+    assert cache.lookup("c", "llm") is not None
+    assert cache.stats()["lifetime_evictions"] == 1
+
+
+def test_bypass_misses_but_still_stores(tmp_path):
+    """Bypass mode never serves from the cache but keeps recording responses."""
+    cache = SQLiteLLMCache(str(tmp_path), bypass=True)
+    cache.update("p", "llm", _generation("fresh"))
+    assert cache.lookup("p", "llm") is None
+
+    cache.bypass = False
+    assert cache.lookup("p", "llm")[0].message.content == "fresh"
+
+
+def test_chat_model_served_from_cache(tmp_path):
+    """A LangChain chat model wired to the cache only calls the backend once."""
+    cache = SQLiteLLMCache(str(tmp_path))
+    llm = FakeListChatModel(responses=["first", "second"], cache=cache)
+
+    assert llm.invoke("same prompt").content == "first"
+    assert llm.invoke("same prompt").content == "first"
+    assert llm.invoke("different prompt").content == "second"
+    assert cache.stats()["hits"] == 1
+
+
+def test_concurrent_writers_from_several_processes(tmp_path):
+    """Several processes can write to the same cache without corrupting it."""
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_writer, args=(str(tmp_path), w)) for w in range(3)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join(timeout=60)
+        assert proc.exitcode == 0
+
+    assert SQLiteLLMCache(str(tmp_path)).stats()["entries"] == 60
+
+
+def test_get_response_cache_is_opt_in(tmp_path, monkeypatch):
+    """No cache is returned unless LLM_CACHE_DIR is set."""
+    monkeypatch.delenv("LLM_CACHE_DIR", raising=False)
+    assert get_response_cache() is None
+
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("LLM_CACHE_BYPASS", "1")
+    cache = get_response_cache()
+    assert cache is not None
+    assert cache.bypass is True
+    assert get_response_cache() is cache
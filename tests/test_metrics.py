@@ -0,0 +1,79 @@
+"""Tests for src/utils/metrics.py and per-call token/latency records."""
+
+import json
+
+import pytest
+
+from src.utils.llm import call_record, get_llm, shutdown_llm_clients
+from src.utils.metrics import aggregate, export_metrics, format_metrics_table
+
+_CALLS = [
+    {"node": "architect", "iteration": None, "prompt_tokens": 100, "completion_tokens": 50,
+     "ttft_s": 0.2, "latency_s": 1.0, "cache_hit": False},
+    {"node": "developer", "iteration": 1, "prompt_tokens": 300, "completion_tokens": 900,
+     "ttft_s": 0.4, "latency_s": 6.0, "cache_hit": False},
+    {"node": "developer", "iteration": 2, "prompt_tokens": 400, "completion_tokens": 800,
+     "ttft_s": None, "latency_s": 0.01, "cache_hit": True},
+]
+
+
+def test_aggregate_by_node_iteration_and_run():
+    metrics = aggregate(_CALLS)
+
+    assert metrics["totals"]["total_tokens"] == 2550
+    assert metrics["totals"]["cache_hits"] == 1
+    developer = metrics["by_node"]["developer"]
+    assert developer["calls"] == 2
+    assert developer["completion_tokens"] == 1700
+    assert developer["mean_ttft_s"] == 0.4  # cached call has no TTFT
+    assert [(r["node"], r["iteration"]) for r in metrics["by_iteration"]] == [
+        ("architect", None), ("developer", 1), ("developer", 2),
+    ]
+
+
+def test_export_metrics_writes_json(tmp_path):
+    path = tmp_path / "out" / "metrics.json"
+    export_metrics(_CALLS, str(path))
+
+    data = json.loads(path.read_text())
+    assert data["calls"] == _CALLS
+    assert data["by_node"]["architect"]["prompt_tokens"] == 100
+    assert format_metrics_table(aggregate(_CALLS))[-1].split()[0] == "total"
+
+
+# ---------------------------------------------------------------------------
+# Against a stub server
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def _routed(openai_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    for name in ("LLM_CACHE_DIR", "LLM_ROUTING_FILE", "LLM_FALLBACK_ENDPOINTS"):
+        monkeypatch.delenv(name, raising=False)
+    shutdown_llm_clients()
+    server = openai_stub(chunk_delay=0.2)
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({"default": {"base_url": server.base_url}}))
+    yield server
+    shutdown_llm_clients()
+
+
+def test_streamed_call_records_tokens_ttft_and_latency(_routed):
+    response = get_llm(node="reviewer").invoke("hi")
+    record = call_record("reviewer", response, iteration=1)
+
+    assert response.content == "stub reply"
+    assert (record["prompt_tokens"], record["completion_tokens"]) == (3, 2)
+    assert record["ttft_s"] is not None
+    assert record["latency_s"] >= record["ttft_s"] + 0.15
+    assert record["cache_hit"] is False
+
+
+def test_cached_call_is_marked(_routed, tmp_path, monkeypatch):
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path))
+    get_llm(node="reviewer").invoke("hi")
+    record = call_record("reviewer", get_llm(node="reviewer").invoke("hi"))
+
+    assert record["cache_hit"] is True
+    assert record["ttft_s"] is None
+    assert len(_routed.requests) == 1
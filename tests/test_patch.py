@@ -0,0 +1,121 @@
+"""Tests for src/utils/patch.py and the developer's patch mode."""
+
+from unittest.mock import patch
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.nodes.developer import developer_node
+from src.utils.file_map import file_map_from_code
+from src.utils.patch import PatchError, apply_patches, apply_unified_diff
+from src.utils.structured_output import FilePatches
+
+ORIGINAL = "const a = 1;\nconst b = 2;\n\nfunction f() {\n  return a;\n}\nmodule.exports = f;"
+
+DIFF = """--- a/server.js
++++ b/server.js
+@@ -4,3 +4,3 @@
+ function f() {
+-  return a;
++  return a + b;
+ }
+"""
+
+CODE = (
+    "```javascript\n// server.js\n" + ORIGINAL + "\n```\n"
+    "```json\n// package.json\n{\"name\": \"api\"}\n```"
+)
+
+
+def test_unified_diff_applies_with_offset_and_blank_context():
+    shifted = "// header\n// header\n" + ORIGINAL
+    expected = shifted.replace("return a;", "return a + b;")
+
+    assert apply_unified_diff(ORIGINAL, DIFF) == ORIGINAL.replace("return a;", "return a + b;")
+    assert apply_unified_diff(shifted, DIFF) == expected
+    # Models often emit blank context lines without the leading space.
+    assert apply_unified_diff(ORIGINAL, "@@ -2,3 +2,3 @@\n const b = 2;\n\n-function f() {\n+function g() {\n") \
+        == ORIGINAL.replace("function f", "function g")
+
+
+def test_unified_diff_rejects_mismatched_context():
+    with pytest.raises(PatchError):
+        apply_unified_diff(ORIGINAL, DIFF.replace("return a;", "return c;"))
+    with pytest.raises(PatchError):
+        apply_unified_diff(ORIGINAL, "just some text")
+
+
+def test_apply_patches_merges_new_changed_and_deleted_files():
+    files = file_map_from_code(CODE)
+    patches = FilePatches.model_validate({"files": [
+        {"path": "server.js", "diff": DIFF},
+        {"path": "routes/user.routes.js", "content": "module.exports = 1;\n"},
+        {"path": "package.json", "delete": True},
+    ]})
+
+    merged = apply_patches(files, patches)
+
+    assert set(merged) == {"server.js", "routes/user.routes.js"}
+    assert "return a + b;" in merged["server.js"]["content"]
+    assert merged["routes/user.routes.js"]["language"] == "javascript"
+    assert set(files) == {"server.js", "package.json"}  # previous map untouched
+
+    with pytest.raises(PatchError):
+        apply_patches(files, FilePatches.model_validate(
+            {"files": [{"path": "missing.js", "diff": DIFF}]}))
+
+
+def _state(**overrides):
+    state = {
+        "requirements": "r", "db_schema": "s", "iterations": 1,
+        "files": file_map_from_code(CODE), "review_feedback": ["[server.js] f ignores b"],
+    }
+    state.update(overrides)
+    return state
+
+
+def _patch_reply(diff: str) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{
+        "name": "FilePatches", "id": "call_1",
+        "args": {"files": [{"path": "server.js", "diff": diff}]},
+    }])
+
+
+def test_developer_patches_previous_files():
+    with patch("src.nodes.developer.get_llm") as get_llm:
+        get_llm.return_value.invoke.return_value = _patch_reply(DIFF)
+        update = developer_node(_state())
+
+    assert get_llm.return_value.invoke.call_count == 1
+    assert get_llm.call_args.kwargs["schema"] is FilePatches
+    prompt = get_llm.return_value.invoke.call_args.args[0][-1]["content"]
+    assert "## Current Files" in prompt and "return a;" in prompt
+    assert "return a + b;" in update["files"]["server.js"]["content"]
+    assert update["files"]["package.json"] == _state()["files"]["package.json"]
+    assert "// package.json" in update["server_code"]
+
+
+def test_failed_patch_falls_back_to_full_regeneration():
+    with patch("src.nodes.developer.get_llm") as get_llm:
+        get_llm.return_value.invoke.side_effect = [
+            _patch_reply(DIFF.replace("return a;", "return zzz;")),
+            AIMessage(content="```javascript\n// server.js\nrewritten\n```"),
+        ]
+        update = developer_node(_state())
+
+    assert update["files"]["server.js"]["content"] == "rewritten"
+    assert "package.json" not in update["files"]
+    assert len(update["llm_calls"]) == 2
+
+
+def test_patch_mode_off_or_escalated_regenerates():
+    full = AIMessage(content="```javascript\n// server.js\nrewritten\n```")
+    for state, config in (
+        (_state(), PipelineConfig(patch_mode=False).runnable_config()),
+        (_state(escalation="stalled_identical_code"), None),
+    ):
+        with patch("src.nodes.developer.get_llm") as get_llm:
+            get_llm.return_value.invoke.return_value = full
+            developer_node(state, config)
+        assert get_llm.call_args.kwargs["schema"] is not FilePatches
@@ -0,0 +1,90 @@
+"""Tests for src/utils/review_cache.py and per-file reviews in the reviewer node."""
+
+from unittest.mock import patch
+
+from langchain_core.messages import AIMessage
+
+from src.nodes.reviewer import reviewer_node
+from src.utils.file_map import file_entry, file_map_from_code
+from src.utils.review_cache import dependencies, review_key, schema_hash, stale_files
+
+CODE = "\n".join(
+    f"```javascript\n// {path}\n{content}\n```"
+    for path, content in [
+        ("server.js", "app.use('/api/users', require('./routes/user.routes'));"),
+        ("routes/user.routes.js", "const c = require('../controllers/user.controller.js');"),
+        ("controllers/user.controller.js", "const pool = require('../db/pool');"),
+        ("db/pool.js", "module.exports = new Pool();"),
+        ("controllers/book.controller.js", "import pool from '../db/pool.js';"),
+    ]
+)
+
+
+def test_dependencies_resolve_relative_requires_and_imports():
+    deps = dependencies(file_map_from_code(CODE))
+
+    assert deps["server.js"] == {"routes/user.routes.js"}
+    assert deps["routes/user.routes.js"] == {"controllers/user.controller.js"}
+    assert deps["controllers/book.controller.js"] == {"db/pool.js"}
+    assert deps["db/pool.js"] == set()
+
+
+def test_stale_files_are_changed_files_and_their_dependents():
+    files = file_map_from_code(CODE)
+    schema = schema_hash("CREATE TABLE users ();")
+    cache = {review_key(entry, schema): [] for entry in files.values()}
+
+    assert stale_files(files, cache, schema) == []
+    assert len(stale_files(files, cache, schema_hash("changed schema"))) == len(files)
+
+    files["db/pool.js"] = file_entry("db/pool.js", "module.exports = new Pool({ max: 5 });")
+    assert stale_files(files, cache, schema) == [
+        "controllers/user.controller.js", "db/pool.js", "controllers/book.controller.js",
+    ]
+
+
+def _review(issues):
+    return AIMessage(content="", tool_calls=[{
+        "name": "ReviewVerdict", "id": "call_1",
+        "args": {"verdict": "changes_requested" if issues else "approved", "issues": issues},
+    }])
+
+
+def test_reviewer_sends_only_changed_files_and_merges_cached_verdicts():
+    files = file_map_from_code(CODE)
+    state = {"db_schema": "CREATE TABLE users ();", "server_code": CODE, "files": files,
+             "iterations": 1}
+    book_issue = {"file": "controllers/book.controller.js", "category": "sql_injection",
+                  "message": "string-built query"}
+
+    with patch("src.nodes.reviewer.get_llm") as get_llm:
+        get_llm.return_value.invoke.return_value = _review([book_issue])
+        first = reviewer_node(state)
+
+        files = {**files, "server.js": file_entry("server.js", "app.listen(3000);")}
+        get_llm.return_value.invoke.return_value = _review([])
+        second = reviewer_node({**state, "files": files, "review_cache": first["review_cache"]})
+
+    prompt = get_llm.return_value.invoke.call_args.args[0][-1]["content"]
+    assert "// server.js" in prompt and "// db/pool.js" not in prompt
+    assert "- db/pool.js" in prompt  # listed as unchanged
+    # The unchanged book controller still has its cached issue, so no approval.
+    assert second["review_feedback"] == [
+        "[controllers/book.controller.js] (sql_injection) string-built query"
+    ]
+    assert "final_status" not in second
+    assert len(second["review_cache"]) == len(files)
+
+
+def test_unattributed_feedback_is_not_cached():
+    files = file_map_from_code(CODE)
+    state = {"db_schema": "s", "server_code": CODE, "files": files, "iterations": 1}
+
+    with patch("src.nodes.reviewer.get_llm") as get_llm:
+        get_llm.return_value.invoke.return_value = AIMessage(content="1. Still broken")
+        first = reviewer_node(state)
+        second = reviewer_node({**state, "review_cache": first["review_cache"]})
+
+    assert first["review_feedback"] == ["Still broken"] and first["review_cache"] == {}
+    assert get_llm.return_value.invoke.call_count == 2
+    assert second["review_feedback"] == ["Still broken"]
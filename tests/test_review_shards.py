@@ -0,0 +1,114 @@
+"""Tests for src/utils/review_shards.py and the map-reduce reviewer."""
+
+import asyncio
+import re
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.nodes.reviewer import areviewer_node, reviewer_node
+from src.utils.file_map import file_map_from_code
+from src.utils.review_shards import cross_file_issues, dedupe_issues, review_groups
+
+CODE = "\n".join(
+    f"```javascript\n// {path}\n{content}\n```"
+    for path, content in [
+        ("server.js", "app.use('/api/users', require('./routes/user.routes'));"),
+        ("db/pool.js", "module.exports = new Pool();"),
+        ("routes/user.routes.js", "require('../controllers/user.controller');"),
+        ("controllers/user.controller.js", "require('../db/pool'); require('../utils/validate');"),
+        ("routes/book.routes.js", "require('../controllers/book.controller');"),
+        ("controllers/book.controller.js", "require('../db/pool');"),
+        ("middleware/auth.js", "module.exports = () => {};"),
+    ]
+)
+
+
+def test_review_groups_pair_entities_and_keep_shared_files_together():
+    files = file_map_from_code(CODE)
+
+    assert review_groups(list(files)) == [
+        ["server.js", "db/pool.js"],
+        ["routes/user.routes.js", "controllers/user.controller.js"],
+        ["routes/book.routes.js", "controllers/book.controller.js"],
+        ["middleware/auth.js"],
+    ]
+
+
+def test_cross_file_issues_and_dedupe():
+    issues = cross_file_issues(file_map_from_code(CODE))
+
+    assert issues == [
+        "[controllers/user.controller.js] (bad_import) requires '../utils/validate', "
+        "which is not a generated file",
+        "[server.js] (other) routes/book.routes.js is never mounted: no file requires it",
+    ]
+    assert dedupe_issues(["[a.js] x  y", "[A.js] X y", "[b.js] z"]) == ["[a.js] x  y", "[b.js] z"]
+
+
+class _GroupReviewer:
+    """Flags a SQL issue in every controller it is shown, slowly."""
+
+    def __init__(self, log):
+        self.log = log
+
+    def _reply(self, messages):
+        prompt = messages[-1]["content"]
+        self.log.append(prompt)
+        shown = re.findall(r"// (controllers/\S+)", prompt)
+        issues = [{"file": path, "category": "sql_injection", "message": "interpolated query"}
+                  for path in shown]
+        # Every group also repeats one global complaint, which the reduce step dedupes.
+        issues.append({"file": "db/pool.js", "category": "credentials", "message": "hardcoded"})
+        return AIMessage(content="", tool_calls=[{
+            "name": "ReviewVerdict", "id": "call_1",
+            "args": {"verdict": "changes_requested", "issues": issues},
+        }])
+
+    def invoke(self, messages):
+        time.sleep(0.2)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0.2)
+        return self._reply(messages)
+
+
+def test_sharded_review_maps_groups_in_parallel_and_reduces(monkeypatch):
+    import src.nodes.reviewer as reviewer
+
+    log: list = []
+    monkeypatch.setattr(reviewer, "get_llm", lambda **kw: _GroupReviewer(log))
+    state = {"db_schema": "s", "server_code": CODE, "files": file_map_from_code(CODE),
+             "iterations": 1}
+    config = PipelineConfig(review_shard_threshold=4).runnable_config()
+
+    started = time.perf_counter()
+    update = reviewer_node(state, config)
+    elapsed = time.perf_counter() - started
+
+    assert len(log) == 4 and elapsed < 0.6
+    book = next(prompt for prompt in log if "// routes/book.routes.js" in prompt)
+    assert "// server.js" not in book and "- server.js" in book  # others listed by name
+    feedback = update["review_feedback"]
+    assert feedback.count("[db/pool.js] (credentials) hardcoded") == 1
+    assert "[controllers/book.controller.js] (sql_injection) interpolated query" in feedback
+    assert any("never mounted" in item for item in feedback)
+    assert "final_status" not in update and len(update["llm_calls"]) == 4
+
+    update = asyncio.run(areviewer_node(state, config))
+    assert update["review_feedback"] == feedback
+
+
+def test_small_reviews_use_one_call(monkeypatch):
+    import src.nodes.reviewer as reviewer
+
+    log: list = []
+    monkeypatch.setattr(reviewer, "get_llm", lambda **kw: _GroupReviewer(log))
+    state = {"db_schema": "s", "server_code": CODE, "files": file_map_from_code(CODE),
+             "iterations": 1}
+
+    reviewer_node(state, PipelineConfig().runnable_config())
+
+    assert len(log) == 1
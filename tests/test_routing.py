@@ -0,0 +1,114 @@
+"""Tests for src/utils/routing.py and routed get_llm calls."""
+
+import json
+
+import pytest
+
+from src.state import merge_update
+from src.utils.llm import call_record, get_llm, shutdown_llm_clients, summarize_calls
+from src.utils.routing import GROQ_BASE_URL, load_routing_config, resolve_route
+
+# ---------------------------------------------------------------------------
+# Fixtures
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture(autouse=True)
+def _clean(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    for name in ("LLM_ROUTING", "LLM_ROUTING_FILE", "LLM_MODEL", "LLM_CACHE_DIR",
+                 "LLM_FALLBACK_ENDPOINTS"):
+        monkeypatch.delenv(name, raising=False)
+    shutdown_llm_clients()
+    yield
+    shutdown_llm_clients()
+
+
+# ---------------------------------------------------------------------------
+# Route resolution
+# ---------------------------------------------------------------------------
+
+
+def test_builtin_defaults_keep_node_temperatures():
+    assert resolve_route("reviewer").temperature == 0.1
+    assert resolve_route("developer").temperature == 0.2
+    assert resolve_route("developer").base_url == GROQ_BASE_URL
+
+
+def test_node_section_overrides_default_section():
+    config = {
+        "default": {"model": "big-model", "max_tokens": 4096},
+        "reviewer": {"model": "small-model"},
+    }
+    reviewer = resolve_route("reviewer", config)
+    developer = resolve_route("developer", config)
+
+    assert reviewer.model == "small-model"
+    assert reviewer.max_tokens == 4096
+    assert developer.model == "big-model"
+
+
+def test_toml_routing_file(tmp_path, monkeypatch):
+    path = tmp_path / "routing.toml"
+    path.write_text(
+        '[tdd]\nendpoint = "local"\nbase_url = "http://localhost:8000/v1"\n'
+        'api_key_env = ""\ntimeout = 30.0\n'
+    )
+    monkeypatch.setenv("LLM_ROUTING_FILE", str(path))
+
+    route = resolve_route("tdd")
+    assert route.endpoint == "local"
+    assert route.api_key_env == ""
+    assert route.timeout == 30.0
+
+
+def test_unknown_keys_are_rejected(monkeypatch):
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({"reviewer": {"modle": "typo"}}))
+    with pytest.raises(ValueError, match="modle"):
+        load_routing_config()
+
+
+# ---------------------------------------------------------------------------
+# Against a stub server
+# ---------------------------------------------------------------------------
+
+
+def test_node_routed_to_local_keyless_server(openai_stub, monkeypatch):
+    """A node can be served by any OpenAI-compatible server, without a key."""
+    local = openai_stub(reply="local reply")
+    monkeypatch.setenv("LLM_ROUTING", json.dumps({
+        "reviewer": {
+            "endpoint": "local",
+            "base_url": local.base_url,
+            "model": "local-model",
+            "api_key_env": "",
+            "max_tokens": 256,
+            "temperature": 0.0,
+        },
+    }))
+
+    response = get_llm(node="reviewer").invoke("hi")
+
+    assert response.content == "local reply"
+    request = local.requests[0]
+    assert request["model"] == "local-model"
+    assert request.get("max_completion_tokens", request.get("max_tokens")) == 256
+    assert request["temperature"] == 0.0
+
+    record = call_record("reviewer", response, iteration=1)
+    assert {k: record[k] for k in ("node", "iteration", "model", "endpoint")} == {
+        "node": "reviewer", "iteration": 1, "model": "local-model", "endpoint": "local",
+    }
+
+
+def test_call_records_accumulate_and_summarize():
+    state = {"llm_calls": [], "server_code": ""}
+    for update in (
+        {"llm_calls": [{"node": "developer", "model": "m", "endpoint": "groq"}]},
+        {"llm_calls": [{"node": "developer", "model": "m", "endpoint": "groq"}],
+         "server_code": "x"},
+    ):
+        state = merge_update(state, update)
+
+    assert len(state["llm_calls"]) == 2
+    assert summarize_calls(state["llm_calls"]) == [("developer", "m", "groq", 2)]
@@ -0,0 +1,183 @@
+"""Tests for src/utils/scheduler.py"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.utils import scheduler as scheduler_module
+from src.utils.scheduler import (
+    RequestScheduler,
+    TokenBucket,
+    backoff_delay,
+    estimate_tokens,
+    is_retryable,
+    request_priority,
+    retry_after_seconds,
+)
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+
+class _RateLimited(Exception):
+    """Looks like openai.RateLimitError to the scheduler."""
+
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("rate limited")
+        self.response = MagicMock(headers=headers or {}, status_code=429)
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler_module, "BACKOFF_BASE_SECONDS", 0.001)
+
+
+# ---------------------------------------------------------------------------
+# Estimation, headers and priorities
+# ---------------------------------------------------------------------------
+
+
+def test_estimate_tokens_counts_prompt_and_completion():
+    messages = [
+        {"role": "system", "content": "x" * 400},
+        {"role": "user", "content": "y" * 400},
+    ]
+    assert estimate_tokens(messages, max_output_tokens=100) == 200 + 8 + 100
+
+
+def test_estimate_tokens_accepts_plain_string():
+    assert estimate_tokens("abcd" * 10, max_output_tokens=0) > 0
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({"retry-after": "3"}, 3.0),
+        ({"retry-after-ms": "1500"}, 1.5),
+        ({"x-ratelimit-reset-tokens": "1m2.5s"}, 62.5),
+        ({"x-ratelimit-reset-requests": "120ms"}, 0.12),
+        ({}, None),
+    ],
+)
+def test_retry_after_seconds(headers, expected):
+    result = retry_after_seconds(_RateLimited(headers))
+    if expected is None:
+        assert result is None
+    else:
+        assert result == pytest.approx(expected)
+
+
+def test_backoff_respects_retry_after():
+    assert backoff_delay(0, retry_after=5.0) >= 5.0
+
+
+def test_is_retryable():
+    assert is_retryable(_RateLimited())
+    assert not is_retryable(ValueError("bad request"))
+
+
+def test_reviewer_on_late_iteration_outranks_fresh_architect():
+    assert request_priority("reviewer", 3) < request_priority("architect", 0)
+    assert request_priority("reviewer", 3) < request_priority("reviewer", 1)
+
+
+# ---------------------------------------------------------------------------
+# Buckets and admission
+# ---------------------------------------------------------------------------
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(60, per_seconds=60)
+    now = time.monotonic()
+    bucket.consume(60, now)
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1.0) == 0.0
+
+
+def test_settle_refunds_overestimated_tokens():
+    sched = RequestScheduler(tpm=1000)
+    sched.acquire(500)
+    sched.settle(estimated=500, actual=100)
+    assert sched.tokens.tokens == pytest.approx(900, abs=5)
+
+
+def test_priority_order_when_quota_frees_up():
+    """Queued callers are admitted lowest-priority-value first."""
+    sched = RequestScheduler(rpm=600)  # one request per 0.1 s
+    sched.requests.tokens = 0
+    order: list[str] = []
+
+    def worker(name, priority):
+        sched.acquire(1, priority)
+        order.append(name)
+
+    threads = [
+        threading.Thread(target=worker, args=("architect", 30)),
+        threading.Thread(target=worker, args=("reviewer", 0)),
+    ]
+    for t in threads:
+        t.start()
+        time.sleep(0.02)  # make sure both are queued before capacity returns
+    for t in threads:
+        t.join(timeout=5)
+
+    assert order == ["reviewer", "architect"]
+
+
+def test_call_retries_rate_limit_then_succeeds():
+    sched = RequestScheduler(max_retries=3)
+    attempts = {"n": 0}
+
+    def flaky():
+        attempts["n"] += 1
+        if attempts["n"] < 3:
+            raise _RateLimited({"retry-after-ms": "1"})
+        return "ok"
+
+    assert sched.call(flaky, cost=10) == "ok"
+    assert sched.stats["retries"] == 2
+    assert sched.stats["rate_limited"] == 2
+
+
+def test_call_gives_up_after_max_retries():
+    sched = RequestScheduler(max_retries=1)
+
+    def always_limited():
+        raise _RateLimited({"retry-after-ms": "1"})
+
+    with pytest.raises(_RateLimited):
+        sched.call(always_limited, cost=10)
+
+
+def test_non_retryable_error_raises_immediately():
+    sched = RequestScheduler(max_retries=5)
+    calls = {"n": 0}
+
+    def broken():
+        calls["n"] += 1
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        sched.call(broken, cost=10)
+    assert calls["n"] == 1
+
+
+def test_acall_shares_quota_with_async_tasks():
+    sched = RequestScheduler(rpm=600)
+
+    async def one(i):
+        async def fn():
+            return i
+        return await sched.acall(fn, cost=1, priority=i)
+
+    async def main():
+        return await asyncio.gather(*(one(i) for i in range(3)))
+
+    assert sorted(asyncio.run(main())) == [0, 1, 2]
+    assert sched.stats["admitted"] == 3
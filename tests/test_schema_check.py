@@ -0,0 +1,104 @@
+"""Tests for src/utils/catalog.py and src/utils/schema_check.py."""
+
+from src.nodes.static_check import static_check_node
+from src.utils.catalog import ForeignKey, parse_catalog
+from src.utils.file_map import file_map_from_code
+from src.utils.schema_check import check_files, sql_problems
+
+SCHEMA = """
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE TABLE users (
+  id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+  email VARCHAR(255) NOT NULL UNIQUE, -- login name
+  name TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE orders (
+  id UUID DEFAULT gen_random_uuid(),
+  user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+  total NUMERIC(10, 2) CHECK (total >= 0),
+  status TEXT DEFAULT 'pending',
+  CONSTRAINT orders_pk PRIMARY KEY (id)
+);
+CREATE INDEX idx_orders_status ON orders (status DESC) WHERE (status <> 'done');
+ALTER TABLE orders ADD COLUMN IF NOT EXISTS coupon_id UUID,
+  ADD CONSTRAINT fk_coupon FOREIGN KEY (coupon_id) REFERENCES public.coupons (id);
+"""
+
+
+def test_parse_catalog_reads_columns_constraints_and_indexes():
+    catalog = parse_catalog(SCHEMA)
+    users, orders = catalog.tables["users"], catalog.tables["orders"]
+
+    assert list(users.columns) == ["id", "email", "name", "created_at"]
+    assert users.columns["id"].default == "gen_random_uuid()" and not users.columns["id"].nullable
+    assert users.columns["email"].type == "VARCHAR(255)" and users.unique == [("email",)]
+    assert orders.columns["total"].type == "NUMERIC(10, 2)"
+    assert orders.columns["status"].default == "'pending'"
+    assert orders.primary_key == ("id",) and not orders.columns["id"].nullable
+    assert orders.foreign_keys == [
+        ForeignKey(("user_id",), "users", ("id",)),
+        ForeignKey(("coupon_id",), "coupons", ("id",)),
+    ]
+    assert orders.indexed(("status",)) and not orders.indexed(("user_id",))
+    assert catalog.has_column("public.Orders", "coupon_id")
+
+
+def test_create_table_as_select_has_unknown_columns():
+    sql = SCHEMA + (
+        "CREATE TABLE order_totals AS "
+        "SELECT user_id, SUM(total) AS spent FROM (SELECT * FROM orders) o;"
+    )
+    catalog = parse_catalog(sql)
+
+    assert not catalog.tables["order_totals"].columns_known
+    assert sql_problems("SELECT spent, t.user_id FROM order_totals t", catalog) == []
+    update = static_check_node({"files": file_map_from_code(""), "db_schema": sql})
+    assert update["static_issues"] == []
+
+
+def test_sql_problems_check_tables_and_columns_conservatively():
+    catalog = parse_catalog(SCHEMA)
+
+    assert sql_problems("SELECT id, emial FROM users WHERE id = $1", catalog) == [
+        "column `emial` is not in table `users` (did you mean `email`?)"
+    ]
+    assert sql_problems(
+        "SELECT u.name, o.totl FROM users u JOIN orders o ON o.user_id = u.id", catalog
+    ) == ["column `orders.totl` is not in the schema (did you mean `total`?)"]
+    assert sql_problems("DELETE FROM ordrs WHERE id = $1", catalog) == [
+        "table `ordrs` is not in the schema (did you mean `orders`?)"
+    ]
+    for sql in [
+        "SELECT COUNT(*) AS n, SUM(total) revenue FROM orders GROUP BY status ORDER BY revenue",
+        "SELECT * FROM users WHERE id IN (SELECT user_id FROM orders) "
+        "AND EXTRACT(YEAR FROM created_at) = 2024",
+        "WITH recent AS (SELECT * FROM orders) SELECT anything FROM recent",
+        "INSERT INTO users (email, name) VALUES ($1, $2) "
+        "ON CONFLICT (email) DO UPDATE SET name = EXCLUDED.name RETURNING *",
+        "UPDATE users SET $0 WHERE id = $$0 RETURNING id, created_at::date",
+    ]:
+        assert sql_problems(sql, catalog) == [], sql
+
+
+def test_static_check_reports_mismatches_from_recovered_sql():
+    code = (
+        "```javascript\n// controllers/order.controller.js\n"
+        "let sql = 'SELECT * FROM orders WHERE 1=1';\n"
+        "if (s) sql += ' AND state = $1';\n"
+        "const { rows } = await pool.query(sql, values);\n"
+        "await pool.query({ text: `UPDATE users SET nme = $1 WHERE id = $${2}`, values });\n"
+        "await pool.query(`SELECT * FROM orders_${year}`);\n```"
+    )
+    files = file_map_from_code(code)
+
+    assert check_files(files, parse_catalog(SCHEMA)) == [
+        "[controllers/order.controller.js] (schema_mismatch) line 3: "
+        "column `state` is not in table `orders` (did you mean `status`?)",
+        "[controllers/order.controller.js] (schema_mismatch) line 4: "
+        "column `nme` is not in table `users` (did you mean `name`?)",
+    ]
+    assert check_files(files, parse_catalog("")) == []
+    update = static_check_node({"files": files, "db_schema": SCHEMA})
+    assert len(update["static_issues"]) == 2 and update["test_status"] == "skipped"
+    assert len(update["static_hints"]) == 1  # orders_${year}: not a request value
@@ -0,0 +1,105 @@
+"""Tests for src/utils/schema_lint.py and the schema lint node."""
+
+import asyncio
+
+from src.nodes.schema_lint import aschema_lint_node, schema_lint_node
+from src.utils.catalog import parse_catalog
+from src.utils.schema_lint import lint_schema
+
+SCHEMA = """
+-- Authors write posts.
+CREATE TABLE authors (
+  id UUID PRIMARY KEY,
+  "displayName" TEXT NOT NULL,
+  created_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+CREATE TABLE posts (
+  title TEXT NOT NULL,
+  author_id UUID NOT NULL REFERENCES authors(id),
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE TABLE tags (
+  id SERIAL PRIMARY KEY,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+
+
+def test_lint_fixes_keys_timestamps_and_foreign_key_indexes():
+    linted = lint_schema(SCHEMA)
+
+    assert linted.fixes == [
+        "authors: id now defaults to gen_random_uuid()",
+        "authors: created_at changed from TIMESTAMP to TIMESTAMPTZ",
+        "authors: added updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()",
+        "posts: added id UUID PRIMARY KEY DEFAULT gen_random_uuid()",
+        "posts: indexed foreign key (author_id)",
+    ]
+    assert linted.violations == [
+        "authors: column displayName is not snake_case",
+        "tags: primary key (id) is not a single UUID column defaulting to gen_random_uuid()",
+    ]
+    catalog = parse_catalog(linted.sql)
+    authors, posts = catalog.tables["authors"], catalog.tables["posts"]
+    assert authors.columns["id"].default == "gen_random_uuid()"
+    assert authors.columns["created_at"].type == "TIMESTAMPTZ"
+    assert list(authors.columns) == ["id", "displayname", "created_at", "updated_at"]
+    assert posts.primary_key == ("id",) and posts.indexed(("author_id",))
+    assert "CREATE INDEX IF NOT EXISTS idx_posts_author_id ON posts (author_id);" in linted.sql
+
+
+def test_lint_is_idempotent_and_keeps_clean_schemas_verbatim():
+    fixed = lint_schema(SCHEMA).sql
+    again = lint_schema(fixed)
+
+    assert again.fixes == [] and again.sql == fixed
+    assert lint_schema("").sql == ""
+
+
+def test_schema_lint_node_updates_the_schema_and_reports_fixes():
+    update = schema_lint_node({"db_schema": SCHEMA})
+
+    assert update["db_schema"] == lint_schema(SCHEMA).sql
+    assert len(update["schema_fixes"]) == 5 and len(update["schema_violations"]) == 2
+    assert asyncio.run(aschema_lint_node({"db_schema": SCHEMA})) == update
+
+
+def test_lint_leaves_tables_without_a_column_list_alone():
+    ctas = "CREATE TABLE post_counts AS SELECT author_id, COUNT(*) AS n FROM posts GROUP BY author_id;"
+
+    linted = lint_schema(SCHEMA + ctas)
+
+    assert ctas in linted.sql
+    assert not any(line.startswith("post_counts") for line in linted.fixes + linted.violations)
+
+
+def test_lint_fixes_columns_added_by_alter_table_with_alter_statements():
+    linted = lint_schema(
+        "CREATE TABLE t (updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW());\n"
+        "ALTER TABLE t ADD COLUMN id UUID;\n"
+        "ALTER TABLE t ADD COLUMN created_at TIMESTAMP;"
+    )
+
+    assert linted.fixes == [
+        "t: made id the primary key",
+        "t: id now defaults to gen_random_uuid()",
+        "t: created_at changed from TIMESTAMP to TIMESTAMPTZ",
+    ]
+    assert linted.sql.endswith(
+        "ALTER TABLE t ADD PRIMARY KEY (id);\n\n"
+        "ALTER TABLE t ALTER COLUMN id SET DEFAULT gen_random_uuid();\n\n"
+        "ALTER TABLE t ALTER COLUMN created_at TYPE TIMESTAMPTZ;"
+    )
+    assert lint_schema(linted.sql).fixes == []
+
+
+def test_lint_skips_tables_copying_columns_with_like():
+    ctas = "CREATE TABLE archived_authors (LIKE authors INCLUDING ALL);"
+    linted = lint_schema(SCHEMA + ctas)
+
+    assert ctas in linted.sql
+    assert not any(line.startswith("archived_authors") for line in linted.fixes + linted.violations)
+    catalog = parse_catalog(linted.sql)
+    assert catalog.tables["archived_authors"].columns == catalog.tables["authors"].columns
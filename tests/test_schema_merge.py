@@ -0,0 +1,123 @@
+"""Tests for src/utils/schema_merge.py and the architect's bounded-context mode."""
+
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.nodes.architect import aarchitect_node, architect_node
+from src.utils.ddl import parse_tables, split_statements
+from src.utils.schema_merge import merge_schemas
+
+IDENTITY = """
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE TABLE users (id UUID PRIMARY KEY, email TEXT NOT NULL UNIQUE);
+CREATE INDEX idx_users_email ON users(email);
+"""
+
+ORDERING = """
+CREATE EXTENSION IF NOT EXISTS pgcrypto;
+CREATE TYPE order_status AS ENUM ('new', 'paid');
+CREATE TABLE order_items (
+    id UUID PRIMARY KEY,
+    order_id UUID NOT NULL REFERENCES orders(id)
+);
+CREATE TABLE orders (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES "user"(id),
+    coupon_id UUID REFERENCES coupons(id),
+    status order_status NOT NULL
+);
+-- A stand-in for the identity context's table
+CREATE TABLE users (id UUID PRIMARY KEY);
+CREATE INDEX idx_users_id ON users(id);
+"""
+
+
+def test_merge_reconciles_duplicates_spellings_and_order():
+    merged = merge_schemas(
+        [("ordering", ORDERING), ("identity", IDENTITY)],
+        owners={"user": "identity", "order": "ordering", "order_item": "ordering"},
+    )
+    tables = parse_tables(merged.sql)
+
+    # The owner's definition of the shared table wins, and its own index survives.
+    assert "email" in tables["users"]
+    assert "idx_users_email" in merged.sql and "idx_users_id" not in merged.sql
+    # "user" is renamed to the table that exists; referenced tables come first.
+    assert "REFERENCES users(id)" in tables["orders"]
+    assert list(tables) == ["users", "orders", "order_items"]
+    assert merged.sql.count("CREATE EXTENSION") == 1
+    assert merged.sql.index("CREATE TYPE") < merged.sql.index("CREATE TABLE")
+    assert any("renamed to users" in note for note in merged.notes)
+    assert merged.problems == ["orders references coupons, which no context defines"]
+    assert all(s.endswith(";") for s in split_statements(merged.sql))
+
+
+class _ArchitectLLM:
+    """Plans two contexts, then answers each context prompt with its DDL, slowly."""
+
+    def __init__(self, schema, log):
+        self.schema = schema
+        self.log = log
+
+    def _reply(self, messages):
+        prompt = messages[-1].content
+        self.log.append(prompt)
+        if self.schema is not None:
+            return AIMessage(content="", tool_calls=[{
+                "name": "BoundedContexts", "id": "call_1", "args": {"contexts": [
+                    {"name": "identity", "requirements": "users log in",
+                     "entities": ["users"]},
+                    {"name": "ordering", "requirements": "users place orders",
+                     "entities": ["orders", "order_items"], "references": ["users"]},
+                ]},
+            }])
+        ddl = IDENTITY if "`identity`" in prompt else ORDERING
+        return AIMessage(content=f"```sql\n{ddl}\n```")
+
+    def invoke(self, messages):
+        time.sleep(0.2)
+        return self._reply(messages)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0.2)
+        return self._reply(messages)
+
+
+def _patch_architect(monkeypatch, log):
+    import src.nodes.architect as architect
+
+    monkeypatch.setattr(architect, "_get_available_tools", lambda pipeline=None: [])
+    monkeypatch.setattr(
+        architect, "get_llm", lambda **kw: _ArchitectLLM(kw.get("schema"), log)
+    )
+
+
+def test_architect_designs_contexts_in_parallel_and_merges(monkeypatch):
+    log: list = []
+    _patch_architect(monkeypatch, log)
+    config = PipelineConfig(partition_threshold=1).runnable_config()
+
+    started = time.perf_counter()
+    update = architect_node({"requirements": "a large system"}, config)
+    elapsed = time.perf_counter() - started
+
+    assert len(log) == 3 and len(update["llm_calls"]) == 3
+    assert elapsed < 0.55  # plan, then both contexts at once
+    assert "Tables Owned by Other Contexts\nReference these" in log[2]
+    assert "- users" in next(p for p in log if "`ordering`" in p)
+    assert set(parse_tables(update["db_schema"])) == {"users", "orders", "order_items"}
+
+    update = asyncio.run(aarchitect_node({"requirements": "a large system"}, config))
+    assert "REFERENCES users(id)" in update["db_schema"]
+
+
+def test_short_requirements_use_a_single_call(monkeypatch):
+    log: list = []
+    _patch_architect(monkeypatch, log)
+
+    architect_node({"requirements": "a todo app"}, PipelineConfig().runnable_config())
+
+    assert len(log) == 1 and "Design the PostgreSQL database schema" in log[0]
@@ -0,0 +1,157 @@
+"""Tests for src/utils/ddl.py, src/utils/sharding.py and sharded developer generation."""
+
+import asyncio
+import re
+import time
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.nodes.developer import adeveloper_node, developer_node
+from src.utils.ddl import entity_name, parse_tables, referenced_tables, type_definitions
+from src.utils.file_map import file_map_from_code
+from src.utils.sharding import check_consistency, entity_shards, shards_for
+
+SCHEMA = """
+CREATE TYPE order_status AS ENUM ('new', 'paid');
+
+-- Customers (the "s;" here must not end the statement)
+CREATE TABLE IF NOT EXISTS customers (
+    id SERIAL PRIMARY KEY,
+    note TEXT DEFAULT 'a;b'
+);
+
+CREATE TABLE "Orders" (
+    id SERIAL PRIMARY KEY,
+    customer_id INT REFERENCES customers(id),
+    status order_status NOT NULL
+);
+
+CREATE TABLE categories (id SERIAL PRIMARY KEY);
+CREATE INDEX idx_orders_customer ON "Orders"(customer_id);
+"""
+
+
+def test_parse_tables_types_and_references():
+    tables = parse_tables(SCHEMA)
+
+    assert list(tables) == ["customers", "orders", "categories"]
+    assert tables["customers"].endswith(");") and "'a;b'" in tables["customers"]
+    assert referenced_tables(tables["orders"]) == ["customers"]
+    assert type_definitions(SCHEMA) == ["CREATE TYPE order_status AS ENUM ('new', 'paid');"]
+    assert [entity_name(t) for t in ("categories", "addresses", "status", "order_items")] == [
+        "category", "address", "status", "order_item",
+    ]
+
+
+def test_entity_shards_carry_referenced_tables_and_types():
+    shards = {shard.entity: shard for shard in entity_shards(SCHEMA)}
+
+    order = shards["order"]
+    assert order.routes_path == "routes/order.routes.js"
+    assert order.mount_path == "/api/orders"
+    assert "CREATE TABLE IF NOT EXISTS customers" in order.ddl and "order_status" in order.ddl
+    assert '"Orders"' not in shards["customer"].ddl
+    assert shards_for(SCHEMA, 3) and not shards_for(SCHEMA, 4) and not shards_for(SCHEMA, 0)
+
+
+def _files(entities, mounted=None, with_pool=True):
+    blocks = ["```javascript\n// db/pool.js\nmodule.exports = pool;\n```",
+              "```json\n// package.json\n{}\n```"]
+    requires = "\n".join(
+        f"app.use('/api/x', require('./routes/{e}.routes'));" for e in (mounted or entities)
+    )
+    blocks.append(f"```javascript\n// server.js\n{requires}\n```")
+    pool = "const pool = require('../db/pool');" if with_pool else ""
+    for e in entities:
+        blocks.append(f"```javascript\n// routes/{e}.routes.js\n"
+                      f"const c = require('../controllers/{e}.controller');\n```")
+        blocks.append(f"```javascript\n// controllers/{e}.controller.js\n{pool}\n```")
+    return file_map_from_code("\n".join(blocks))
+
+
+def test_check_consistency():
+    shards = entity_shards(SCHEMA)
+    entities = [shard.entity for shard in shards]
+
+    assert check_consistency(_files(entities), shards) == []
+    problems = check_consistency(_files(entities[:2], mounted=entities[:1]), shards)
+    assert ("server.js", "does not mount routes/order.routes.js at /api/orders") in problems
+    assert ("routes/category.routes.js", "file is missing") in problems
+    assert ("controllers/category.controller.js", "file is missing") in problems
+    assert check_consistency(_files(entities, with_pool=False), shards)[0][1] == \
+        "does not require db/pool.js"
+
+
+class _ShardLLM:
+    """Answers shared and entity prompts with matching files, slowly, and records them."""
+
+    def __init__(self, log, forget_mount=None):
+        self.log = log
+        self.forget_mount = forget_mount
+
+    def _reply(self, messages):
+        prompt = messages[-1]["content"]
+        self.log.append(prompt)
+        match = re.search(r"`routes/(\w+)\.routes\.js`", prompt)
+        if prompt.startswith("Generate ONLY the shared files"):
+            entities = re.findall(r"require\('\./routes/(\w+)\.routes'\)", prompt)
+            if self.forget_mount and "Consistency Problems" not in prompt:
+                entities.remove(self.forget_mount)
+            files = _files(entities)
+            return "\n".join(
+                f"```javascript\n// {path}\n{entry['content']}\n```"
+                for path, entry in files.items()
+                if path in ("server.js", "db/pool.js", "package.json")
+            )
+        entity = match.group(1)
+        return (f"```javascript\n// routes/{entity}.routes.js\n"
+                f"const c = require('../controllers/{entity}.controller');\n```\n"
+                f"```javascript\n// controllers/{entity}.controller.js\n"
+                f"const pool = require('../db/pool');\n```")
+
+    def invoke(self, messages):
+        time.sleep(0.2)
+        return AIMessage(content=self._reply(messages))
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(0.2)
+        return AIMessage(content=self._reply(messages))
+
+
+def _state():
+    return {"requirements": "r", "db_schema": SCHEMA, "review_feedback": []}
+
+
+def test_sharded_generation_runs_entities_in_parallel(monkeypatch):
+    import src.nodes.developer as developer
+
+    log: list = []
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: _ShardLLM(log))
+    config = PipelineConfig(shard_threshold=3).runnable_config()
+
+    started = time.perf_counter()
+    update = developer_node(_state(), config)
+    elapsed = time.perf_counter() - started
+
+    assert len(log) == 4  # shared + three entities
+    assert elapsed < 0.6  # one round of parallel calls, not four sequential ones
+    assert {"routes/order.routes.js", "controllers/category.controller.js",
+            "server.js", "db/pool.js"} <= set(update["files"])
+    assert "// routes/customer.routes.js" in update["server_code"]
+    entity_prompt = next(p for p in log if "`routes/order.routes.js`" in p)
+    assert "order_status" in entity_prompt and "categories" not in entity_prompt
+
+
+def test_inconsistent_shards_are_regenerated_once(monkeypatch):
+    import src.nodes.developer as developer
+
+    log: list = []
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: _ShardLLM(log, forget_mount="order"))
+    config = PipelineConfig(shard_threshold=3).runnable_config()
+
+    update = asyncio.run(adeveloper_node(_state(), config))
+
+    assert len(log) == 5  # the shared call is repeated with the problem listed
+    assert "`server.js` does not mount routes/order.routes.js" in log[-1]
+    assert check_consistency(update["files"], entity_shards(SCHEMA)) == []
@@ -0,0 +1,149 @@
+"""Tests for speculative multi-candidate developer generation."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.nodes.developer import adeveloper_node, developer_node
+from src.nodes.reviewer import areviewer_node, reviewer_node
+from src.utils.speculative import afirst_accepted, candidate_temperatures, first_accepted
+
+
+def test_candidate_temperatures_step_up_and_cap():
+    assert candidate_temperatures(0.2, 3) == [0.2, 0.45, 0.7]
+    assert candidate_temperatures(0.8, 3) == [0.8, 1.0, 1.0]
+
+
+def test_first_accepted_returns_winner_and_finished():
+    jobs = [lambda: 1, lambda: 2, lambda: 3]
+    winner, finished = first_accepted(jobs, lambda n: n == 2)
+    assert winner == 2 and 2 in finished
+
+    winner, finished = first_accepted(jobs, lambda n: False)
+    assert winner is None and sorted(finished) == [1, 2, 3]
+
+
+def test_afirst_accepted_cancels_losers():
+    cancelled = []
+
+    async def fast():
+        return "fast"
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def main():
+        return await afirst_accepted([slow, fast], lambda r: r == "fast")
+
+    winner, finished = asyncio.run(main())
+
+    assert (winner, finished) == ("fast", ["fast"])
+    assert cancelled == ["slow"]
+
+
+# ---------------------------------------------------------------------------
+# Developer node
+# ---------------------------------------------------------------------------
+
+
+class _FakeLLM:
+    """Returns a canned reply, optionally after a delay."""
+
+    def __init__(self, reply, delay=0.0):
+        self.reply, self.delay = reply, delay
+
+    def invoke(self, messages, *args, **kwargs):
+        return AIMessage(content=self.reply)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        await asyncio.sleep(self.delay)
+        return self.invoke(messages)
+
+
+def _patch(monkeypatch, reviews):
+    import src.nodes.developer as developer
+    import src.nodes.reviewer as reviewer
+
+    def developer_llm(temperature=None, **kw):
+        return _FakeLLM(f"```javascript\n// server.js\n// t={temperature}\n```")
+
+    def reviewer_llm(**kw):
+        return _Reviewer(reviews)
+
+    monkeypatch.setattr(developer, "get_llm", developer_llm)
+    monkeypatch.setattr(reviewer, "get_llm", reviewer_llm)
+
+
+class _Reviewer:
+    """Approves only the code written at one temperature; counts calls."""
+
+    def __init__(self, reviews):
+        self.reviews = reviews
+
+    def _review(self, messages):
+        user = messages[-1]["content"]
+        self.reviews.append(user)
+        return AIMessage(content="APPROVED" if "t=0.45" in user else "1. Try again")
+
+    def invoke(self, messages, *args, **kwargs):
+        return self._review(messages)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        # The approved candidate answers first; the others are still running.
+        approved = "t=0.45" in messages[-1]["content"]
+        await asyncio.sleep(0 if approved else 5)
+        return self._review(messages)
+
+
+_STATE = {"requirements": "r", "db_schema": "s", "review_feedback": [], "iterations": 0}
+
+
+def test_first_approved_candidate_wins_and_review_is_reused(monkeypatch):
+    reviews: list = []
+    _patch(monkeypatch, reviews)
+    config = PipelineConfig(candidates=3).runnable_config()
+
+    update = asyncio.run(adeveloper_node(dict(_STATE), config))
+
+    assert "t=0.45" in update["server_code"]
+    assert update["iterations"] == 1
+    assert update["speculative_review"]["final_status"] == "approved"
+    # Slow candidates were cancelled before their review finished.
+    assert len(reviews) == 1
+    assert {c["node"] for c in update["llm_calls"]} == {"developer", "reviewer"}
+    assert {c["candidate"] for c in update["llm_calls"]} == {1}
+
+    review = asyncio.run(areviewer_node({**_STATE, **update}, config))
+    assert review == {"final_status": "approved", "review_feedback": [], "llm_calls": []}
+    assert len(reviews) == 1
+
+
+def test_without_approval_the_candidate_with_fewest_issues_is_kept(monkeypatch):
+    reviews: list = []
+    _patch(monkeypatch, reviews)
+    monkeypatch.setattr(_Reviewer, "_review", lambda self, messages: (
+        self.reviews.append(1) or AIMessage(content="1. a\n2. b")
+    ))
+    config = PipelineConfig(candidates=2).runnable_config()
+
+    update = developer_node(dict(_STATE), config)
+
+    assert len(reviews) == 2
+    assert update["speculative_review"]["review_feedback"] == ["a", "b"]
+    assert reviewer_node({**_STATE, **update}, config)["review_feedback"] == ["a", "b"]
+
+
+def test_single_candidate_is_the_default(monkeypatch):
+    reviews: list = []
+    _patch(monkeypatch, reviews)
+
+    update = developer_node(dict(_STATE))
+
+    assert update["speculative_review"] is None
+    assert "t=None" in update["server_code"]
+    assert reviews == []
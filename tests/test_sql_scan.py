@@ -0,0 +1,196 @@
+"""Tests for src/utils/sql_scan.py and the static check gate in the graph."""
+
+import asyncio
+
+from langchain_core.messages import AIMessage
+
+from src.config import PipelineConfig
+from src.graph import build_graph
+from src.nodes.static_check import static_check_node
+from src.utils.file_map import file_map_from_code
+from src.utils.sql_scan import fragment_files, scan_files, scan_source, sql_fragments
+
+SOURCE = r"""// pool.query(`SELECT ${x}`) in a comment is ignored
+const a = await pool.query('SELECT * FROM users WHERE id = $1', [id]);
+const b = await pool.query(`SELECT * FROM users WHERE id = ${req.params.id}`);
+const c = await client.query("SELECT * FROM t WHERE name = '" + name + "'");
+let sql = 'SELECT * FROM t WHERE 1=1';
+if (q) sql += ' AND name = ' + q;
+if (r) sql += ' AND r = $2';
+const d = await db.query(sql);
+const text = `UPDATE t SET x = $1 WHERE id = $${keys.length + 1}`;
+await pool.query(text, values);
+const e = await pool.query({ text: `SELECT ${col} FROM t`, values: [] });
+const msg = `Hello ${name}`;
+const s2 = 'SELECT 1'
+const f = await pool.query(s2)
+"""
+
+
+def test_scan_flags_interpolation_and_concatenation_only():
+    assert scan_source(SOURCE) == [(3, "a template literal interpolating values")]
+    # name, q and col are not request values or parameters here: hints, not failures.
+    assert sql_fragments(SOURCE) == [
+        (4, "string concatenation"),
+        (8, "string concatenation (assigned to `sql`)"),
+        (11, "a template literal interpolating values"),
+    ]
+
+
+def test_scan_follows_request_values_and_parameters():
+    source = (
+        "async function byId(id) {\n"
+        "  return pool.query(`SELECT * FROM users WHERE id = ${id}`);\n"
+        "}\n"
+        "router.get('/', async (req, res) => {\n"
+        "  const { name } = req.query;\n"
+        "  const keys = Object.keys(req.body);\n"
+        "  await pool.query(`SELECT * FROM users WHERE name = '${name}'`);\n"
+        "  for (const key of keys) await pool.query('UPDATE users SET ' + key + ' = $1', [1]);\n"
+        "});\n"
+    )
+
+    assert scan_source(source) == [
+        (2, "a template literal interpolating values"),
+        (7, "a template literal interpolating values"),
+        (8, "string concatenation"),
+    ]
+    assert sql_fragments(source) == []
+
+
+def test_scan_allows_update_column_lists():
+    mapped = r"""const UPDATABLE = ['name', 'email'];
+router.patch('/:id', async (req, res) => {
+  const fields = UPDATABLE.filter((field) => req.body[field] !== undefined);
+  const values = fields.map((field) => req.body[field]);
+  await pool.query(
+    `UPDATE users SET ${fields.map((f, i) => `${f} = $${i + 1}`).join(', ')} WHERE id = $${fields.length + 1}`,
+    [...values, req.params.id]
+  );
+});
+"""
+    joined = r"""const UPDATABLE = ['name', 'email'];
+router.put('/:id', async (req, res) => {
+  const sets = [];
+  const values = [];
+  for (const column of UPDATABLE) {
+    if (req.body[column] !== undefined) {
+      values.push(req.body[column]);
+      sets.push(`${column} = $${values.length}`);
+    }
+  }
+  values.push(req.params.id);
+  await pool.query(`UPDATE users SET ${sets.join(', ')} WHERE id = $${values.length}`, values);
+});
+"""
+
+    assert scan_source(mapped) == []
+    assert sql_fragments(mapped) == [(5, "a template literal interpolating values")]
+    assert scan_source(joined) == []
+    assert sql_fragments(joined) == [(12, "a template literal interpolating values")]
+
+
+def test_scan_allows_concatenated_constants():
+    source = (
+        "const base = 'SELECT * FROM users ';\n"
+        "const a = await pool.query('SELECT * FROM users ' +\n  'WHERE id = $1', [id]);\n"
+        "const where = 'WHERE id = $' + 1;\n"
+        "const b = await pool.query(base + where, [id]);\n"
+        "const c = await pool.query(base + req.query.filter);\n"
+    )
+
+    assert scan_source(source) == [(6, "string concatenation")]
+
+
+def test_scan_resolves_variables_per_function():
+    source = (
+        "async function list(req) {\n"
+        "  const sql = 'SELECT * FROM users WHERE name = ' + req.query.name;\n"
+        "  return pool.query(sql);\n"
+        "}\n"
+        "async function get(req) {\n"
+        "  const sql = 'SELECT * FROM users WHERE id = $1';\n"
+        "  return pool.query(sql, [req.params.id]);\n"
+        "}\n"
+    )
+
+    assert scan_source(source) == [(3, "string concatenation (assigned to `sql`)")]
+
+
+def test_scan_files_uses_reviewer_format_and_skips_non_js():
+    files = file_map_from_code(
+        "```javascript\n// controllers/user.controller.js\n"
+        "const remove = (id) => pool.query(`DELETE FROM users WHERE id = ${id}`);\n```\n"
+        "```markdown\n// README.md\npool.query(`${x}`)\n```"
+    )
+
+    (issue,) = scan_files(files)
+    assert issue.startswith("[controllers/user.controller.js] (sql_injection) line 1:")
+
+
+class _FakeLLM:
+    def __init__(self, content, calls=None):
+        self.content = content
+        self.calls = calls
+
+    def invoke(self, messages, config=None, **kwargs):
+        if self.calls is not None:
+            self.calls.append(1)
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        return self.invoke(messages)
+
+
+def test_unsafe_queries_skip_the_llm_review(tmp_path, monkeypatch):
+    import src.nodes.architect as architect
+    import src.nodes.developer as developer
+    import src.nodes.reviewer as reviewer
+
+    unsafe = "```javascript\n// server.js\napp.get('/', (req) => pool.query('SELECT ' + req.query.x));\n```"
+    review_calls: list = []
+    monkeypatch.setattr(architect, "_get_available_tools", lambda pipeline=None: [])
+    monkeypatch.setattr(architect, "get_llm", lambda **kw: _FakeLLM("CREATE TABLE t ();"))
+    monkeypatch.setattr(developer, "get_llm", lambda **kw: _FakeLLM(unsafe))
+    monkeypatch.setattr(reviewer, "get_llm", lambda **kw: _FakeLLM("APPROVED", review_calls))
+
+    state = {
+        "requirements": "r", "db_schema": "", "server_code": "", "review_feedback": [],
+        "iterations": 0, "final_status": "pending", "output_dir": str(tmp_path),
+        "test_results": "", "test_status": "", "llm_calls": [],
+    }
+
+    async def run():
+        nodes, final = [], {}
+        config = PipelineConfig(max_iterations=1).runnable_config()
+        async for event in build_graph().astream(state, config, stream_mode="updates"):
+            nodes.extend(event)
+        async for values in build_graph().astream(state, config, stream_mode="values"):
+            final = values
+        return nodes, final
+
+    nodes, final = asyncio.run(run())
+
+    assert nodes[-2:] == ["static_check_node", "join_node"]
+    assert review_calls == []
+    assert final["final_status"] == "pending"
+    assert final["review_feedback"][0].startswith("[server.js] (sql_injection) line 1:")
+    assert static_check_node({"files": final["files"]})["static_issues"]
+
+
+def test_sql_fragments_reach_the_reviewer_without_stopping_the_round():
+    from src.nodes.reviewer import _build_messages
+
+    code = (
+        "```javascript\n// models/user.js\nconst COLUMNS = ['name'];\n"
+        "const update = (id) => pool.query(`UPDATE users SET ${COLUMNS.join(', ')} = $1 WHERE id = $2`);\n```"
+    )
+    files = file_map_from_code(code)
+    update = static_check_node({"files": files})
+
+    assert update["static_issues"] == []
+    (hint,) = update["static_hints"]
+    assert hint.startswith("[models/user.js] (sql_fragment) line 2:")
+    assert hint == fragment_files(files)[0]
+    prompt = _build_messages({**update, "server_code": code, "db_schema": ""})[1]["content"]
+    assert "## Static Check Notes" in prompt and hint in prompt
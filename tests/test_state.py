@@ -1,6 +1,14 @@
 """Tests for the GraphState schema."""
 
-from src.state import GraphState
+from src.nodes.developer import _build_messages
+from src.state import (
+    MAX_FEEDBACK_TOKENS,
+    RESET_FEEDBACK,
+    GraphState,
+    merge_feedback,
+    merge_update,
+)
+from src.utils.scheduler import CHARS_PER_TOKEN
 
 
 def test_graph_state_initialization():
@@ -19,9 +27,58 @@ def test_graph_state_initialization():
 
 
 def test_review_feedback_annotation():
-    """Verify that the Annotated[list, add] reducer concatenates feedback."""
+    """Verify that the merge_feedback reducer concatenates feedback."""
     feedback_a = ["Missing error handling in POST /users"]
     feedback_b = ["SQL injection in GET /bookings"]
-    combined = feedback_a + feedback_b  # Simulates the `add` operator
+    combined = merge_feedback(feedback_a, feedback_b)
     assert len(combined) == 2
     assert "SQL injection" in combined[1]
+
+
+def test_reset_and_whitespace_dedupe():
+    """A reset starts a new round; repeated items are kept once."""
+    old = ["Fix the users route"]
+
+    assert merge_feedback(old, [RESET_FEEDBACK]) == []
+    assert merge_feedback(old, [RESET_FEEDBACK, "New issue"]) == ["New issue"]
+    assert merge_feedback(old, ["Fix  the users\nroute", "Other"]) == ["Fix the users route", "Other"]
+    assert merge_update({"review_feedback": old}, {"review_feedback": [RESET_FEEDBACK]}) == {
+        "review_feedback": []
+    }
+
+
+def test_merge_update_appends_like_the_graph():
+    """Keys with an add reducer accumulate across updates."""
+    state = {"llm_calls": [{"node": "architect"}], "fingerprints": [{"iteration": 1}]}
+
+    merged = merge_update(state, {"llm_calls": [{"node": "developer"}],
+                                  "fingerprints": [{"iteration": 2}], "iterations": 2})
+
+    assert merged["llm_calls"] == [{"node": "architect"}, {"node": "developer"}]
+    assert merged["fingerprints"] == [{"iteration": 1}, {"iteration": 2}]
+    assert merged["iterations"] == 2
+
+
+def test_feedback_is_capped_newest_first():
+    """Long Jest output is cut and older items are summarized to stay under the cap."""
+    jest = "[TEST FAILURE] Jest test failures:\n" + "at Object.<anonymous> (x.test.js:1:1)\n" * 2000
+    issues = [f"Issue {i}: " + "detail " * 200 for i in range(20)]
+
+    capped = merge_feedback([], issues + [jest])
+
+    assert sum(map(len, capped)) // CHARS_PER_TOKEN <= MAX_FEEDBACK_TOKENS
+    assert capped[-1].startswith("[TEST FAILURE]") and "characters omitted" in capped[-1]
+    assert len(capped[0]) < len(issues[0])  # oldest summarized or dropped
+
+
+def test_developer_prompt_stays_flat_across_iterations():
+    """Each round replaces the previous one, so prompt size does not grow."""
+    state = {"requirements": "r", "db_schema": "s", "review_feedback": []}
+    sizes = []
+    for round_ in range(5):
+        state = merge_update(state, {"review_feedback": [RESET_FEEDBACK]})
+        state = merge_update(state, {"review_feedback": [f"Issue {round_}: " + "x" * 500]})
+        state = merge_update(state, {"review_feedback": ["[TEST FAILURE] " + "y" * 50_000]})
+        sizes.append(len(_build_messages(state)[-1]["content"]))
+
+    assert max(sizes) - min(sizes) <= 10
@@ -0,0 +1,137 @@
+"""Tests for structured reviewer/developer outputs and their text fallbacks."""
+
+import json
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from src.nodes.developer import _output_from
+from src.nodes.reviewer import _parse_review
+from src.utils.code_parser import parse_code_blocks
+from src.utils.llm import get_llm, shutdown_llm_clients
+from src.utils.structured_output import (
+    GeneratedFiles,
+    ReviewVerdict,
+    parse_tool_output,
+    render_files,
+)
+
+
+def _tool_reply(name: str, args: dict) -> AIMessage:
+    return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": "call_1"}])
+
+
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+
+
+def test_parse_tool_output_validates_arguments():
+    good = _tool_reply("ReviewVerdict", {"verdict": "approved", "issues": []})
+    bad = _tool_reply("ReviewVerdict", {"verdict": "maybe"})
+
+    assert parse_tool_output(good, ReviewVerdict).verdict == "approved"
+    assert parse_tool_output(bad, ReviewVerdict) is None
+    assert parse_tool_output(AIMessage(content="APPROVED"), ReviewVerdict) is None
+
+
+def test_rendered_files_round_trip_through_code_parser():
+    files = GeneratedFiles.model_validate({"files": [
+        {"path": "server.js", "content": "const x = 1;\n"},
+        {"path": "package.json", "language": "json", "content": '{"name": "api"}'},
+    ]})
+
+    assert parse_code_blocks(render_files(files)) == {
+        "server.js": "const x = 1;",
+        "package.json": '{"name": "api"}',
+    }
+
+
+# ---------------------------------------------------------------------------
+# Reviewer
+# ---------------------------------------------------------------------------
+
+
+def test_structured_verdict_with_issues():
+    reply = _tool_reply("ReviewVerdict", {
+        "verdict": "changes_requested",
+        "issues": [{
+            "file": "controllers/user.controller.js",
+            "category": "sql_injection",
+            "message": "createUser interpolates req.body into the query.",
+        }],
+    })
+
+    update = _parse_review({"iterations": 1}, reply)
+
+    assert update["review_feedback"] == [
+        "[controllers/user.controller.js] (sql_injection) "
+        "createUser interpolates req.body into the query."
+    ]
+    assert "final_status" not in update
+
+
+@pytest.mark.parametrize("text", [
+    "APPROVED",
+    "```\nAPPROVED\n```",
+    "APPROVED.\nThe code looks good to me.",
+])
+def test_text_fallback_recognises_approval(text):
+    update = _parse_review({"iterations": 1}, AIMessage(content=text))
+    assert update["final_status"] == "approved"
+    assert update["review_feedback"] == []
+
+
+# ---------------------------------------------------------------------------
+# Developer
+# ---------------------------------------------------------------------------
+
+
+def test_developer_prefers_tool_call_and_falls_back_to_text():
+    structured = _tool_reply("GeneratedFiles", {"files": [{"path": "a.js", "content": "x"}]})
+    text = AIMessage(content="```javascript // a.js\ny\n```")
+
+    for reply, content in ((structured, "x"), (text, "y")):
+        code, files = _output_from(reply)
+        assert parse_code_blocks(code) == {"a.js": content}
+        assert list(files) == ["a.js"]
+
+
+# ---------------------------------------------------------------------------
+# Request shape
+# ---------------------------------------------------------------------------
+
+
+@pytest.fixture
+def _routed(openai_stub, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+    monkeypatch.delenv("LLM_CACHE_DIR", raising=False)
+    monkeypatch.delenv("LLM_ROUTING_FILE", raising=False)
+    monkeypatch.delenv("LLM_FALLBACK_ENDPOINTS", raising=False)
+    shutdown_llm_clients()
+    server = openai_stub(reply="APPROVED")
+
+    def route(**section):
+        monkeypatch.setenv("LLM_ROUTING", json.dumps({
+            "default": {"base_url": server.base_url, **section},
+        }))
+        return server
+
+    yield route
+    shutdown_llm_clients()
+
+
+def test_schema_is_sent_as_forced_tool(_routed):
+    server = _routed()
+    get_llm(node="reviewer", schema=ReviewVerdict).invoke("review")
+
+    request = server.requests[0]
+    assert request["tools"][0]["function"]["name"] == "ReviewVerdict"
+    assert request["tool_choice"]["function"]["name"] == "ReviewVerdict"
+
+
+def test_route_can_disable_structured_output(_routed):
+    server = _routed(structured_output=False)
+    get_llm(node="reviewer", schema=ReviewVerdict).invoke("review")
+
+    assert "tools" not in server.requests[0]